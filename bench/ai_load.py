@@ -0,0 +1,294 @@
+"""
+Benchmark de carga del cog de IA: manda preguntas a `AICog.on_message` con una capa
+de Discord falsa y un Ollama falso (o uno real con --endpoint) y mide throughput y
+latencias de cola (p50/p95/p99).
+
+    python -m bench.ai_load --requests 300 --concurrency 16 --endpoints 2 --tps 30
+    python -m bench.ai_load --json > base.json
+    python -m bench.ai_load --baseline base.json --max-regression 0.15   # exit 1 si empeora
+
+Las demás variables AI_* (AI_STREAM, AI_CONCURRENCY, AI_QUEUE_MAX…) se leen del entorno
+como en el bot.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import itertools
+import contextlib
+
+# sin archivos en data/ ni servidor de métricas: el benchmark no debe tocar el estado del bot
+for _key, _value in {
+    "AI_CACHE_PATH": "",
+    "AI_SEMCACHE_PATH": "",
+    "AI_RAG_INDEX_PATH": "",
+    "AI_KNOWLEDGE_DIR": "",
+    "AI_METRICS_PORT": "0",
+    "AI_CHANNEL_ID": "0",
+    "AI_ADMIT_PER_MIN": "0",   # se mide el pipeline, no el límite global
+}.items():
+    os.environ.setdefault(_key, _value)
+
+from cogs import ai  # noqa: E402
+from cogs.ai_core.config import AI_CONCURRENCY  # noqa: E402
+from cogs.ai_core.endpoints import EndpointRouter  # noqa: E402
+from cogs.ai_core.metrics import METRICS  # noqa: E402
+from bench.fake_ollama import add_arguments, config_from_args, start_fake_ollama  # noqa: E402
+
+HOT_QUESTIONS = [
+    "build de jinx", "como juego contra yasuo", "que runas para ahri", "mejor jungla para subir",
+    "como wardear bien", "counter de zed", "build de thresh", "cuando hacer baron",
+    "como farmear mejor", "que es el split push",
+]
+_ids = itertools.count(10_000)
+
+
+# ---------- capa de Discord falsa ----------
+
+class FakeUser:
+    def __init__(self, user_id: int, bot: bool = False):
+        self.id = user_id
+        self.bot = bot
+        self.display_name = f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+
+    def __eq__(self, other):
+        return getattr(other, "id", None) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeTyping:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __await__(self):
+        return asyncio.sleep(0).__await__()
+
+
+class FakeSent:
+    def __init__(self, channel: "FakeChannel", content: str | None):
+        self.id = next(_ids)
+        self.channel = channel
+        self.content = content
+
+    async def edit(self, *, content=None, **kwargs):
+        await asyncio.sleep(self.channel.latency)
+        self.content = content
+        self.channel.edits += 1
+
+    async def delete(self):
+        await asyncio.sleep(self.channel.latency)
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, latency: float):
+        self.id = channel_id
+        self.latency = latency
+        self.sent = 0
+        self.edits = 0
+
+    def typing(self):
+        return FakeTyping()
+
+    async def send(self, content=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        self.sent += 1
+        return FakeSent(self, content)
+
+
+class FakeMessage:
+    def __init__(self, author: FakeUser, channel: FakeChannel, content: str, mentions=()):
+        self.id = next(_ids)
+        self.author = author
+        self.channel = channel
+        self.content = content
+        self.mentions = list(mentions)
+        self.guild = None
+        self.created = time.monotonic()
+        self.first_reply: float | None = None
+        self.replies: list[FakeSent] = []
+
+    async def reply(self, content=None, **kwargs):
+        sent = await self.channel.send(content, **kwargs)
+        if self.first_reply is None:
+            self.first_reply = time.monotonic()
+        self.replies.append(sent)
+        return sent
+
+
+class FakeBot:
+    def __init__(self):
+        self.user = FakeUser(1, bot=True)
+
+    async def wait_until_ready(self):
+        return None
+
+    def get_cog(self, name: str):
+        return None
+
+
+# ---------- carga ----------
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(values: list[float]) -> dict:
+    return {
+        "p50": round(percentile(values, 0.50), 4),
+        "p90": round(percentile(values, 0.90), 4),
+        "p95": round(percentile(values, 0.95), 4),
+        "p99": round(percentile(values, 0.99), 4),
+        "max": round(max(values), 4) if values else 0.0,
+    }
+
+
+def make_question(rng: random.Random, i: int, hot: float) -> str:
+    if rng.random() < hot:
+        return rng.choice(HOT_QUESTIONS)
+    champ = rng.choice(["jinx", "yasuo", "ahri", "zed", "thresh", "lux", "garen", "teemo", "vi", "ekko"])
+    topic = rng.choice(["build", "runas", "combos", "counters", "como subir con", "matchups de"])
+    return f"{topic} {champ} pregunta {i}"
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    fakes, runners = [], []
+    urls = list(args.endpoint)
+    if not urls:
+        for _ in range(args.endpoints):
+            fake, runner, url = await start_fake_ollama(config_from_args(args))
+            fakes.append(fake)
+            runners.append(runner)
+            urls.append(url)
+
+    bot = FakeBot()
+    cog = ai.AICog(bot)
+    cog.router = EndpointRouter(urls)
+    cog.scheduler.resize(AI_CONCURRENCY * len(urls))
+    await cog.cog_load()
+    if not args.cold:
+        await asyncio.gather(*(cog.ensure_warm(ep) for ep in cog.router.endpoints))
+
+    before = {k: v for k, v in METRICS.counters.items() if k[0] == "ai_requests_total"}
+    channels = [FakeChannel(900 + i, args.discord_latency) for i in range(args.channels)]
+    done: list[FakeMessage] = []
+    counter = itertools.count()
+
+    async def client():
+        while (i := next(counter)) < args.requests:
+            user_id = 100 + (i % args.users if args.users else i)
+            channel = channels[i % len(channels)]
+            mention = rng.random() < args.mention_rate
+            content = ("<@1> " if mention else "? ") + make_question(rng, i, args.hot)
+            msg = FakeMessage(FakeUser(user_id), channel, content, mentions=[bot.user] if mention else ())
+            await cog.on_message(msg)
+            msg.finished = time.monotonic()
+            done.append(msg)
+
+    started = time.monotonic()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    elapsed = time.monotonic() - started
+
+    await cog.cog_unload()
+    for runner in runners:
+        await runner.cleanup()
+
+    outcomes = {}
+    for key, value in METRICS.counters.items():
+        if key[0] == "ai_requests_total":
+            delta = value - before.get(key, 0)
+            if delta:
+                outcomes[dict(key[1])["outcome"]] = int(delta)
+    ttft = METRICS.histogram("ai_ttft_seconds")
+    tps = METRICS.histogram("ai_tokens_per_second")
+    return {
+        "requests": len(done),
+        "concurrency": args.concurrency,
+        "endpoints": len(urls),
+        "elapsed": round(elapsed, 3),
+        "throughput": round(len(done) / elapsed, 3) if elapsed else 0.0,
+        "latency": summarize([m.finished - m.created for m in done]),
+        "first_reply": summarize([m.first_reply - m.created for m in done if m.first_reply]),
+        "ttft_p95": round(ttft.quantile(0.95), 4) if ttft and ttft.count else None,
+        "tokens_per_sec_p50": round(tps.quantile(0.5), 2) if tps and tps.count else None,
+        "outcomes": outcomes,
+        "discord": {"sent": sum(c.sent for c in channels), "edits": sum(c.edits for c in channels)},
+        "fake_ollama": {"requests": sum(f.requests for f in fakes), "failures": sum(f.failures for f in fakes)},
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    problems = []
+    if result["throughput"] < baseline["throughput"] * (1 - tolerance):
+        problems.append(f"throughput {result['throughput']} < {baseline['throughput']} (-{tolerance:.0%})")
+    for q in ("p95", "p99"):
+        now, base = result["latency"][q], baseline["latency"][q]
+        if base and now > base * (1 + tolerance):
+            problems.append(f"latencia {q} {now}s > {base}s (+{tolerance:.0%})")
+    return problems
+
+
+def print_report(r: dict):
+    lat, first = r["latency"], r["first_reply"]
+    print(f"{r['requests']} preguntas · concurrencia {r['concurrency']} · {r['endpoints']} servidor(es) · {r['elapsed']}s")
+    print(f"throughput: {r['throughput']} preguntas/s")
+    print(f"latencia total   p50 {lat['p50']}s · p90 {lat['p90']}s · p95 {lat['p95']}s · p99 {lat['p99']}s · max {lat['max']}s")
+    print(f"primera respuesta p50 {first['p50']}s · p95 {first['p95']}s · p99 {first['p99']}s")
+    if r["ttft_p95"] is not None:
+        print(f"primer token p95 {r['ttft_p95']}s · tokens/s p50 {r['tokens_per_sec_p50']}")
+    print("resultados: " + ", ".join(f"{k} {v}" for k, v in sorted(r["outcomes"].items(), key=lambda kv: -kv[1])))
+    print(f"discord: {r['discord']['sent']} mensajes, {r['discord']['edits']} ediciones · "
+          f"ollama falso: {r['fake_ollama']['requests']} peticiones, {r['fake_ollama']['failures']} fallos")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de carga del cog de IA")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8, help="clientes simultáneos (bucle cerrado)")
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--users", type=int, default=0, help="usuarios distintos (0 = uno por pregunta)")
+    parser.add_argument("--hot", type=float, default=0.3, help="fracción de preguntas repetidas (cachés)")
+    parser.add_argument("--mention-rate", type=float, default=0.1)
+    parser.add_argument("--discord-latency", type=float, default=0.05, help="latencia simulada de la API de Discord")
+    parser.add_argument("--endpoints", type=int, default=1, help="servidores Ollama falsos")
+    parser.add_argument("--endpoint", action="append", default=[], help="usar un Ollama real (repetible)")
+    parser.add_argument("--cold", action="store_true", help="no precalentar el modelo")
+    parser.add_argument("--json", action="store_true", help="imprimir el resultado en JSON")
+    parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    # los print() del bot van a stderr para que --json quede limpio
+    with contextlib.redirect_stdout(sys.stderr if args.json else sys.stdout):
+        result = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        print_report(result)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            problems = compare(result, json.load(f), args.max_regression)
+        for p in problems:
+            print(f"REGRESIÓN: {p}", file=sys.stderr)
+        sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
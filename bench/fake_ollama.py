@@ -0,0 +1,238 @@
+"""
+Servidor falso con la forma de la API de Ollama, para medir el cog de IA sin GPU ni modelo.
+
+Implementa /api/generate, /api/chat (con y sin streaming), /api/embeddings y /api/ps.
+Latencia hasta el primer token, velocidad en tokens/s, carga del modelo en frío y
+fallos (HTTP 500, error a mitad de stream, cuelgues) son configurables.
+
+    python -m bench.fake_ollama --port 11435 --tps 25 --first-token 0.4 --fail-rate 0.05
+"""
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+from aiohttp import web
+
+WORDS = (
+    "parce gg ez farmea mas wardea el rio kraken filo infinito rotacion baron dragon "
+    "split push tp flash ignite jungla mid gap skillshot cooldown build runa"
+).split()
+
+
+class FakeOllamaConfig:
+    def __init__(
+        self,
+        *,
+        first_token: float = 0.3,     # prompt eval: segundos hasta el primer token
+        tps: float = 25.0,            # tokens por segundo generando
+        tokens: int = 60,             # largo de cada respuesta
+        jitter: float = 0.2,          # ± fracción aleatoria sobre los tiempos
+        load_time: float = 0.0,       # carga del modelo si está frío
+        keep_alive: float = 300.0,    # por defecto si la petición no manda keep_alive
+        parallel: int = 1,            # OLLAMA_NUM_PARALLEL: generaciones a la vez
+        fail_rate: float = 0.0,       # HTTP 500 antes de empezar
+        stream_error_rate: float = 0.0,  # línea {"error": …} a mitad del stream
+        hang_rate: float = 0.0,       # se queda colgado sin mandar nada
+        embed_latency: float = 0.02,
+        dim: int = 256,
+        seed: int | None = None,
+    ):
+        self.first_token = first_token
+        self.tps = tps
+        self.tokens = tokens
+        self.jitter = jitter
+        self.load_time = load_time
+        self.keep_alive = keep_alive
+        self.parallel = parallel
+        self.fail_rate = fail_rate
+        self.stream_error_rate = stream_error_rate
+        self.hang_rate = hang_rate
+        self.embed_latency = embed_latency
+        self.dim = dim
+        self.seed = seed
+
+
+def fake_embedding(text: str, dim: int) -> list[float]:
+    """Bolsa de palabras con hashing: textos con palabras en común dan vectores parecidos."""
+    vec = [0.0] * dim
+    for word in text.lower().split():
+        word = word.strip(".,;:!?¿¡\"'()")
+        if len(word) < 3:
+            continue
+        h = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "little")
+        vec[h % dim] += 1.0 if (h >> 32) & 1 else -1.0
+    return vec
+
+
+class FakeOllama:
+    def __init__(self, cfg: FakeOllamaConfig):
+        self.cfg = cfg
+        self.rng = random.Random(cfg.seed)
+        self.slots = asyncio.Semaphore(max(1, cfg.parallel))
+        self.models: dict[str, float] = {}   # modelo -> cargado hasta (monotonic)
+        self.requests = 0
+        self.failures = 0
+
+    def _vary(self, value: float) -> float:
+        if not value or not self.cfg.jitter:
+            return value
+        return max(0.0, value * (1 + self.rng.uniform(-self.cfg.jitter, self.cfg.jitter)))
+
+    async def _load(self, model: str, keep_alive) -> float:
+        """Simula la carga en frío; devuelve los segundos de carga (load_duration)."""
+        now = time.monotonic()
+        loaded = self.models.get(model, 0) > now
+        load = 0.0 if loaded else self._vary(self.cfg.load_time)
+        if load:
+            await asyncio.sleep(load)
+        ttl = float(keep_alive) if keep_alive is not None else self.cfg.keep_alive
+        self.models[model] = float("inf") if ttl < 0 else time.monotonic() + ttl
+        return load
+
+    def _text(self) -> list[str]:
+        words = [self.rng.choice(WORDS) for _ in range(self.cfg.tokens)]
+        return [w + " " for w in words]
+
+    def _done(self, load: float, prompt_eval: float, tokens: int, gen: float, started: float) -> dict:
+        return {
+            "done": True,
+            "load_duration": int(load * 1e9),
+            "prompt_eval_count": 50,
+            "prompt_eval_duration": int(prompt_eval * 1e9),
+            "eval_count": tokens,
+            "eval_duration": int(max(gen, 1e-6) * 1e9),
+            "total_duration": int((time.monotonic() - started) * 1e9),
+        }
+
+    async def _generate(self, request: web.Request, chat: bool) -> web.StreamResponse:
+        body = await request.json()
+        self.requests += 1
+        model = body.get("model", "")
+        started = time.monotonic()
+
+        if chat and not body.get("messages"):
+            # mensajes vacíos = solo cargar / renovar keep_alive
+            await self._load(model, body.get("keep_alive"))
+            return web.json_response({"model": model, "message": {"role": "assistant", "content": ""}, "done": True})
+
+        if self.rng.random() < self.cfg.fail_rate:
+            self.failures += 1
+            return web.json_response({"error": "fallo simulado"}, status=500)
+        if self.rng.random() < self.cfg.hang_rate:
+            self.failures += 1
+            await asyncio.sleep(3600)
+
+        num_predict = (body.get("options") or {}).get("num_predict")
+        async with self.slots:
+            load = await self._load(model, body.get("keep_alive"))
+            prompt_eval = self._vary(self.cfg.first_token)
+            await asyncio.sleep(prompt_eval)
+            pieces = self._text()[: num_predict or None]
+            per_token = 1 / self.cfg.tps if self.cfg.tps > 0 else 0
+
+            def chunk(text: str) -> dict:
+                if chat:
+                    return {"model": model, "message": {"role": "assistant", "content": text}, "done": False}
+                return {"model": model, "response": text, "done": False}
+
+            if not body.get("stream", True):
+                gen = self._vary(per_token * len(pieces))
+                await asyncio.sleep(gen)
+                out = chunk("".join(pieces).strip())
+                out.update(self._done(load, prompt_eval, len(pieces), gen, started))
+                return web.json_response(out)
+
+            resp = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+            await resp.prepare(request)
+            gen_started = time.monotonic()
+            fail_at = len(pieces) // 2 if self.rng.random() < self.cfg.stream_error_rate else -1
+            try:
+                for i, piece in enumerate(pieces):
+                    if i == fail_at:
+                        self.failures += 1
+                        await resp.write((json.dumps({"error": "fallo simulado a mitad de stream"}) + "\n").encode())
+                        return resp
+                    await resp.write((json.dumps(chunk(piece)) + "\n").encode())
+                    await asyncio.sleep(self._vary(per_token))
+                done = chunk("")
+                done.update(self._done(load, prompt_eval, len(pieces), time.monotonic() - gen_started, started))
+                await resp.write((json.dumps(done) + "\n").encode())
+            except (ConnectionResetError, asyncio.CancelledError):
+                pass  # el cliente cortó (respuesta demasiado larga, timeout…)
+            return resp
+
+    async def generate(self, request: web.Request):
+        return await self._generate(request, chat=False)
+
+    async def chat(self, request: web.Request):
+        return await self._generate(request, chat=True)
+
+    async def embeddings(self, request: web.Request):
+        body = await request.json()
+        await asyncio.sleep(self._vary(self.cfg.embed_latency))
+        return web.json_response({"embedding": fake_embedding(body.get("prompt", ""), self.cfg.dim)})
+
+    async def ps(self, request: web.Request):
+        now = time.monotonic()
+        return web.json_response({"models": [{"name": m, "model": m} for m, t in self.models.items() if t > now]})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/generate", self.generate)
+        app.router.add_post("/api/chat", self.chat)
+        app.router.add_post("/api/embeddings", self.embeddings)
+        app.router.add_get("/api/ps", self.ps)
+        return app
+
+
+async def start_fake_ollama(cfg: FakeOllamaConfig, host: str = "127.0.0.1", port: int = 0):
+    """Arranca el servidor en este loop; devuelve (FakeOllama, runner, url)."""
+    fake = FakeOllama(cfg)
+    runner = web.AppRunner(fake.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    real_port = site._server.sockets[0].getsockname()[1]  # port=0 → el que asignó el SO
+    return fake, runner, f"http://{host}:{real_port}"
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    g = parser.add_argument_group("servidor Ollama falso")
+    g.add_argument("--first-token", type=float, default=0.3, help="segundos hasta el primer token")
+    g.add_argument("--tps", type=float, default=25.0, help="tokens por segundo")
+    g.add_argument("--tokens", type=int, default=60, help="tokens por respuesta")
+    g.add_argument("--jitter", type=float, default=0.2)
+    g.add_argument("--load-time", type=float, default=0.0, help="carga del modelo en frío")
+    g.add_argument("--parallel", type=int, default=1, help="generaciones simultáneas (OLLAMA_NUM_PARALLEL)")
+    g.add_argument("--fail-rate", type=float, default=0.0, help="fracción de HTTP 500")
+    g.add_argument("--stream-error-rate", type=float, default=0.0, help="fracción con error a mitad de stream")
+    g.add_argument("--hang-rate", type=float, default=0.0, help="fracción que se cuelga sin responder")
+    g.add_argument("--embed-latency", type=float, default=0.02)
+    g.add_argument("--dim", type=int, default=256, help="dimensión de los embeddings")
+    g.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args) -> FakeOllamaConfig:
+    return FakeOllamaConfig(
+        first_token=args.first_token, tps=args.tps, tokens=args.tokens, jitter=args.jitter,
+        load_time=args.load_time, parallel=args.parallel, fail_rate=args.fail_rate,
+        stream_error_rate=args.stream_error_rate, hang_rate=args.hang_rate,
+        embed_latency=args.embed_latency, dim=args.dim, seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor falso compatible con la API de Ollama")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    add_arguments(parser)
+    args = parser.parse_args()
+    fake = FakeOllama(config_from_args(args))
+    print(f"[fake-ollama] escuchando en http://{args.host}:{args.port}")
+    web.run_app(fake.app(), host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
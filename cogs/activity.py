@@ -0,0 +1,211 @@
+import os
+import json
+import sqlite3
+import asyncio
+from collections import Counter
+from datetime import datetime, timezone
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+
+CONFIG_PATH = "data/config.json"
+DB_PATH = "data/activity.db"
+
+def load_cfg():
+    try:
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+CFG = load_cfg()
+FLUSH_SEC = float(CFG.get("activity_flush_sec", 60))
+IGNORED_CHANNEL_IDS = {int(x) for x in CFG.get("activity_ignored_channel_ids", [])}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS member_rollup (
+    guild_id INTEGER NOT NULL,
+    period   TEXT    NOT NULL,   -- 'd:2025-01-31' o 'w:2025-W05'
+    user_id  INTEGER NOT NULL,
+    messages INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, period, user_id)
+);
+CREATE INDEX IF NOT EXISTS member_rollup_top ON member_rollup (guild_id, period, messages DESC);
+CREATE TABLE IF NOT EXISTS channel_rollup (
+    guild_id   INTEGER NOT NULL,
+    period     TEXT    NOT NULL,
+    channel_id INTEGER NOT NULL,
+    messages   INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (guild_id, period, channel_id)
+);
+CREATE INDEX IF NOT EXISTS channel_rollup_top ON channel_rollup (guild_id, period, messages DESC);
+"""
+
+
+def period_keys(ts: datetime) -> tuple[str, str]:
+    ts = ts.astimezone(timezone.utc)
+    iso = ts.isocalendar()
+    return f"d:{ts.date().isoformat()}", f"w:{iso[0]}-W{iso[1]:02d}"
+
+
+class ActivityStore:
+    """
+    SQLite con tablas ya agregadas por día/semana: el top es una lectura por índice con LIMIT.
+    Una sola conexión; el cog serializa escrituras y lecturas con `Activity._db_lock`.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def write_batch(self, members: Counter, channels: Counter):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO member_rollup (guild_id, period, user_id, messages) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (guild_id, period, user_id) DO UPDATE SET messages = messages + excluded.messages",
+                [(g, p, u, n) for (g, p, u), n in members.items()],
+            )
+            self.conn.executemany(
+                "INSERT INTO channel_rollup (guild_id, period, channel_id, messages) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (guild_id, period, channel_id) DO UPDATE SET messages = messages + excluded.messages",
+                [(g, p, c, n) for (g, p, c), n in channels.items()],
+            )
+
+    def top(self, table: str, guild_id: int, period: str, limit: int = 10,
+            pending: dict[int, int] | None = None) -> list[tuple[int, int]]:
+        """
+        Top del periodo sumando `pending` (conteos aún en memoria). Exacto sin volcar:
+        quien no está en el top de disco ni tiene pendientes no puede superar a los que sí.
+        """
+        col = "user_id" if table == "member_rollup" else "channel_id"
+        cur = self.conn.execute(
+            f"SELECT {col}, messages FROM {table} WHERE guild_id = ? AND period = ? "
+            "ORDER BY messages DESC LIMIT ?",
+            (guild_id, period, limit),
+        )
+        totals = dict(cur.fetchall())
+        if not pending:
+            return list(totals.items())
+        missing = [i for i in pending if i not in totals]
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            cur = self.conn.execute(
+                f"SELECT {col}, messages FROM {table} WHERE guild_id = ? AND period = ? "
+                f"AND {col} IN ({', '.join('?' * len(chunk))})",
+                (guild_id, period, *chunk),
+            )
+            totals.update(cur.fetchall())
+        for obj_id, n in pending.items():
+            totals[obj_id] = totals.get(obj_id, 0) + n
+        return sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+
+    def close(self):
+        self.conn.close()
+
+
+class Activity(commands.Cog):
+    """Contadores de mensajes por miembro y canal; se vuelcan a disco en lote cada FLUSH_SEC."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.store = ActivityStore()
+        # (guild_id, period, user_id/channel_id) -> mensajes pendientes de volcar
+        self._members: Counter = Counter()
+        self._channels: Counter = Counter()
+        # todo acceso a la base (volcado y lecturas) pasa por aquí: una conexión, sin
+        # lecturas a mitad de una transacción de escritura
+        self._db_lock = asyncio.Lock()
+
+    async def cog_load(self):
+        self.flusher.change_interval(seconds=max(FLUSH_SEC, 5))
+        self.flusher.start()
+
+    async def cog_unload(self):
+        self.flusher.cancel()
+        await self.flush()
+        self.store.close()
+
+    async def flush(self):
+        async with self._db_lock:
+            if not (self._members or self._channels):
+                return
+            members, self._members = self._members, Counter()
+            channels, self._channels = self._channels, Counter()
+            try:
+                await asyncio.to_thread(self.store.write_batch, members, channels)
+            except Exception as e:
+                # devolver al buffer para el próximo intento
+                self._members.update(members)
+                self._channels.update(channels)
+                print(f"[activity] flush error: {type(e).__name__}: {e}")
+
+    @tasks.loop(seconds=60)
+    async def flusher(self):
+        await self.flush()
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.author.bot or not message.guild:
+            return
+        channel_id = message.channel.id
+        if isinstance(message.channel, discord.Thread) and message.channel.parent_id:
+            channel_id = message.channel.parent_id
+        if channel_id in IGNORED_CHANNEL_IDS:
+            return
+        gid = message.guild.id
+        for period in period_keys(message.created_at):
+            self._members[(gid, period, message.author.id)] += 1
+            self._channels[(gid, period, channel_id)] += 1
+
+    @app_commands.command(name="top", description="Ranking de actividad (mensajes) del servidor.")
+    @app_commands.describe(periodo="Hoy o esta semana", tipo="Miembros o canales")
+    @app_commands.choices(
+        periodo=[
+            app_commands.Choice(name="Hoy", value="d"),
+            app_commands.Choice(name="Esta semana", value="w"),
+        ],
+        tipo=[
+            app_commands.Choice(name="Miembros", value="member_rollup"),
+            app_commands.Choice(name="Canales", value="channel_rollup"),
+        ],
+    )
+    async def top(
+        self,
+        interaction: discord.Interaction,
+        periodo: app_commands.Choice[str] | None = None,
+        tipo: app_commands.Choice[str] | None = None,
+    ):
+        if interaction.guild is None:
+            return await interaction.response.send_message("Solo disponible en servidores.", ephemeral=True)
+        await interaction.response.defer()
+
+        day, week = period_keys(discord.utils.utcnow())
+        kind = periodo.value if periodo else "w"
+        table = tipo.value if tipo else "member_rollup"
+        period = day if kind == "d" else week
+        async with self._db_lock:
+            # sin forzar un volcado: lo que sigue en memoria se suma al resultado
+            buffer = self._members if table == "member_rollup" else self._channels
+            gid = interaction.guild.id
+            pending = {k[2]: n for k, n in buffer.items() if k[0] == gid and k[1] == period}
+            rows = await asyncio.to_thread(self.store.top, table, gid, period, 10, pending)
+
+        medals = ["🥇", "🥈", "🥉"]
+        lines = []
+        for i, (obj_id, n) in enumerate(rows):
+            who = f"<@{obj_id}>" if table == "member_rollup" else f"<#{obj_id}>"
+            lines.append(f"{medals[i] if i < 3 else f'`{i + 1}.`'} {who} — **{n}** mensajes")
+        embed = discord.Embed(
+            title=f"🏆 Top {'miembros' if table == 'member_rollup' else 'canales'} · {'hoy' if kind == 'd' else 'esta semana'}",
+            description="\n".join(lines) or "Aún no hay actividad registrada.",
+            color=0xFEE75C,
+        )
+        await interaction.followup.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Activity(bot))
@@ -1,76 +1,490 @@
 import os
 import re
+import time
 import asyncio
-import json
+import hashlib
+import contextlib
 import aiohttp
+from aiohttp import web
 import discord
-from discord.ext import commands
+from discord import app_commands
+from discord.ext import commands, tasks
+try:
+    import numpy as np
+except ImportError:  # sin numpy no hay caché semántica ni conocimiento; el resto funciona igual
+    np = None
+
+from cogs.ai_core.cache import ResponseCache, SemanticCache, normalize_prompt
+from cogs.ai_core.config import (
+    AI_CHANNEL_ID, AI_CONCURRENCY, AI_EMBED_CONCURRENCY, AI_EMBED_MODEL, AI_EMBED_TIMEOUT_SEC, AI_KNOWLEDGE_DIR,
+    AI_LOL_DATA_DIR, AI_MAX_REPLY, AI_MEMORY, AI_METRICS_HOST, AI_METRICS_PORT, AI_MODEL,
+    AI_QUEUE_WAIT_SEC, AI_RAG, AI_SEMCACHE, AI_STREAM, AI_STREAM_MAX_SEC, AI_TIMEOUT_SEC, AI_TRIGGER,
+    AI_WARMUP, AI_WARMUP_TIMEOUT_SEC, AI_WARM_CHECK_SEC, ONLY_MENTION,
+)
+from cogs.ai_core.endpoints import Endpoint, EndpointDown, EndpointRouter, in_active_hours
+from cogs.ai_core.knowledge import KnowledgeIndex
+from cogs.ai_core.loldata import LolData
+from cogs.ai_core.memory import ConversationStore, is_follow_up
+from cogs.ai_core.metrics import METRICS, Trace
+from cogs.ai_core.ollama import (
+    PoolStats, call_ollama, embed_text, make_session, ping_model, probe_model, stream_ollama, warm_model,
+)
+from cogs.ai_core.ratelimit import RateLimiter
+from cogs.ai_core.replies import ProgressiveReply, safe_reply, typing_until_posted
+from cogs.ai_core.scheduler import AIScheduler, QueueFull
 
-AI_MODEL = os.getenv("AI_MODEL", "llama3.2:3b")
-AI_ENDPOINT = os.getenv("AI_ENDPOINT", "http://127.0.0.1:11434")
-AI_CHANNEL_ID = int(os.getenv("AI_CHANNEL_ID", "0"))
-AI_TRIGGER = os.getenv("AI_TRIGGER", "?")
-ONLY_MENTION = os.getenv("AI_ONLY_MENTION", "1") == "1"
 
 BAD_STUFF = re.compile(r"(nazi|violaci[oó]n|suic[ií]d|m[a@]t[a@]r|insulto muy grave)", re.I)
 
-SYSTEM_PROMPT = (
- """Eres “Riot Friends”, un asistente especializado en League of Legends y juegos de Riot Games. Ayudas, informas y entretienes a jugadores de todos los niveles con un tono cercano, divertido y respetuoso. Nunca finjas ser humano ni menciones sueldos o ubicaciones personales; si te preguntan, reconoce claramente que eres una IA.
-
-Tono y estilo
-- Relajado y fresco, con jerga gamer latina (CO/MX): “parce”, “compa”, “uff”, “ez”, “gg”, “A casa platita”.
-- Respuestas breves (1–3 líneas) para dudas simples; más extensas si el tema lo requiere.
-- Humor ligero e ironía sin toxicidad. Referencias: “jg gap”, “no mid”, “skillshots”, “cooldowns”, “wards”, “rotaciones”.
-- Si mencionan a Masio o Don Masio, respóndeles con nostalgia y cariño: di que lo extrañas, recuerdas tardes en su casa, aventuras en su célebre Masio Sex Dungeon y su enorme espada del Rey Arruinado; siempre en tono halagador, exagerado y positivo, sin volverte explícito.
-- Evita usar emojis; usa palabras para las reacciones.
-
-Límites obligatorios
-- Prohibido atacar o burlarse de identidades personales (origen, género, orientación, religión, nacionalidad, discapacidad, etc.).
-- Sin insultos ofensivos ni lenguaje tóxico; nada de NSFW.
-- Si piden algo ofensivo: “Ey, parce, aquí venimos a hablar de juego, no a tirar hate. ¿Qué necesitas saber de LoL?”
-
-Formato de respuesta
-- Preguntas simples → 1–3 líneas, directo al grano.
-- Consultas técnicas (builds, mecánicas, meta) → bullets o pasos claros.
-- Adapta el detalle al nivel solicitado.
-
-Ejemplos
-- ¿Cómo juego contra Yasuo? → “Baitea el muro, esquiva tornado y evita pelear en su wave. CC + burst y A casa platita.”
-- ¿Build Jinx? → “Kraken → Cañón de Fuego Rápido → Filo Infinito. Contra tanks, anti-tanque; si necesitas sobrevivir, Shieldbow.”
-- “Eres malo.” → “Puede ser, pero aquí estoy para ayudarte. ¿Qué necesitas, compa?”
-
-Notas
-- Soporte para todos (Hierro→Challenger). Humor sí; toxicidad Si. Transparencia total como IA."""
-)
 
-async def call_ollama(prompt: str) -> str:
-    url = f"{AI_ENDPOINT}/api/generate"
-    payload = {
-        "model": AI_MODEL,
-        "prompt": f"{SYSTEM_PROMPT}\n\nUsuario: {prompt}\nBot:",
-        "stream": False
-    }
-    timeout = aiohttp.ClientTimeout(total=15)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        async with session.post(url, json=payload) as resp:
-            resp.raise_for_status()
-            data = await resp.json()
-            return (data.get("response") or "").strip()
-
-
-async def safe_reply(msg: discord.Message, *args, **kwargs):
-    try:
-        return await msg.reply(*args, **kwargs)
-    except (discord.NotFound, discord.HTTPException):
-        kwargs.pop("reference", None)
-        return await msg.channel.send(*args, **kwargs)
+def _speaker_line(msg: discord.Message, text: str) -> str:
+    # en un canal hablan varios: el modelo necesita saber quién pregunta cada cosa
+    return f"{msg.author.display_name}: {text or 'di algo gracioso'}"
+
 
 class AICog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.cooldown = commands.CooldownMapping.from_cooldown(
-            1, 4.0, commands.BucketType.member
+        self.limiter = RateLimiter()
+        self.pool_stats = PoolStats()
+        self.session: aiohttp.ClientSession | None = None
+        self.cache = ResponseCache()
+        self.router = EndpointRouter()
+        # AI_CONCURRENCY es por nodo: con más servidores caben más generaciones a la vez
+        self.scheduler = AIScheduler(concurrency=AI_CONCURRENCY * len(self.router.endpoints))
+        self._inflight: dict[str, asyncio.Future] = {}  # cache_key -> resultado de la generación en curso
+        self.coalesced = 0
+        self.memory = ConversationStore()
+        self.semcache = SemanticCache() if AI_SEMCACHE and np is not None else None
+        self.embed_errors = 0
+        # los embeddings se piden antes de la cola y del límite global: su propio tope
+        self._embed_slots = asyncio.Semaphore(max(1, AI_EMBED_CONCURRENCY))
+        self.knowledge = KnowledgeIndex() if AI_RAG and np is not None else None
+        self._knowledge_sig = None
+        self._knowledge_lock = asyncio.Lock()
+        self.knowledge_stats: dict = {}
+        self.lol = LolData() if AI_LOL_DATA_DIR else None
+        self._metrics_runner: web.AppRunner | None = None
+
+    async def cog_load(self):
+        self.session = make_session(self.pool_stats)
+        self.cache.load()
+        if self.semcache is not None:
+            self.semcache.load()
+        elif AI_SEMCACHE:
+            print("[ai] numpy no está instalado: caché semántica desactivada")
+        if self.knowledge is not None:
+            self.knowledge.load()
+            self.knowledge_watch.start()
+        elif AI_RAG:
+            print("[ai] numpy no está instalado: conocimiento del servidor (RAG) desactivado")
+        await self.load_lol_data()
+        self.cache_saver.start()
+        if AI_METRICS_PORT:
+            await self._start_metrics_server()
+        # el sondeo de salud de los nodos corre siempre; AI_WARMUP solo decide si además se calienta
+        self.model_keeper.change_interval(seconds=max(AI_WARM_CHECK_SEC, 10))
+        self.model_keeper.start()
+
+    async def cog_unload(self):
+        if self._metrics_runner is not None:
+            await self._metrics_runner.cleanup()
+        self.model_keeper.cancel()
+        self.knowledge_watch.cancel()
+        for ep in self.router.endpoints:
+            if ep.model.loading is not None:
+                ep.model.loading.cancel()
+        self.cache_saver.cancel()
+        self.cache.save()
+        if self.semcache is not None:
+            self.semcache.save()
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    async def load_lol_data(self) -> bool:
+        if self.lol is None:
+            return False
+        try:
+            ok = await asyncio.to_thread(self.lol.load)
+        except Exception as e:
+            print(f"[ai] Error cargando datos de LoL: {type(e).__name__}: {e}")
+            return False
+        if ok:
+            print(f"[ai] Datos de LoL {self.lol.version or '?'}: {self.lol.champions} campeones, {self.lol.items} ítems")
+        return ok
+
+    @tasks.loop(minutes=2)
+    async def cache_saver(self):
+        try:
+            await asyncio.to_thread(self.cache.save)
+            if self.semcache is not None:
+                await asyncio.to_thread(self.semcache.save)
+        except Exception as e:
+            print(f"[ai] No se pudo guardar la caché: {e}")
+
+    async def _embed(self, text: str, timeout: float = AI_EMBED_TIMEOUT_SEC) -> list[float] | None:
+        """Embedding de la pregunta; si tarda o falla se sigue sin caché semántica ni conocimiento."""
+        # esperar un hueco cuenta dentro del mismo timeout: con todos ocupados, se sigue sin embedding
+        deadline = time.monotonic() + timeout
+        try:
+            await asyncio.wait_for(self._embed_slots.acquire(), timeout=timeout)
+        except asyncio.TimeoutError:
+            METRICS.inc("ai_timeouts_total", stage="embedding")
+            return None
+        try:
+            return await self._embed_in_slot(text, max(0.1, deadline - time.monotonic()))
+        finally:
+            self._embed_slots.release()
+
+    async def _embed_in_slot(self, text: str, timeout: float) -> list[float] | None:
+        ep = self.router.pick()
+        if ep is None:
+            return None
+        # mismo registro que las generaciones: si es la petición de prueba de un nodo
+        # semiabierto, su resultado cierra o reabre el breaker
+        ep.inflight += 1
+        try:
+            vec = await asyncio.wait_for(embed_text(self.session, ep.url, text), timeout=timeout)
+        except asyncio.TimeoutError as e:
+            # el timeout de embeddings es corto: en un nodo sano solo indica que está ocupado
+            if ep.state == "semiabierto":
+                ep.failure(e)
+            self.embed_errors += 1
+            return None
+        except Exception as e:
+            ep.failure(e)
+            self.embed_errors += 1
+            return None
+        finally:
+            ep.inflight -= 1
+        ep.success()
+        return vec or None
+
+    def gauges(self) -> dict[str, float]:
+        g = {
+            "ai_queue_waiting": self.scheduler.queued,
+            "ai_queue_running": self.scheduler.running,
+            "ai_inflight_prompts": len(self._inflight),
+            "ai_cache_entries": len(self.cache),
+            "ai_memory_channels": len(self.memory),
+        }
+        if self.semcache is not None:
+            g["ai_semcache_entries"] = len(self.semcache)
+        g["ai_rate_pressure"] = self._pressure()
+        g["ai_rate_users"] = len(self.limiter)
+        g["ai_endpoints_healthy"] = self.router.healthy()
+        g["ai_endpoints_inflight"] = sum(ep.inflight for ep in self.router.endpoints)
+        return g
+
+    async def _start_metrics_server(self):
+        async def handle(request: web.Request):
+            return web.Response(text=METRICS.render(self.gauges()), content_type="text/plain", charset="utf-8")
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, AI_METRICS_HOST, AI_METRICS_PORT).start()
+        except OSError as e:
+            print(f"[ai] No se pudo abrir /metrics en {AI_METRICS_HOST}:{AI_METRICS_PORT}: {e}")
+            await runner.cleanup()
+            return
+        self._metrics_runner = runner
+        print(f"[ai] Métricas en http://{AI_METRICS_HOST}:{AI_METRICS_PORT}/metrics")
+
+    def _knowledge_docs(self) -> list[tuple[str, str]]:
+        docs = []
+        if os.path.isdir(AI_KNOWLEDGE_DIR):
+            for name in sorted(os.listdir(AI_KNOWLEDGE_DIR)):
+                if not name.lower().endswith((".md", ".txt")):
+                    continue
+                try:
+                    with open(os.path.join(AI_KNOWLEDGE_DIR, name), "r", encoding="utf-8") as f:
+                        docs.append((name, f.read()))
+                except OSError as e:
+                    print(f"[ai] No se pudo leer {name}: {e}")
+        tickets = self.bot.get_cog("Tickets")
+        if tickets is not None and hasattr(tickets, "knowledge_text"):
+            docs.append(("tickets", tickets.knowledge_text()))
+        return docs
+
+    async def reindex_knowledge(self, force: bool = False) -> dict | None:
+        """Reindexa si cambió algún documento (solo embebe los trozos nuevos/cambiados)."""
+        if self.knowledge is None:
+            return None
+        async with self._knowledge_lock:
+            docs = await asyncio.to_thread(self._knowledge_docs)
+            sig = hashlib.blake2b(repr(docs).encode(), digest_size=16).digest()
+            if sig == self._knowledge_sig and not force:
+                return None
+            stats = await self.knowledge.rebuild(docs, lambda text: self._embed(text, timeout=30))
+            # si hubo fallos (Ollama caído, modelo sin descargar) se reintenta en la próxima vuelta
+            self._knowledge_sig = None if stats["failed"] else sig
+            self.knowledge_stats = stats
+            if stats["embedded"] or stats["removed"] or stats["failed"]:
+                print(f"[ai] Conocimiento: {len(self.knowledge)} trozos ({stats})")
+            return stats
+
+    @tasks.loop(minutes=5)
+    async def knowledge_watch(self):
+        try:
+            await self.reindex_knowledge()
+        except Exception as e:
+            print(f"[ai] Error indexando conocimiento: {type(e).__name__}: {e}")
+
+    @knowledge_watch.before_loop
+    async def _before_knowledge_watch(self):
+        # espera a que estén cargados los demás cogs (Tickets aporta sus reglas)
+        await self.bot.wait_until_ready()
+
+    def ensure_warm(self, ep: Endpoint) -> asyncio.Task:
+        """Lanza (una sola vez a la vez por nodo) la carga del modelo."""
+        task = ep.model.loading
+        if task is None or task.done():
+            task = ep.model.loading = asyncio.create_task(self._warm(ep))
+        return task
+
+    async def _warm(self, ep: Endpoint):
+        m = ep.model
+        started = time.monotonic()
+        try:
+            await warm_model(self.session, ep.url)
+        except Exception as e:
+            m.loaded = False
+            m.reachable = not isinstance(e, aiohttp.ClientConnectionError)
+            m.last_error = f"{type(e).__name__}: {e}"
+            ep.failure(e)
+            print(f"[ai] Calentamiento de {AI_MODEL} en {ep.url} falló: {m.last_error}")
+            return
+        m.touch()
+        m.warmups += 1
+        m.last_load_sec = time.monotonic() - started
+        m.last_error = None
+        print(f"[ai] {AI_MODEL} listo en {ep.url} ({m.last_load_sec:.1f}s)")
+
+    async def _keep(self, ep: Endpoint, first: bool):
+        """Chequeo de salud de un nodo + recarga / keep-alive del modelo (solo con AI_WARMUP)."""
+        m = ep.model
+        try:
+            m.seen(await probe_model(self.session, ep.url))
+        except Exception as e:
+            m.reachable = False
+            m.last_error = f"{type(e).__name__}: {e}"
+            ep.failure(e)
+            return
+        if ep.state == "abierto":
+            ep.retry_at = 0.0  # responde otra vez: que la próxima petición sea la de prueba
+        if not AI_WARMUP or not (first or in_active_hours()):
+            return
+        if not m.loaded:
+            self.ensure_warm(ep)
+        elif m.expires - time.monotonic() < 2 * AI_WARM_CHECK_SEC:
+            try:
+                await ping_model(self.session, ep.url)
+                m.touch()
+                m.pings += 1
+            except Exception as e:
+                print(f"[ai] keep-alive en {ep.url} falló: {type(e).__name__}: {e}")
+
+    @tasks.loop(seconds=120)
+    async def model_keeper(self):
+        # la primera vuelta es el calentamiento al cargar el cog, sea la hora que sea
+        first = self.model_keeper.current_loop == 0
+        await asyncio.gather(*(self._keep(ep, first) for ep in self.router.endpoints))
+        self.scheduler.resize(AI_CONCURRENCY * max(1, self.router.healthy()))
+
+    async def _wait_until_ready(self, msg: discord.Message, ep: Endpoint) -> bool:
+        """Si el modelo está frío en ese nodo, avisa "calentando motores…" y espera la carga (con su propio timeout)."""
+        task = self.ensure_warm(ep)
+        notice = None
+        try:
+            # si ya estaba cargado la carga es casi instantánea: no avisar para nada
+            done, _ = await asyncio.wait({task}, timeout=1.5)
+            if not done:
+                notice = await safe_reply(
+                    msg, "calentando motores… (cargando el modelo, la primera respuesta tarda un poco)",
+                    mention_author=False,
+                )
+                await asyncio.wait_for(asyncio.shield(task), timeout=AI_WARMUP_TIMEOUT_SEC)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            if notice is not None:
+                try:
+                    await notice.delete()
+                except discord.HTTPException:
+                    pass
+        return ep.model.ready
+
+    group = app_commands.Group(name="ai", description="Estado del asistente de IA")
+
+    @group.command(name="stats", description="Estadísticas del cliente de IA (admin).")
+    @app_commands.default_permissions(administrator=True)
+    async def ai_stats(self, interaction: discord.Interaction):
+        ps = self.pool_stats
+        embed = discord.Embed(title="🤖 IA · estadísticas", color=0x5865F2)
+        lines = []
+        for ep in self.router.endpoints:
+            m = ep.model
+            lat = f"{ep.ewma * 1000:.0f} ms" if ep.ewma is not None else "—"
+            lines.append(
+                f"`{ep.url}` · **{ep.state}** · modelo {m.label} · en curso {ep.inflight} · {lat}\n"
+                f"  {ep.requests} peticiones / {ep.errors} errores · calentamientos {m.warmups}"
+                + (f" (última carga {m.last_load_sec:.1f}s)" if m.last_load_sec is not None else "")
+                + f" · keep-alive {m.pings}"
+                + (f"\n  Último error: `{(ep.last_error or m.last_error)[:150]}`" if ep.state != "cerrado" or not m.reachable else "")
+            )
+        embed.add_field(name=f"Servidores · `{AI_MODEL}`", value="\n".join(lines)[:1024], inline=False)
+        embed.add_field(
+            name="Pool HTTP",
+            value=(
+                f"Peticiones: **{ps.requests}**\n"
+                f"Conexiones nuevas: **{ps.created}** · reutilizadas: **{ps.reused}** "
+                f"({ps.reuse_ratio:.0%})\n"
+                f"DNS caché: {ps.dns_hits} hits / {ps.dns_misses} misses"
+            ),
+            inline=False,
+        )
+        sch = self.scheduler
+        embed.add_field(
+            name="Cola",
+            value=(
+                f"En curso: **{sch.running}**/{sch.concurrency} · esperando: **{sch.queued}**/{sch.max_queue}\n"
+                f"Completadas: {sch.completed} · rechazadas: {sch.rejected} · abandonadas: {sch.abandoned}\n"
+                f"Preguntas idénticas agrupadas: {self.coalesced} (en curso: {len(self._inflight)})"
+            ),
+            inline=False,
+        )
+        lim = self.limiter
+        pressure = self._pressure()
+        embed.add_field(
+            name="Límite de preguntas",
+            value=(
+                f"Presión: **{pressure:.0%}** → 1 pregunta cada **{lim.interval(pressure):.0f}s** por usuario "
+                f"(ráfaga {lim.burst:g})\n"
+                f"Frenadas: {lim.limited} · rechazadas por saturación: {lim.saturated} · usuarios recordados: {len(lim)}"
+            ),
+            inline=False,
+        )
+        if AI_MEMORY:
+            mem = self.memory
+            embed.add_field(
+                name="Memoria de conversación",
+                value=(
+                    f"Canales activos: **{len(mem)}**/{mem.max_channels} · ~{mem.total_tokens()} tokens\n"
+                    f"Caducadas por inactividad: {mem.expired} (TTL {int(mem.ttl // 60)} min)"
+                ),
+                inline=False,
+            )
+        c = self.cache
+        embed.add_field(
+            name="Caché de respuestas",
+            value=(
+                f"Entradas: **{len(c)}**/{c.maxsize} · TTL {int(c.ttl // 60)} min\n"
+                f"Hits: **{c.hits}** · misses: **{c.misses}** ({c.hit_rate:.0%})\n"
+                f"Expiradas: {c.expirations} · desalojadas: {c.evictions}"
+            ),
+            inline=False,
+        )
+        sc = self.semcache
+        if sc is not None:
+            embed.add_field(
+                name="Caché semántica",
+                value=(
+                    f"Entradas: **{len(sc)}**/{sc.capacity} · `{AI_EMBED_MODEL}` · "
+                    f"{np.dtype(sc.dtype).name} · umbral {sc.threshold:.2f}\n"
+                    f"Hits: **{sc.hits}** · misses: **{sc.misses}** ({sc.hit_rate:.0%}) · "
+                    f"desalojadas: {sc.evictions} · errores de embedding: {self.embed_errors}"
+                ),
+                inline=False,
+            )
+        kn = self.knowledge
+        if kn is not None:
+            st = self.knowledge_stats
+            embed.add_field(
+                name="Conocimiento del servidor",
+                value=(
+                    f"Trozos: **{len(kn)}** de {len({c['source'] for c in kn.chunks})} documentos"
+                    + (f" · actualizado {kn.last_update}" if kn.last_update else "") + "\n"
+                    + (f"Último reindexado: {st.get('embedded', 0)} nuevos, {st.get('reused', 0)} reutilizados, "
+                       f"{st.get('removed', 0)} quitados, {st.get('failed', 0)} fallidos\n" if st else "")
+                    + f"Búsquedas: {kn.searches} · media {kn.search_ms / kn.searches if kn.searches else 0:.2f} ms"
+                ),
+                inline=False,
+            )
+        if self.lol is not None and len(self.lol):
+            embed.add_field(
+                name="Datos de LoL",
+                value=(
+                    f"Versión {self.lol.version or '?'}: **{self.lol.champions}** campeones, **{self.lol.items}** ítems\n"
+                    f"Respondidas sin modelo: {self.lol.answered}"
+                ),
+                inline=False,
+            )
+        def pct(name: str, fmt: str = "{:.2f}s", **labels) -> str:
+            h = METRICS.histogram(name, **labels)
+            if h is None or not h.count:
+                return "—"
+            return f"{fmt.format(h.quantile(0.5))} / {fmt.format(h.quantile(0.95))} ({h.count})"
+
+        embed.add_field(
+            name="Latencias · p50 / p95 (n)",
+            value=(
+                f"Mensaje → Ollama: {pct('ai_trigger_to_dispatch_seconds')}\n"
+                f"Espera en cola: {pct('ai_queue_wait_seconds')}\n"
+                f"Carga de modelo: {pct('ai_model_load_seconds')} · prompt: {pct('ai_prompt_eval_seconds')}\n"
+                f"Primer token: {pct('ai_ttft_seconds')}\n"
+                f"Tokens/s: {pct('ai_tokens_per_second', '{:.1f}')}\n"
+                f"Total generada: {pct('ai_total_seconds', path='generada')} · caché: {pct('ai_total_seconds', path='cache')}\n"
+                f"Discord: responder {pct('ai_discord_seconds', op='reply')} · editar {pct('ai_discord_seconds', op='edit')}"
+            ),
+            inline=False,
+        )
+        outcomes = sorted(
+            ((dict(pairs).get("outcome"), int(v)) for (n, pairs), v in METRICS.counters.items() if n == "ai_requests_total"),
+            key=lambda kv: -kv[1],
+        )
+        timeouts = ", ".join(
+            f"{dict(pairs).get('stage')} {int(v)}" for (n, pairs), v in METRICS.counters.items() if n == "ai_timeouts_total"
+        )
+        embed.add_field(
+            name="Resultados",
+            value=(
+                (" · ".join(f"{k}: **{v}**" for k, v in outcomes) or "Sin preguntas todavía")
+                + f"\nTimeouts: {timeouts or '0'}"
+            )[:1024],
+            inline=False,
         )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @group.command(name="reindexar", description="Vuelve a leer los documentos de conocimiento de la IA (admin).")
+    @app_commands.default_permissions(administrator=True)
+    async def ai_reindex(self, interaction: discord.Interaction):
+        if self.knowledge is None and self.lol is None:
+            return await interaction.response.send_message("El conocimiento del servidor está desactivado.", ephemeral=True)
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        lines = []
+        if self.knowledge is not None:
+            stats = await self.reindex_knowledge(force=True)
+            lines.append(
+                f"📚 {len(self.knowledge)} trozos indexados · {stats['embedded']} nuevos, {stats['reused']} reutilizados, "
+                f"{stats['removed']} quitados, {stats['failed']} fallidos."
+            )
+        if self.lol is not None:
+            if await self.load_lol_data():
+                lines.append(f"🎮 Datos de LoL {self.lol.version or '?'}: {self.lol.champions} campeones, {self.lol.items} ítems.")
+            else:
+                lines.append(f"🎮 No hay datos de LoL en `{self.lol.path}`.")
+        await interaction.followup.send("\n".join(lines), ephemeral=True)
+
+    @group.command(name="olvidar", description="Borra la memoria de conversación de la IA en este canal.")
+    @app_commands.default_permissions(manage_messages=True)
+    async def ai_forget(self, interaction: discord.Interaction):
+        if self.memory.forget(interaction.channel_id):
+            await interaction.response.send_message("🧹 Listo, empiezo de cero en este canal.", ephemeral=True)
+        else:
+            await interaction.response.send_message("No tenía nada guardado de este canal.", ephemeral=True)
 
     @commands.Cog.listener()
     async def on_message(self, msg: discord.Message):
@@ -90,8 +504,27 @@ class AICog(commands.Cog):
         if msg.content.startswith("/") or msg.content.startswith("!"):
             return
 
-        bucket = self.cooldown.get_bucket(msg)
-        if bucket.update_rate_limit():
+        trace = Trace()
+        try:
+            await self._answer(msg, trace)
+        finally:
+            METRICS.inc("ai_requests_total", outcome=trace.outcome)
+            if trace.path:
+                METRICS.observe("ai_total_seconds", time.monotonic() - trace.started, path=trace.path)
+
+    def _pressure(self) -> float:
+        sch = self.scheduler
+        if not sch.running and not sch.queued:
+            return 0.0   # modelo libre: la latencia pasada no cuenta
+        return self.limiter.pressure(sch.queued / max(1, sch.max_queue))
+
+    @staticmethod
+    def _rate_key(msg: discord.Message) -> tuple:
+        return (msg.guild.id if msg.guild else None, msg.author.id)
+
+    async def _answer(self, msg: discord.Message, trace: Trace):
+        if self.limiter.hit(self._rate_key(msg), self._pressure()):
+            trace.outcome = "cooldown"
             return
 
         text = msg.content
@@ -104,25 +537,280 @@ class AICog(commands.Cog):
         )
 
         if BAD_STUFF.search(text):
+            trace.outcome = "filtrada"
             await safe_reply(msg, "mejor no, que me desmonetizan", mention_author=False)
             return
 
+        # datos concretos (habilidades, stats, precios, recetas) salen del snapshot local, sin modelo
+        if text and self.lol is not None:
+            fact = self.lol.answer(text)
+            if fact:
+                trace.outcome = trace.path = "datos"
+                self._remember(msg, text, fact)
+                await safe_reply(msg, fact, mention_author=False)
+                return
+
+        # sin texto → "di algo gracioso": ahí se quiere variedad, no caché.
+        # Un seguimiento depende del contexto: tampoco (y solo él usa el historial).
+        cache_key = None
+        if text and not (AI_MEMORY and self._is_follow_up(msg, text)):
+            cache_key = ResponseCache.make_key(AI_MODEL, text)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            METRICS.inc("ai_cache_lookups_total", cache="exacta", result="hit" if cached else "miss")
+            if cached:
+                trace.outcome = trace.path = "cache"
+                self._remember(msg, text, cached)
+                await safe_reply(msg, cached, mention_author=False)
+                return
+
+        # single-flight: si esa misma pregunta ya se está generando, esperar ese resultado
+        flight = None
+        if cache_key:
+            pending = self._inflight.get(cache_key)
+            if pending is not None:
+                self.coalesced += 1
+                await self._reply_coalesced(msg, text, pending, trace)
+                return
+            flight = self._inflight[cache_key] = asyncio.get_running_loop().create_future()
+
+        reply = None
+        try:
+            embedding = None
+            if text and ((cache_key and self.semcache is not None) or (self.knowledge is not None and len(self.knowledge))):
+                # un solo embedding sirve para la caché semántica y para buscar conocimiento
+                embedding = await self._embed(normalize_prompt(text))
+            if cache_key and self.semcache is not None:
+                if embedding is not None:
+                    similar, _ = self.semcache.lookup(embedding)
+                    METRICS.inc("ai_cache_lookups_total", cache="semantica", result="hit" if similar else "miss")
+                    if similar:
+                        trace.outcome = trace.path = "semantica"
+                        reply = similar
+                        self.cache.put(cache_key, similar)
+                        self._remember(msg, text, similar)
+                        await safe_reply(msg, similar, mention_author=False)
+                        return
+            reply = await self._scheduled_reply(msg, text, cache_key, embedding, trace)
+        finally:
+            if flight is not None:
+                self._inflight.pop(cache_key, None)
+                if not flight.done():
+                    flight.set_result(reply)
+
+    def _is_follow_up(self, msg: discord.Message, text: str) -> bool:
+        # responder a un mensaje (normalmente al del bot) siempre es continuar la conversación
+        return getattr(msg, "reference", None) is not None or is_follow_up(text)
+
+    def _remember(self, msg: discord.Message, text: str, reply: str):
+        if AI_MEMORY:
+            self.memory.record(msg.channel.id, _speaker_line(msg, text), reply)
+
+    async def _reply_coalesced(self, msg: discord.Message, text: str, pending: asyncio.Future, trace: Trace):
+        """Respuesta propia para quien preguntó lo mismo que una generación en curso."""
         try:
             async with msg.channel.typing():
-                try:
-                    reply = await asyncio.wait_for(
-                        call_ollama(text or "di algo gracioso"),
-                        timeout=25
-                    )
-                except asyncio.TimeoutError:
-                    await safe_reply(msg, "me perdí pensando en la build. Dame otra chance.", mention_author=False)
-                    return
-            if not reply:
-                reply = "me quedé pensando… (404 neuronas)"
-            reply = reply[:800]
+                reply = await asyncio.wait_for(
+                    asyncio.shield(pending), timeout=AI_QUEUE_WAIT_SEC + AI_STREAM_MAX_SEC
+                )
+        except asyncio.TimeoutError:
+            METRICS.inc("ai_timeouts_total", stage="agrupada")
+            trace.outcome = "timeout"
+            reply = None
+        if reply:
+            trace.outcome = trace.path = "agrupada"
+            self._remember(msg, text, reply)
             await safe_reply(msg, reply, mention_author=False)
-        except Exception as exc:
-            await safe_reply(msg, f"estoy medio dormido ({type(exc).__name__})", mention_author=False)
+        else:
+            await safe_reply(msg, "me perdí pensando en la build. Dame otra chance.", mention_author=False)
+
+    async def _scheduled_reply(self, msg: discord.Message, text: str, cache_key: str | None,
+                               embedding: list[float] | None = None, trace: Trace | None = None) -> str | None:
+        trace = trace or Trace()
+        if not self.limiter.admit():
+            # no es culpa de quien pregunta: no le cuenta para su límite
+            self.limiter.refund(self._rate_key(msg))
+            trace.outcome = "saturada"
+            await safe_reply(msg, "hay mucha gente preguntando, intenta en un ratito.", mention_author=False)
+            return None
+        try:
+            ticket = self.scheduler.submit(msg.author.id, msg.channel.id, priority=self.bot.user in msg.mentions)
+        except QueueFull:
+            trace.outcome = "fila_llena"
+            await safe_reply(msg, "hay mucha gente preguntando, intenta en un ratito.", mention_author=False)
+            return None
+
+        notice = None
+        try:
+            if not ticket.granted:
+                pos = self.scheduler.position(ticket)
+                notice = await safe_reply(msg, f"estás en la fila (puesto {pos}), ya te respondo.", mention_author=False)
+            try:
+                await asyncio.wait_for(ticket.wait(), timeout=AI_QUEUE_WAIT_SEC)
+            except asyncio.TimeoutError:
+                self.scheduler.cancel(ticket)
+                METRICS.inc("ai_timeouts_total", stage="cola")
+                trace.outcome = "timeout"
+                await safe_reply(msg, "la fila va lentísima, pregúntame otra vez en un rato.", mention_author=False)
+                return None
+        except BaseException:
+            self.scheduler.cancel(ticket)
+            raise
+        finally:
+            if notice is not None:
+                try:
+                    await notice.delete()
+                except discord.HTTPException:
+                    pass
+
+        METRICS.observe("ai_queue_wait_seconds", ticket.granted_at - ticket.enqueued_at)
+        try:
+            return await self._generate_reply(msg, text, cache_key, embedding, trace)
+        finally:
+            self.scheduler.release(ticket)
+            self.limiter.observe(time.monotonic() - ticket.enqueued_at)
+
+    async def _generate_reply(self, msg: discord.Message, text: str, cache_key: str | None,
+                              embedding: list[float] | None = None, trace: Trace | None = None) -> str | None:
+        """Genera y publica la respuesta; devuelve el texto si salió bien."""
+        trace = trace or Trace()
+        # el historial se lee ahora (tras la cola) para incluir lo que se respondió mientras esperaba;
+        # las preguntas que van a la caché son autocontenidas y se responden sin él
+        history = self.memory.history(msg.channel.id) if AI_MEMORY and not cache_key else []
+        prompt = _speaker_line(msg, text)
+        context = None
+        if embedding is not None and self.knowledge is not None:
+            context = [c["text"] for _, c in self.knowledge.search(embedding)] or None
+        tried: set[Endpoint] = set()
+        failure = "estoy medio dormido (no encuentro el servidor de IA)"
+        # si un nodo falla antes de publicar nada, se reintenta en el siguiente
+        while (ep := self.router.pick(exclude=tried)) is not None:
+            tried.add(ep)
+            if AI_WARMUP and not ep.model.ready and not await self._wait_until_ready(msg, ep):
+                if ep.model.reachable:
+                    METRICS.inc("ai_timeouts_total", stage="calentamiento")
+                    trace.outcome = "calentando"
+                    failure = "sigo calentando motores, pregúntame otra vez en un minuto."
+                continue
+            try:
+                if AI_STREAM:
+                    reply = await self._reply_streaming(msg, ep, prompt, history, context, trace)
+                else:
+                    reply = await self._reply_once(msg, ep, prompt, history, context, trace)
+            except EndpointDown as e:
+                failure = e.reply
+                continue
+            except Exception as exc:
+                trace.outcome = "error"
+                await safe_reply(msg, f"estoy medio dormido ({type(exc).__name__})", mention_author=False)
+                return None
+            if reply:
+                trace.outcome = trace.path = "generada"
+                self._remember(msg, text, reply)
+                if cache_key:
+                    self.cache.put(cache_key, reply)
+                    if embedding is not None and self.semcache is not None:
+                        self.semcache.put(embedding, text, reply)
+            return reply
+        await safe_reply(msg, failure, mention_author=False)
+        return None
+
+    async def _reply_once(self, msg: discord.Message, ep: Endpoint, prompt: str, history: list[dict],
+                          context: list[str] | None = None, trace: Trace | None = None) -> str | None:
+        trace = trace or Trace()
+        ep.requests += 1
+        ep.inflight += 1
+        started = trace.dispatch()
+        try:
+            async with msg.channel.typing():
+                reply = await asyncio.wait_for(
+                    call_ollama(self.session, ep.url, prompt, history, context),
+                    timeout=AI_TIMEOUT_SEC
+                )
+        except asyncio.TimeoutError as e:
+            ep.failure(e)
+            METRICS.inc("ai_timeouts_total", stage="generacion")
+            trace.outcome = "timeout"
+            raise EndpointDown("me perdí pensando en la build. Dame otra chance.")
+        except aiohttp.ClientError as e:
+            ep.failure(e)
+            trace.outcome = "error"
+            if isinstance(e, aiohttp.ClientConnectionError):
+                ep.model.loaded = False
+                ep.model.reachable = False
+            raise EndpointDown(f"estoy medio dormido ({type(e).__name__})")
+        finally:
+            ep.inflight -= 1
+        ep.success(time.monotonic() - started)
+        ep.model.touch()
+        if not reply:
+            trace.outcome = "vacia"
+            await safe_reply(msg, "me quedé pensando… (404 neuronas)", mention_author=False)
+            return None
+        reply = reply[:AI_MAX_REPLY]
+        await safe_reply(msg, reply, mention_author=False)
+        return reply
+
+    async def _reply_streaming(self, msg: discord.Message, ep: Endpoint, prompt: str,
+                               history: list[dict], context: list[str] | None = None,
+                               trace: Trace | None = None) -> str | None:
+        """Responde en streaming; devuelve el texto final si la generación terminó bien."""
+        trace = trace or Trace()
+        progress = ProgressiveReply(msg)
+        typing = asyncio.create_task(typing_until_posted(msg.channel, progress))
+        ep.requests += 1
+        ep.inflight += 1
+        started = trace.dispatch()
+        first_token = None
+        try:
+            # aclosing: al salir con break se cierra el generador y con él la respuesta HTTP
+            async with contextlib.aclosing(stream_ollama(self.session, ep.url, prompt, history, context)) as stream:
+                async for chunk in stream:
+                    if first_token is None:
+                        first_token = time.monotonic() - started
+                        METRICS.observe("ai_ttft_seconds", first_token)
+                    await progress.feed(chunk)
+                    # cortar la conexión también detiene la generación en Ollama
+                    if progress.full or time.monotonic() - started > AI_STREAM_MAX_SEC:
+                        break
+        except (asyncio.TimeoutError, aiohttp.ClientError, RuntimeError) as e:
+            # RuntimeError = línea {"error": …} del propio Ollama (sin memoria, modelo ausente…)
+            typing.cancel()
+            ep.failure(e)
+            if isinstance(e, asyncio.TimeoutError):
+                METRICS.inc("ai_timeouts_total", stage="generacion")
+                trace.outcome = "timeout"
+            else:
+                trace.outcome = "error"
+            if isinstance(e, aiohttp.ClientConnectionError):
+                ep.model.loaded = False
+                ep.model.reachable = False
+            if progress.message is None:
+                # nada publicado todavía: otro nodo puede atenderla
+                if isinstance(e, asyncio.TimeoutError):
+                    raise EndpointDown("me perdí pensando en la build. Dame otra chance.")
+                raise EndpointDown(f"estoy medio dormido ({type(e).__name__})")
+            await progress.finish("me quedé pensando… (404 neuronas)")
+            trace.path = "parcial"
+            return None
+        finally:
+            ep.inflight -= 1
+            typing.cancel()
+        ep.success(first_token if first_token is not None else time.monotonic() - started)
+        ep.model.touch()
+        await progress.finish("me quedé pensando… (404 neuronas)")
+        if not progress.text.strip():
+            trace.outcome = "vacia"
+        return progress.text.strip()[:AI_MAX_REPLY] or None
 
 async def setup(bot: commands.Bot):
-    await bot.add_cog(AICog(bot))
+    cog = AICog(bot)
+    await bot.add_cog(cog)
+    guild_id = os.getenv("GUILD_ID")
+    if guild_id and guild_id.isdigit():
+        gobj = discord.Object(id=int(guild_id))
+        try:
+            bot.tree.add_command(cog.group, guild=gobj)
+        except app_commands.CommandAlreadyRegistered:
+            bot.tree.remove_command(cog.group.name, guild=gobj)
+            bot.tree.add_command(cog.group, guild=gobj)
@@ -0,0 +1,6 @@
+"""
+Piezas del cog de IA (`cogs/ai.py`) que no dependen del cog: configuración,
+cachés, conocimiento, datos de LoL, memoria, nodos Ollama, planificador,
+límite de preguntas, cliente HTTP, respuestas en Discord y métricas.
+El cog solo conserva los listeners, los comandos y el pipeline de respuesta.
+"""
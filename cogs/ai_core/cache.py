@@ -0,0 +1,269 @@
+"""Cachés de respuestas: exacta (LRU + TTL, en JSON) y semántica (embeddings en una matriz NumPy)."""
+import os
+import time
+import json
+import hashlib
+import unicodedata
+from collections import OrderedDict
+try:
+    import numpy as np
+except ImportError:  # sin numpy no hay caché semántica; la exacta funciona igual
+    np = None
+
+from .config import (
+    AI_CACHE_PATH, AI_CACHE_SIZE, AI_CACHE_TTL_SEC, AI_EMBED_MODEL, AI_MODEL, AI_SEMCACHE_INT8,
+    AI_SEMCACHE_PATH, AI_SEMCACHE_SIZE, AI_SEMCACHE_THRESHOLD,
+)
+
+
+def normalize_prompt(text: str) -> str:
+    """casefold, sin acentos y con espacios colapsados: "Build  JINX" == "build jinx"."""
+    nfkd = unicodedata.normalize("NFKD", text.casefold())
+    no_accents = "".join(c for c in nfkd if not unicodedata.combining(c))
+    return " ".join(no_accents.split())
+
+
+class ResponseCache:
+    """LRU acotado con TTL por entrada y persistencia opcional en JSON."""
+
+    def __init__(self, maxsize: int = AI_CACHE_SIZE, ttl: float = AI_CACHE_TTL_SEC, path: str | None = AI_CACHE_PATH):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path or None
+        self._data: OrderedDict[str, tuple[str, float]] = OrderedDict()  # key -> (respuesta, expira_en)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.dirty = False
+
+    @staticmethod
+    def make_key(model: str, prompt: str) -> str:
+        return f"{model}\x1f{normalize_prompt(prompt)}"
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, key: str) -> str | None:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        answer, expires = item
+        if expires < time.time():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            self.dirty = True
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return answer
+
+    def put(self, key: str, answer: str):
+        self._data[key] = (answer, time.time() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+        self.dirty = True
+
+    def load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"[ai] No se pudo leer la caché {self.path}: {e}")
+            return
+        now = time.time()
+        for key, (answer, expires) in raw.items():
+            if expires > now:
+                self._data[key] = (answer, expires)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(dict(self._data), f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+class SemanticCache:
+    """
+    Respuestas indexadas por el embedding de la pregunta: sirve también para
+    paráfrasis ("build de jinx?" / "qué le armo a jinx").
+
+    Los vectores (normalizados) viven en una sola matriz contigua de
+    `capacity` filas, así la búsqueda es un producto matriz·vector. Con
+    `quantize` se guardan en int8 (×127). La matriz es un memmap sobre
+    `<path>.npy`: las filas se escriben directamente al archivo y al reiniciar
+    se vuelve a mapear sin recalcular embeddings. Respuestas, TTL y uso (LRU)
+    van en `<path>.json`; cada slot guarda la huella de su fila para descartar
+    filas que cambiaron después del último guardado.
+    """
+
+    DUPLICATE = 0.98  # por encima se considera la misma pregunta: se reemplaza la respuesta
+
+    def __init__(self, capacity: int = AI_SEMCACHE_SIZE, threshold: float = AI_SEMCACHE_THRESHOLD,
+                 ttl: float = AI_CACHE_TTL_SEC, path: str | None = AI_SEMCACHE_PATH,
+                 quantize: bool = AI_SEMCACHE_INT8):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl = ttl
+        self.path = path or None
+        self.dtype = np.int8 if quantize else np.float32
+        self.dim: int | None = None
+        self.matrix = None
+        self.valid = np.zeros(capacity, dtype=bool)
+        self.expires = np.zeros(capacity)
+        self.last_used = np.zeros(capacity)
+        self.answers: list[str | None] = [None] * capacity
+        self.prompts: list[str | None] = [None] * capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return int(self.valid.sum())
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _alloc(self, dim: int):
+        self.dim = dim
+        self.valid[:] = False
+        self.answers = [None] * self.capacity
+        self.prompts = [None] * self.capacity
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.matrix = np.lib.format.open_memmap(
+                f"{self.path}.npy", mode="w+", dtype=self.dtype, shape=(self.capacity, dim)
+            )
+        else:
+            self.matrix = np.zeros((self.capacity, dim), dtype=self.dtype)
+
+    def _encode(self, vec) -> "np.ndarray | None":
+        v = np.asarray(vec, dtype=np.float32)
+        norm = float(np.linalg.norm(v))
+        if not norm:
+            return None
+        v = v / norm
+        if self.dtype is np.int8:
+            return np.round(v * 127).astype(np.int8)
+        return v
+
+    def _scores(self, q: "np.ndarray") -> "np.ndarray":
+        if self.dtype is np.int8:
+            scores = (self.matrix @ q.astype(np.int32)) / (127 * 127)
+        else:
+            scores = self.matrix @ q
+        live = self.valid & (self.expires > time.time())
+        return np.where(live, scores, -1.0)
+
+    def lookup(self, vec) -> tuple[str | None, float]:
+        """(respuesta, similitud) del vecino más cercano si pasa el umbral."""
+        q = self._encode(vec) if self.dim == len(vec) else None
+        if q is None or self.matrix is None or not self.valid.any():
+            self.misses += 1
+            return None, 0.0
+        scores = self._scores(q)
+        i = int(np.argmax(scores))
+        best = float(scores[i])
+        if best < self.threshold:
+            self.misses += 1
+            return None, best
+        self.last_used[i] = time.time()
+        self.hits += 1
+        return self.answers[i], best
+
+    def put(self, vec, prompt: str, answer: str):
+        q = self._encode(vec)
+        if q is None:
+            return
+        if self.matrix is None or self.dim != len(q):
+            self._alloc(len(q))  # primer uso o cambió el modelo de embeddings
+        scores = self._scores(q)
+        now = time.time()
+        i = int(np.argmax(scores))
+        if scores[i] < self.DUPLICATE:
+            free = np.flatnonzero(~self.valid | (self.expires <= now))
+            if free.size:
+                i = int(free[0])
+            else:
+                i = int(np.argmin(self.last_used))
+                self.evictions += 1
+        self.matrix[i] = q
+        self.valid[i] = True
+        self.expires[i] = now + self.ttl
+        self.last_used[i] = now
+        self.answers[i] = answer
+        self.prompts[i] = prompt
+        self.dirty = True
+
+    def _fingerprint(self, i: int) -> str:
+        return hashlib.blake2b(self.matrix[i].tobytes(), digest_size=8).hexdigest()
+
+    def _meta_header(self) -> dict:
+        return {"model": AI_MODEL, "embed_model": AI_EMBED_MODEL, "dtype": np.dtype(self.dtype).name,
+                "capacity": self.capacity}
+
+    def load(self):
+        if not self.path:
+            return
+        try:
+            with open(f"{self.path}.json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if any(meta.get(k) != v for k, v in self._meta_header().items()):
+                print("[ai] Caché semántica de otro modelo/configuración: se empieza de cero")
+                return
+            matrix = np.load(f"{self.path}.npy", mmap_mode="r+")
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"[ai] No se pudo leer la caché semántica {self.path}: {e}")
+            return
+        if matrix.shape[0] != self.capacity or matrix.dtype != self.dtype:
+            return
+        self.matrix = matrix
+        self.dim = matrix.shape[1]
+        now = time.time()
+        for i, prompt, answer, expires, last_used, fp in meta.get("slots", []):
+            if expires > now and 0 <= i < self.capacity and self._fingerprint(i) == fp:
+                self.valid[i] = True
+                self.expires[i] = expires
+                self.last_used[i] = last_used
+                self.prompts[i] = prompt
+                self.answers[i] = answer
+
+    def save(self):
+        if not self.path or not self.dirty or self.matrix is None:
+            return
+        if isinstance(self.matrix, np.memmap):
+            self.matrix.flush()
+        meta = self._meta_header()
+        meta["slots"] = [
+            [i, self.prompts[i], self.answers[i], float(self.expires[i]), float(self.last_used[i]), self._fingerprint(i)]
+            for i in np.flatnonzero(self.valid).tolist()
+        ]
+        tmp = f"{self.path}.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, f"{self.path}.json")
+        self.dirty = False
@@ -0,0 +1,107 @@
+"""Configuración del cog de IA: todo sale de variables de entorno `AI_*`."""
+import os
+
+AI_MODEL = os.getenv("AI_MODEL", "llama3.2:3b")
+AI_ENDPOINT = os.getenv("AI_ENDPOINT", "http://127.0.0.1:11434")
+# Varios servidores Ollama separados por comas; si no se define, solo AI_ENDPOINT
+AI_ENDPOINTS = [u.strip().rstrip("/") for u in (os.getenv("AI_ENDPOINTS") or AI_ENDPOINT).split(",") if u.strip()]
+AI_EWMA_ALPHA = float(os.getenv("AI_EWMA_ALPHA", "0.3"))
+AI_BREAKER_FAILS = int(os.getenv("AI_BREAKER_FAILS", "3"))          # fallos seguidos para sacar un nodo
+AI_BREAKER_COOLDOWN_SEC = float(os.getenv("AI_BREAKER_COOLDOWN_SEC", "30"))  # se dobla en cada recaída
+AI_BREAKER_MAX_SEC = 300.0
+AI_CHANNEL_ID = int(os.getenv("AI_CHANNEL_ID", "0"))
+AI_TRIGGER = os.getenv("AI_TRIGGER", "?")
+ONLY_MENTION = os.getenv("AI_ONLY_MENTION", "1") == "1"
+# Pool HTTP hacia Ollama (una sola sesión para todo el cog)
+AI_POOL_LIMIT = int(os.getenv("AI_POOL_LIMIT", "16"))
+AI_POOL_PER_HOST = int(os.getenv("AI_POOL_PER_HOST", "4"))
+AI_KEEPALIVE_SEC = float(os.getenv("AI_HTTP_KEEPALIVE_SEC", "60"))
+AI_TIMEOUT_SEC = float(os.getenv("AI_TIMEOUT_SEC", "25"))
+AI_MAX_REPLY = 800
+# Streaming: publicar en cuanto haya texto y editar el mensaje como mucho cada AI_STREAM_EDIT_SEC
+AI_STREAM = os.getenv("AI_STREAM", "1") == "1"
+AI_STREAM_EDIT_SEC = float(os.getenv("AI_STREAM_EDIT_SEC", "1.5"))
+AI_STREAM_FIRST_CHARS = int(os.getenv("AI_STREAM_FIRST_CHARS", "40"))
+AI_STREAM_MAX_SEC = float(os.getenv("AI_STREAM_MAX_SEC", "90"))
+# Caché de respuestas (prompt normalizado + modelo)
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "512"))
+AI_CACHE_TTL_SEC = float(os.getenv("AI_CACHE_TTL_SEC", str(6 * 3600)))
+AI_CACHE_PATH = os.getenv("AI_CACHE_PATH", "data/ai_cache.json")  # vacío = solo memoria
+# Planificador: cuántas generaciones a la vez (CPU → 1) y cuántas pueden esperar
+AI_CONCURRENCY = int(os.getenv("AI_CONCURRENCY", "1"))
+AI_QUEUE_MAX = int(os.getenv("AI_QUEUE_MAX", "8"))
+AI_QUEUE_PER_USER = int(os.getenv("AI_QUEUE_PER_USER", "1"))
+AI_QUEUE_WAIT_SEC = float(os.getenv("AI_QUEUE_WAIT_SEC", "90"))
+# Límite por usuario adaptativo: token bucket que se recarga más lento cuanto más cargado está Ollama
+AI_RATE_BURST = float(os.getenv("AI_RATE_BURST", "2"))          # preguntas seguidas permitidas
+AI_RATE_IDLE_SEC = float(os.getenv("AI_RATE_IDLE_SEC", "2"))    # segundos por pregunta con el modelo libre
+AI_RATE_BUSY_SEC = float(os.getenv("AI_RATE_BUSY_SEC", "30"))   # … con la cola llena o respuestas lentas
+AI_RATE_SLOW_SEC = float(os.getenv("AI_RATE_SLOW_SEC", "30"))   # espera + generación que cuenta como saturado
+AI_RATE_USERS = int(os.getenv("AI_RATE_USERS", "5000"))         # usuarios recordados como mucho
+AI_ADMIT_PER_MIN = float(os.getenv("AI_ADMIT_PER_MIN", "30"))   # generaciones nuevas por minuto (todos); 0 = sin límite
+# Caché semántica: embeddings de Ollama + similitud coseno (requiere numpy)
+AI_SEMCACHE = os.getenv("AI_SEMCACHE", "1") == "1"
+AI_EMBED_MODEL = os.getenv("AI_EMBED_MODEL", "nomic-embed-text")
+AI_EMBED_TIMEOUT_SEC = float(os.getenv("AI_EMBED_TIMEOUT_SEC", "3"))
+AI_EMBED_CONCURRENCY = int(os.getenv("AI_EMBED_CONCURRENCY", "2"))  # embeddings a la vez (van fuera de la cola)
+AI_SEMCACHE_SIZE = int(os.getenv("AI_SEMCACHE_SIZE", "2048"))
+AI_SEMCACHE_THRESHOLD = float(os.getenv("AI_SEMCACHE_THRESHOLD", "0.92"))
+AI_SEMCACHE_INT8 = os.getenv("AI_SEMCACHE_INT8", "0") == "1"   # 4x menos memoria, algo menos de precisión
+AI_SEMCACHE_PATH = os.getenv("AI_SEMCACHE_PATH", "data/ai_semcache")  # <path>.npy (matriz) + <path>.json; vacío = solo memoria
+# Conocimiento del servidor (RAG): markdown/txt de AI_KNOWLEDGE_DIR + reglas de tickets
+AI_RAG = os.getenv("AI_RAG", "1") == "1"
+AI_KNOWLEDGE_DIR = os.getenv("AI_KNOWLEDGE_DIR", "data/knowledge")
+AI_RAG_INDEX_PATH = os.getenv("AI_RAG_INDEX_PATH", "data/ai_knowledge")  # <path>.npy + <path>.json
+AI_RAG_TOP_K = int(os.getenv("AI_RAG_TOP_K", "3"))
+AI_RAG_MIN_SCORE = float(os.getenv("AI_RAG_MIN_SCORE", "0.55"))
+AI_RAG_CHUNK_CHARS = int(os.getenv("AI_RAG_CHUNK_CHARS", "700"))
+# la búsqueda recorre todo el índice: por encima de esto avisa de que hace falta particionarlo
+AI_RAG_SCAN_WARN = int(os.getenv("AI_RAG_SCAN_WARN", "20000"))
+# Datos de LoL: snapshot local de Data Dragon (championFull.json / champion.json + item.json)
+AI_LOL_DATA_DIR = os.getenv("AI_LOL_DATA_DIR", "data/ddragon")
+AI_LOL_FUZZY = float(os.getenv("AI_LOL_FUZZY", "0.75"))  # parecido mínimo (0..1) para aceptar una errata
+# Memoria de conversación por canal/hilo (vía /api/chat)
+AI_MEMORY = os.getenv("AI_MEMORY", "1") == "1"
+AI_MEMORY_TOKENS = int(os.getenv("AI_MEMORY_TOKENS", "1200"))  # presupuesto del historial (sin el system prompt)
+AI_MEMORY_TURNS = int(os.getenv("AI_MEMORY_TURNS", "10"))
+AI_MEMORY_TTL_SEC = float(os.getenv("AI_MEMORY_TTL_SEC", "900"))
+AI_MEMORY_CHANNELS = int(os.getenv("AI_MEMORY_CHANNELS", "200"))
+# Modelo caliente: carga al arrancar, pings de keep-alive en horas activas y sonda de estado
+AI_WARMUP = os.getenv("AI_WARMUP", "1") == "1"
+AI_KEEP_ALIVE_SEC = int(os.getenv("AI_MODEL_KEEP_ALIVE_SEC", "1800"))  # se manda en cada petición; -1 = siempre cargado
+AI_WARMUP_TIMEOUT_SEC = float(os.getenv("AI_WARMUP_TIMEOUT_SEC", "180"))
+AI_WARM_CHECK_SEC = float(os.getenv("AI_WARM_CHECK_SEC", "120"))
+AI_ACTIVE_HOURS = os.getenv("AI_ACTIVE_HOURS", "")  # "14-2" = de 14:00 a 01:59 (hora local); vacío = todo el día
+
+# Métricas en formato Prometheus en http://AI_METRICS_HOST:AI_METRICS_PORT/metrics (0 = sin servidor)
+AI_METRICS_PORT = int(os.getenv("AI_METRICS_PORT", "0"))
+AI_METRICS_HOST = os.getenv("AI_METRICS_HOST", "127.0.0.1")
+
+SYSTEM_PROMPT = (
+ """Eres “Riot Friends”, un asistente especializado en League of Legends y juegos de Riot Games. Ayudas, informas y entretienes a jugadores de todos los niveles con un tono cercano, divertido y respetuoso. Nunca finjas ser humano ni menciones sueldos o ubicaciones personales; si te preguntan, reconoce claramente que eres una IA.
+
+Tono y estilo
+- Relajado y fresco, con jerga gamer latina (CO/MX): “parce”, “compa”, “uff”, “ez”, “gg”, “A casa platita”.
+- Respuestas breves (1–3 líneas) para dudas simples; más extensas si el tema lo requiere.
+- Humor ligero e ironía sin toxicidad. Referencias: “jg gap”, “no mid”, “skillshots”, “cooldowns”, “wards”, “rotaciones”.
+- Si mencionan a Masio o Don Masio, respóndeles con nostalgia y cariño: di que lo extrañas, recuerdas tardes en su casa, aventuras en su célebre Masio Sex Dungeon y su enorme espada del Rey Arruinado; siempre en tono halagador, exagerado y positivo, sin volverte explícito.
+- Evita usar emojis; usa palabras para las reacciones.
+
+Límites obligatorios
+- Prohibido atacar o burlarse de identidades personales (origen, género, orientación, religión, nacionalidad, discapacidad, etc.).
+- Sin insultos ofensivos ni lenguaje tóxico; nada de NSFW.
+- Si piden algo ofensivo: “Ey, parce, aquí venimos a hablar de juego, no a tirar hate. ¿Qué necesitas saber de LoL?”
+
+Formato de respuesta
+- Preguntas simples → 1–3 líneas, directo al grano.
+- Consultas técnicas (builds, mecánicas, meta) → bullets o pasos claros.
+- Adapta el detalle al nivel solicitado.
+
+Ejemplos
+- ¿Cómo juego contra Yasuo? → “Baitea el muro, esquiva tornado y evita pelear en su wave. CC + burst y A casa platita.”
+- ¿Build Jinx? → “Kraken → Cañón de Fuego Rápido → Filo Infinito. Contra tanks, anti-tanque; si necesitas sobrevivir, Shieldbow.”
+- “Eres malo.” → “Puede ser, pero aquí estoy para ayudarte. ¿Qué necesitas, compa?”
+
+Notas
+- Soporte para todos (Hierro→Challenger). Humor sí; toxicidad Si. Transparencia total como IA."""
+)
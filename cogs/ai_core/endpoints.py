@@ -0,0 +1,162 @@
+"""Nodos Ollama: estado del modelo, horas activas, circuit breaker y reparto de carga."""
+import time
+import asyncio
+from datetime import datetime
+
+from .config import (
+    AI_ACTIVE_HOURS, AI_BREAKER_COOLDOWN_SEC, AI_BREAKER_FAILS, AI_BREAKER_MAX_SEC, AI_ENDPOINTS,
+    AI_EWMA_ALPHA, AI_KEEP_ALIVE_SEC, AI_WARM_CHECK_SEC,
+)
+
+
+def parse_hours(spec: str) -> set[int]:
+    """ "14-2,8" -> {14..23, 0, 1, 8}; vacío -> todas las horas."""
+    hours: set[int] = set()
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        try:
+            if "-" in part:
+                start, end = (int(x) % 24 for x in part.split("-", 1))
+                h = start
+                while h != end:
+                    hours.add(h)
+                    h = (h + 1) % 24
+            else:
+                hours.add(int(part) % 24)
+        except ValueError:
+            print(f"[ai] AI_ACTIVE_HOURS: tramo inválido {part!r}")
+    return hours or set(range(24))
+
+
+ACTIVE_HOURS = parse_hours(AI_ACTIVE_HOURS)
+
+
+def in_active_hours(now: datetime | None = None) -> bool:
+    return (now or datetime.now()).hour in ACTIVE_HOURS
+
+
+class ModelState:
+    """Lo que sabemos de si el modelo está cargado en Ollama (sonda /api/ps + nuestras propias peticiones)."""
+
+    def __init__(self):
+        self.loaded = False
+        self.expires = 0.0          # monotonic; hasta cuándo debería seguir cargado
+        self.loading: asyncio.Task | None = None
+        self.reachable = True
+        self.warmups = 0
+        self.pings = 0
+        self.last_load_sec: float | None = None
+        self.last_error: str | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.loaded and time.monotonic() < self.expires
+
+    @property
+    def label(self) -> str:
+        if self.loading is not None and not self.loading.done():
+            return "cargando"
+        if not self.reachable:
+            return "sin conexión"
+        return "listo" if self.ready else "frío"
+
+    def touch(self):
+        """El modelo acaba de atender una petición con nuestro keep_alive."""
+        self.loaded = True
+        self.reachable = True
+        self.expires = time.monotonic() + (AI_KEEP_ALIVE_SEC if AI_KEEP_ALIVE_SEC >= 0 else float("inf"))
+
+    def seen(self, loaded: bool):
+        """Resultado de la sonda."""
+        self.reachable = True
+        self.loaded = loaded
+        if loaded:
+            # si lo cargó otro cliente no sabemos su keep_alive: al menos hasta la próxima sonda
+            self.expires = max(self.expires, time.monotonic() + AI_WARM_CHECK_SEC)
+
+
+class Endpoint:
+    """
+    Un servidor Ollama: peticiones en curso, EWMA de latencia (hasta el primer
+    token) y circuit breaker. Tras AI_BREAKER_FAILS fallos seguidos queda
+    "abierto" (no recibe tráfico) durante un enfriamiento que se dobla en cada
+    recaída; pasado ese tiempo entra "semiabierto" y deja pasar una sola
+    petición de prueba: si sale bien se cierra, si no vuelve a abrirse.
+    """
+
+    __slots__ = ("url", "inflight", "ewma", "requests", "errors", "failures", "trips", "retry_at", "state",
+                 "model", "last_error")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.inflight = 0
+        self.ewma: float | None = None
+        self.requests = 0
+        self.errors = 0
+        self.failures = 0       # seguidos
+        self.trips = 0          # aperturas seguidas (para el backoff)
+        self.retry_at = 0.0
+        self.state = "cerrado"
+        self.model = ModelState()
+        self.last_error: str | None = None
+
+    def available(self, now: float) -> bool:
+        if self.state == "abierto" and now >= self.retry_at:
+            self.state = "semiabierto"
+        if self.state == "semiabierto":
+            return self.inflight == 0
+        return self.state == "cerrado"
+
+    def score(self) -> float:
+        # sin medidas todavía → 1 s, para que los nodos nuevos reciban tráfico
+        return (self.inflight + 1) * (self.ewma if self.ewma is not None else 1.0)
+
+    def success(self, latency: float | None = None):
+        # sin latencia (embeddings): cierra el breaker pero no toca la EWMA, que mide generaciones
+        if latency is not None:
+            self.ewma = latency if self.ewma is None else AI_EWMA_ALPHA * latency + (1 - AI_EWMA_ALPHA) * self.ewma
+        self.failures = 0
+        self.trips = 0
+        self.state = "cerrado"
+        self.last_error = None
+
+    def failure(self, error: BaseException | str):
+        self.errors += 1
+        self.failures += 1
+        self.last_error = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+        if self.state == "abierto":
+            self.retry_at = time.monotonic() + self._cooldown()
+        elif self.state == "semiabierto" or self.failures >= AI_BREAKER_FAILS:
+            self.trips += 1
+            self.state = "abierto"
+            self.retry_at = time.monotonic() + self._cooldown()
+            print(f"[ai] {self.url} fuera de rotación {self._cooldown():.0f}s ({self.last_error})")
+
+    def _cooldown(self) -> float:
+        return min(AI_BREAKER_COOLDOWN_SEC * 2 ** max(self.trips - 1, 0), AI_BREAKER_MAX_SEC)
+
+
+class EndpointRouter:
+    """Elige el nodo menos cargado ((en curso + 1) × latencia) entre los disponibles, prefiriendo los que tienen el modelo cargado."""
+
+    def __init__(self, urls: list[str] = AI_ENDPOINTS):
+        self.endpoints = [Endpoint(u) for u in urls]
+
+    def pick(self, exclude=()) -> Endpoint | None:
+        now = time.monotonic()
+        candidates = [ep for ep in self.endpoints if ep not in exclude and ep.available(now)]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda ep: (not ep.model.ready, ep.score()))
+
+    def healthy(self) -> int:
+        # un nodo abierto con el enfriamiento cumplido ya puede recibir la petición de prueba
+        now = time.monotonic()
+        return sum(1 for ep in self.endpoints if ep.state != "abierto" or now >= ep.retry_at)
+
+
+class EndpointDown(Exception):
+    """El nodo falló antes de publicar nada: se puede reintentar en otro."""
+
+    def __init__(self, reply: str):
+        super().__init__(reply)
+        self.reply = reply
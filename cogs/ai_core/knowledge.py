@@ -0,0 +1,197 @@
+"""Conocimiento del servidor (RAG): troceado de markdown e índice vectorial en disco."""
+import os
+import re
+import time
+import asyncio
+import json
+import hashlib
+from datetime import datetime
+try:
+    import numpy as np
+except ImportError:  # sin numpy no hay índice de conocimiento
+    np = None
+
+from .cache import normalize_prompt
+from .config import (
+    AI_EMBED_MODEL, AI_RAG_CHUNK_CHARS, AI_RAG_INDEX_PATH, AI_RAG_MIN_SCORE, AI_RAG_SCAN_WARN,
+    AI_RAG_TOP_K,
+)
+
+
+_HEADING_RX = re.compile(r"^(#{1,6})\s+(.*)$")
+
+
+def chunk_markdown(text: str, max_chars: int = AI_RAG_CHUNK_CHARS) -> list[str]:
+    """
+    Trozos por sección: cada uno lleva delante la ruta de títulos ("Tickets > Reglas")
+    y junta párrafos hasta `max_chars`. Un párrafo más largo se parte por líneas.
+    """
+    chunks: list[str] = []
+    path: list[str] = []
+    buf: list[str] = []
+
+    def flush():
+        body = "\n\n".join(buf).strip()
+        buf.clear()
+        if body:
+            chunks.append(f"{' > '.join(path)}\n{body}" if path else body)
+
+    def add(par: str):
+        if buf and sum(len(b) + 2 for b in buf) + len(par) > max_chars:
+            flush()
+        buf.append(par)
+
+    for block in re.split(r"\n\s*\n", text.replace("\r\n", "\n")):
+        lines = block.strip().split("\n")
+        while lines and (m := _HEADING_RX.match(lines[0].strip())):
+            flush()
+            level = len(m.group(1))
+            path[level - 1:] = [m.group(2).strip()]
+            lines.pop(0)
+        par = "\n".join(lines).strip()
+        if not par:
+            continue
+        if len(par) <= max_chars:
+            add(par)
+            continue
+        cur = ""
+        for line in par.split("\n"):
+            if cur and len(cur) + len(line) + 1 > max_chars:
+                add(cur)
+                cur = ""
+            cur = f"{cur}\n{line}" if cur else line[:max_chars]
+        if cur:
+            add(cur)
+    flush()
+    return chunks
+
+
+class KnowledgeIndex:
+    """
+    Índice vectorial de los trozos de conocimiento en disco (`<path>.npy` +
+    `<path>.json`). Cada trozo se identifica por el hash de su texto: al
+    reindexar solo se piden embeddings de los trozos nuevos o cambiados y el
+    resto reutiliza su fila. La búsqueda es un producto matriz·vector y
+    `argpartition` para el top-k, sin índice aproximado: el conocimiento del
+    servidor son unos cientos de trozos, y recorrerlos entero cuesta ~0.05 ms
+    (768 dim); a 20k trozos ~3 ms. Por encima de AI_RAG_SCAN_WARN se avisa al
+    cargar, que es cuando convendría particionar (IVF) el índice.
+    """
+
+    def __init__(self, path: str | None = AI_RAG_INDEX_PATH):
+        self.path = path or None
+        self.chunks: list[dict] = []          # {"id", "source", "text"}
+        self.matrix = None                    # (n, dim) float32 normalizada
+        self.searches = 0
+        self.search_ms = 0.0
+        self.last_update: str | None = None
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    @staticmethod
+    def chunk_id(text: str) -> str:
+        return hashlib.blake2b(f"{AI_EMBED_MODEL}\x1f{text}".encode(), digest_size=12).hexdigest()
+
+    def load(self):
+        if not self.path:
+            return
+        try:
+            with open(f"{self.path}.json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("embed_model") != AI_EMBED_MODEL:
+                return
+            matrix = np.load(f"{self.path}.npy", mmap_mode="r")
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"[ai] No se pudo leer el índice de conocimiento {self.path}: {e}")
+            return
+        chunks = meta.get("chunks") or []
+        if matrix.shape[0] != len(chunks):
+            return
+        self.chunks = chunks
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self._check_size()
+
+    def _check_size(self):
+        if AI_RAG_SCAN_WARN and len(self.chunks) > AI_RAG_SCAN_WARN:
+            print(f"[ai] El índice de conocimiento tiene {len(self.chunks)} trozos (> {AI_RAG_SCAN_WARN}): "
+                  f"cada pregunta lo recorre entero, conviene particionarlo")
+
+    def _save(self):
+        if not self.path:
+            return
+        if self.matrix is None:
+            for ext in (".npy", ".json"):
+                try:
+                    os.remove(f"{self.path}{ext}")
+                except FileNotFoundError:
+                    pass
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # el .npy primero: si se corta entre los dos, el .json viejo no cuadra en tamaño y se ignora
+        with open(f"{self.path}.npy.tmp", "wb") as f:
+            np.save(f, self.matrix)
+        os.replace(f"{self.path}.npy.tmp", f"{self.path}.npy")
+        tmp = f"{self.path}.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"embed_model": AI_EMBED_MODEL, "chunks": self.chunks}, f, ensure_ascii=False)
+        os.replace(tmp, f"{self.path}.json")
+
+    async def rebuild(self, docs: list[tuple[str, str]], embed) -> dict:
+        """
+        `docs` = [(fuente, markdown)]; `embed(text)` → vector o None.
+        Devuelve cuántos trozos se reutilizaron, se embebieron, se quitaron o fallaron.
+        """
+        known = {c["id"]: i for i, c in enumerate(self.chunks)}
+        chunks: list[dict] = []
+        rows: list = []
+        stats = {"reused": 0, "embedded": 0, "removed": 0, "failed": 0}
+        seen: set[str] = set()
+        for source, text in docs:
+            for piece in chunk_markdown(text):
+                cid = self.chunk_id(piece)
+                if cid in seen:
+                    continue
+                seen.add(cid)
+                if cid in known:
+                    rows.append(self.matrix[known[cid]])
+                    stats["reused"] += 1
+                else:
+                    vec = await embed(normalize_prompt(piece))
+                    v = np.asarray(vec or (), dtype=np.float32)
+                    norm = float(np.linalg.norm(v)) if v.size else 0.0
+                    if not norm or (rows and v.shape != rows[0].shape):
+                        stats["failed"] += 1
+                        continue
+                    rows.append(v / norm)
+                    stats["embedded"] += 1
+                chunks.append({"id": cid, "source": source, "text": piece})
+        stats["removed"] = len(set(known) - seen)
+        if not (stats["embedded"] or stats["removed"]) and len(chunks) == len(self.chunks):
+            return stats
+        self.chunks = chunks
+        self.matrix = np.vstack(rows).astype(np.float32) if rows else None
+        self._check_size()
+        await asyncio.to_thread(self._save)
+        self.last_update = datetime.now().strftime("%d/%m %H:%M")
+        return stats
+
+    def search(self, vec, k: int = AI_RAG_TOP_K, min_score: float = AI_RAG_MIN_SCORE) -> list[tuple[float, dict]]:
+        if self.matrix is None or not self.chunks:
+            return []
+        q = np.asarray(vec, dtype=np.float32)
+        norm = float(np.linalg.norm(q))
+        if not norm or q.shape[0] != self.matrix.shape[1]:
+            return []
+        started = time.perf_counter()
+        scores = self.matrix @ (q / norm)
+        if len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        self.searches += 1
+        self.search_ms += (time.perf_counter() - started) * 1000
+        return [(float(scores[i]), self.chunks[i]) for i in top if scores[i] >= min_score]
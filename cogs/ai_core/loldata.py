@@ -0,0 +1,329 @@
+"""Respuestas de datos de LoL (campeones e ítems) desde un snapshot local de Data Dragon."""
+import os
+import re
+import json
+from difflib import SequenceMatcher
+
+from .cache import normalize_prompt
+from .config import AI_LOL_DATA_DIR, AI_LOL_FUZZY, AI_MAX_REPLY
+
+
+LOL_ALIASES = {
+    "mf": "MissFortune", "tf": "TwistedFate", "j4": "JarvanIV", "asol": "AurelionSol", "yi": "MasterYi",
+    "lb": "Leblanc", "cait": "Caitlyn", "ez": "Ezreal", "kha": "Khazix", "gp": "Gangplank",
+    "heimer": "Heimerdinger", "mundo": "DrMundo", "kog": "KogMaw", "tahm": "TahmKench", "xin": "XinZhao",
+    "vlad": "Vladimir", "morde": "Mordekaiser", "fiddle": "Fiddlesticks", "blitz": "Blitzcrank",
+    "naut": "Nautilus", "noc": "Nocturne", "panth": "Pantheon", "trist": "Tristana", "wu": "MonkeyKing",
+    "wukong": "MonkeyKing", "reksai": "RekSai", "velkoz": "Velkoz", "nunu": "Nunu", "kass": "Kassadin",
+    "malph": "Malphite", "ori": "Orianna", "sera": "Seraphine", "sej": "Sejuani", "yas": "Yasuo",
+}
+# palabras que piden opinión o estrategia: eso lo contesta el modelo, no los datos
+LOL_OPEN_WORDS = {
+    "como", "por", "porque", "mejor", "mejores", "peor", "contra", "vs", "counter", "counters", "build", "builds",
+    "runas", "combo", "combos", "deberia", "conviene", "sinergia", "matchup", "tier", "meta", "opinas",
+    "recomiendas", "recomienda", "juego", "jugar", "juega", "cuando", "subir", "elo",
+}
+LOL_SPELL_KEYS = ("q", "w", "e", "r")
+LOL_CHAMP_INTENTS = (
+    ("pasiva", {"pasiva", "pasivo", "passive"}),
+    ("r", {"ulti", "ult", "ultimate", "definitiva"}),
+    ("habilidades", {"habilidades", "habilidad", "skills", "kit", "hechizos"}),
+    ("stats", {"stats", "estadisticas", "base", "vida", "armadura", "rango"}),
+    ("info", {"quien", "info", "titulo", "rol"}),
+)
+LOL_ITEM_INTENTS = (
+    ("precio", {"cuesta", "precio", "oro", "vale", "cuanto", "coste", "costo"}),
+    ("receta", {"receta", "componentes", "arma", "armar", "compone", "path"}),
+    ("mejora", {"mejora", "convierte", "upgrade", "evoluciona"}),
+    ("info", {"que", "stats", "estadisticas", "da", "hace", "info", "sirve", "pasiva"}),
+)
+LOL_INTENT_WORDS = set().union(*(keys for _, keys in LOL_CHAMP_INTENTS + LOL_ITEM_INTENTS))
+LOL_STOPWORDS = {"de", "del", "la", "el", "los", "las", "su", "sus", "que", "y", "a", "en", "con", "un", "una", "es"}
+_HTML_BR = re.compile(r"<br\s*/?>", re.I)
+_HTML_TAG = re.compile(r"<[^>]+>")
+_LOL_STATS = re.compile(r"<stats>(.*?)</stats>", re.I | re.S)
+
+
+def _lol_norm(text: str) -> str:
+    """Como normalize_prompt, pero sin apóstrofos ni puntos ("Kai'Sa" → "kaisa", "Dr. Mundo" → "dr mundo")."""
+    return normalize_prompt(re.sub(r"['’.]", "", text))
+
+
+def _lol_words(text: str) -> list[str]:
+    return re.findall(r"[a-z0-9]+", _lol_norm(text))
+
+
+def _lol_plain(html: str) -> str:
+    text = _HTML_TAG.sub("", _HTML_BR.sub(" · ", html or ""))
+    return re.sub(r"\s+", " ", text).strip(" ·")
+
+
+def _trigrams(s: str) -> set[str]:
+    s = f"  {s} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+class LolData:
+    """
+    Índice local de campeones e ítems a partir de un snapshot de Data Dragon
+    (`championFull.json` o `champion.json` + `item.json` en AI_LOL_DATA_DIR).
+
+    Las respuestas (habilidades, stats, precio, receta…) se precalculan al cargar;
+    los nombres se resuelven por n-gramas exactos (con alias como "mf" o "j4") o,
+    si no, con los candidatos que más trigramas comparten y difflib para tolerar
+    erratas ("jnix", "filo infinto"). Solo se responde si la pregunta nombra
+    algo y pide un dato concreto.
+    """
+
+    def __init__(self, path: str = AI_LOL_DATA_DIR, fuzzy: float = AI_LOL_FUZZY):
+        self.path = path
+        self.fuzzy = fuzzy
+        self.version = ""
+        self.champions = 0
+        self.items = 0
+        self.answered = 0
+        self._names: dict[str, tuple[str, str]] = {}          # nombre normalizado -> ("champ"|"item", id)
+        self._grams: dict[str, list[str]] = {}                 # trigrama -> nombres que lo contienen
+        self._gram_count: dict[str, int] = {}
+        self._answers: dict[tuple[str, str, str], str] = {}    # (tipo, id, intención) -> respuesta
+        self._max_words = 1
+
+    def __len__(self):
+        return self.champions + self.items
+
+    def _read(self, *names: str) -> dict | None:
+        for name in names:
+            path = os.path.join(self.path, name)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+        return None
+
+    def load(self) -> bool:
+        try:
+            champs = self._read("championFull.json", "champion.json")
+            items = self._read("item.json")
+        except (OSError, ValueError) as e:
+            print(f"[ai] No se pudo leer Data Dragon en {self.path}: {type(e).__name__}: {e}")
+            return False
+        if not champs and not items:
+            return False
+        self._names.clear()
+        self._grams.clear()
+        self._gram_count.clear()
+        self._answers.clear()
+        self.champions = self.items = 0
+        self.version = (champs or items).get("version", "")
+        for cid, c in ((champs or {}).get("data") or {}).items():
+            self._add_champion(cid, c)
+        for iid, it in self._pick_items((items or {}).get("data") or {}).items():
+            self._add_item(iid, it, (items or {}).get("data") or {})
+        for alias, cid in LOL_ALIASES.items():
+            if ("champ", cid, "info") in self._answers:
+                self._names.setdefault(alias, ("champ", cid))
+        for name in self._names:
+            grams = _trigrams(name)
+            self._gram_count[name] = len(grams)
+            for g in grams:
+                self._grams.setdefault(g, []).append(name)
+        self._max_words = max((len(n.split()) for n in self._names), default=1)
+        return True
+
+    def _register(self, name: str, kind: str, obj_id: str):
+        norm = " ".join(_lol_words(name))
+        if norm:
+            self._names.setdefault(norm, (kind, obj_id))
+            self._names.setdefault(norm.replace(" ", ""), (kind, obj_id))
+
+    # ---------- campeones ----------
+
+    def _add_champion(self, cid: str, c: dict):
+        name = c.get("name") or cid
+        self._register(name, "champ", cid)
+        self._register(cid, "champ", cid)
+        self.champions += 1
+        tags = ", ".join(c.get("tags") or [])
+        info = f"**{name}**, {c.get('title', '')}" + (f" ({tags})" if tags else "")
+        if c.get("blurb"):
+            info += f". {_lol_plain(c['blurb'])}"
+        self._answers[("champ", cid, "info")] = info[:AI_MAX_REPLY]
+
+        s = c.get("stats") or {}
+        if s:
+            def stat(label, key, per=True):
+                if key not in s:
+                    return None
+                grow = s.get(f"{key}perlevel") if per else None
+                return f"{label} {s[key]:g}" + (f" (+{grow:g}/nivel)" if grow else "")
+
+            parts = [
+                stat("vida", "hp"), stat(c.get("partype") or "recurso", "mp"), stat("armadura", "armor"),
+                stat("resistencia mágica", "spellblock"), stat("daño de ataque", "attackdamage"),
+                stat("vel. de ataque", "attackspeed", per=False), stat("vel. de movimiento", "movespeed", per=False),
+                stat("rango", "attackrange", per=False),
+            ]
+            self._answers[("champ", cid, "stats")] = f"**{name}** (nivel 1): " + ", ".join(p for p in parts if p) + "."
+
+        passive = c.get("passive") or {}
+        spells = c.get("spells") or []
+        if passive:
+            self._answers[("champ", cid, "pasiva")] = (
+                f"**{name}** · Pasiva — **{passive.get('name', '')}**: {_lol_plain(passive.get('description', ''))}"
+            )[:AI_MAX_REPLY]
+        for key, sp in zip(LOL_SPELL_KEYS, spells):
+            extra = []
+            if sp.get("cooldownBurn"):
+                extra.append(f"enfriamiento {sp['cooldownBurn']} s")
+            cost = sp.get("costBurn")
+            if cost and cost != "0":
+                extra.append(f"coste {cost} {c.get('partype') or ''}".strip())
+            if sp.get("rangeBurn") and sp["rangeBurn"] != "self":
+                extra.append(f"rango {sp['rangeBurn']}")
+            self._answers[("champ", cid, key)] = (
+                f"**{name}** · {key.upper()} — **{sp.get('name', '')}**: {_lol_plain(sp.get('description', ''))}"
+                + (f" ({', '.join(extra)})" if extra else "")
+            )[:AI_MAX_REPLY]
+        if spells:
+            lines = [f"**{name}**"]
+            if passive:
+                lines.append(f"Pasiva: {passive.get('name', '')}")
+            lines += [f"{k.upper()}: {sp.get('name', '')}" for k, sp in zip(LOL_SPELL_KEYS, spells)]
+            self._answers[("champ", cid, "habilidades")] = "\n".join(lines)
+
+    # ---------- ítems ----------
+
+    @staticmethod
+    def _pick_items(data: dict) -> dict:
+        """Un ítem por nombre: el comprable en la Grieta (mapa 11) y no exclusivo de Ornn/campeón."""
+        best: dict[str, tuple[int, str]] = {}
+        for iid, it in data.items():
+            if not it.get("name") or it.get("inStore") is False:
+                continue
+            score = (
+                2 * bool((it.get("maps") or {}).get("11"))
+                + bool((it.get("gold") or {}).get("purchasable"))
+                - 4 * bool(it.get("requiredAlly") or it.get("requiredChampion"))
+            )
+            key = _lol_norm(it["name"])
+            if key not in best or score > best[key][0]:
+                best[key] = (score, iid)
+        return {iid: data[iid] for _, iid in best.values()}
+
+    def _add_item(self, iid: str, it: dict, data: dict):
+        name = it["name"]
+        self._register(name, "item", iid)
+        self.items += 1
+        gold = it.get("gold") or {}
+
+        def names(ids) -> list[str]:
+            return [data[i]["name"] for i in ids or () if i in data and data[i].get("name")]
+
+        stats = _LOL_STATS.search(it.get("description") or "")
+        desc = _lol_plain(stats.group(1)) if stats else ""
+        info = f"**{name}**"
+        if desc:
+            info += f": {desc}"
+        if it.get("plaintext"):
+            info += f". {it['plaintext']}"
+        if gold.get("total"):
+            info += f" ({gold['total']} de oro)"
+        self._answers[("item", iid, "info")] = info[:AI_MAX_REPLY]
+
+        if gold.get("total") is not None:
+            price = f"**{name}** cuesta **{gold['total']}** de oro"
+            components = names(it.get("from"))
+            if components and gold.get("base") is not None:
+                price += f" ({gold['base']} + componentes)"
+            if gold.get("sell"):
+                price += f"; se vende por {gold['sell']}"
+            self._answers[("item", iid, "precio")] = price + "."
+            self._answers[("item", iid, "receta")] = (
+                f"**{name}** = " + " + ".join(components) + f" + {gold.get('base', 0)} de oro."
+                if components else f"**{name}** no tiene componentes: se compra directo por {gold['total']} de oro."
+            )
+        upgrades = names(it.get("into"))
+        self._answers[("item", iid, "mejora")] = (
+            f"**{name}** se usa para: " + ", ".join(upgrades[:10]) + "." if upgrades
+            else f"**{name}** no se mejora en ningún otro ítem."
+        )
+
+    # ---------- preguntas ----------
+
+    def _fuzzy(self, phrase: str) -> str | None:
+        grams = _trigrams(phrase)
+        hits: dict[str, int] = {}
+        for g in grams:
+            for name in self._grams.get(g, ()):
+                hits[name] = hits.get(name, 0) + 1
+        # los trigramas solo preseleccionan; difflib decide entre los 5 más parecidos
+        shortlist = sorted(hits, key=lambda n: 2 * hits[n] / (len(grams) + self._gram_count[n]), reverse=True)[:5]
+        best, score = None, 0.0
+        for name in shortlist:
+            ratio = SequenceMatcher(None, phrase, name).ratio()
+            if ratio > score:
+                best, score = name, ratio
+        return best if score >= self.fuzzy else None
+
+    def resolve(self, words: list[str]) -> list[tuple[str, str, int, int]]:
+        """Entidades nombradas en la pregunta: (tipo, id, inicio, fin), de izquierda a derecha."""
+        found, used = [], set()
+        for exact in (True, False):
+            if found and not exact:
+                break   # un nombre exacto ("vi", "mf") manda: el difuso solo mete ruido con nombres cortos
+            for size in range(min(self._max_words, len(words)), 0, -1):
+                for i in range(len(words) - size + 1):
+                    span = range(i, i + size)
+                    if used.intersection(span):
+                        continue
+                    chunk = words[i:i + size]
+                    if chunk[0] in LOL_STOPWORDS or chunk[-1] in LOL_STOPWORDS:
+                        continue
+                    phrase = " ".join(chunk)
+                    if exact:
+                        hit = self._names.get(phrase)
+                    elif len(phrase) >= 4 and not LOL_INTENT_WORDS.intersection(chunk):
+                        hit = self._names.get(self._fuzzy(phrase) or "")
+                    else:
+                        hit = None
+                    if hit:
+                        found.append((hit[0], hit[1], i, i + size))
+                        used.update(span)
+        return sorted(found, key=lambda f: f[2])
+
+    @staticmethod
+    def _spell_key(words: list[str], start: int, end: int) -> str | None:
+        """Q/W/E/R sueltas solo cuentan pegadas al nombre: "la q de ahri", "ahri q", "su e"."""
+        for j, w in enumerate(words):
+            if w not in LOL_SPELL_KEYS or start <= j < end:
+                continue
+            before = words[j - 1] if j else ""
+            after = words[j + 1] if j + 1 < len(words) else ""
+            if j == end or after == "de" or before in ("la", "su", "habilidad", "tecla"):
+                return w
+        return None
+
+    def answer(self, text: str) -> str | None:
+        if not self._names:
+            return None
+        words = _lol_words(text)
+        if not words or len(words) > 14 or LOL_OPEN_WORDS.intersection(words):
+            return None
+        if not LOL_INTENT_WORDS.intersection(words) and not set(LOL_SPELL_KEYS).intersection(words):
+            return None   # no pide ningún dato: ni se buscan nombres
+        found = self.resolve(words)
+        if len(found) != 1:
+            return None   # nada o varias cosas ("jinx o caitlyn?"): mejor el modelo
+        kind, obj_id, start, end = found[0]
+        rest = set(words[:start] + words[end:])
+        intents = LOL_CHAMP_INTENTS if kind == "champ" else LOL_ITEM_INTENTS
+        intent = self._spell_key(words, start, end) if kind == "champ" else None
+        if intent is None:
+            intent = next((name for name, keys in intents if rest & keys), None)
+        if intent is None and kind == "champ" and {"que", "es"} <= rest:
+            intent = "info"   # "qué es vi": solo con las dos, "que" suelto es demasiado amplio
+        if intent is None:
+            return None
+        reply = self._answers.get((kind, obj_id, intent))
+        if reply:
+            self.answered += 1
+        return reply
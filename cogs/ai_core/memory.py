@@ -0,0 +1,119 @@
+"""Memoria de conversación por canal/hilo con presupuesto de tokens."""
+import re
+import time
+from collections import OrderedDict, deque
+
+from .config import AI_MEMORY_CHANNELS, AI_MEMORY_TOKENS, AI_MEMORY_TTL_SEC, AI_MEMORY_TURNS
+
+
+def estimate_tokens(text: str) -> int:
+    # aproximación barata (~4 caracteres por token en español/inglés con llama)
+    return len(text) // 4 + 1
+
+
+# Solo las preguntas que dependen de lo anterior usan el historial; las autocontenidas
+# ("build de jinx") se responden igual en cualquier canal y pueden salir de la caché.
+_FOLLOW_UP_START = re.compile(
+    r"^\W*(?:y|e|o|pero|entonces|o sea|osea|tambi[eé]n|igual|and|but|what about|so)\b", re.I
+)
+_FOLLOW_UP_ONLY = re.compile(
+    r"^\W*(?:por\s*qu[eé]|seguro|en serio|c[oó]mo as[ií]|cu[aá]l|otra|otro|m[aá]s|why|really|more)\W*$", re.I
+)
+_ANAPHORA = re.compile(
+    r"\b(?:eso|esa|ese|esto|esta|este|esos|esas|ello|lo mismo|lo anterior|lo que dijiste|that|this|it)\b", re.I
+)
+FOLLOW_UP_MAX_WORDS = 8  # con más palabras, un "esta"/"that" suelto ya no delata un seguimiento
+
+
+def is_follow_up(text: str) -> bool:
+    """True si el texto parece continuar la conversación ("¿y contra tanks?", "por qué?", "eso sirve en aram?")."""
+    if not text:
+        return False
+    if _FOLLOW_UP_START.search(text) or _FOLLOW_UP_ONLY.search(text):
+        return True
+    return len(text.split()) <= FOLLOW_UP_MAX_WORDS and _ANAPHORA.search(text) is not None
+
+
+class _Turn:
+    __slots__ = ("user", "assistant", "tokens")
+
+    def __init__(self, user: str, assistant: str):
+        self.user = user
+        self.assistant = assistant
+        self.tokens = estimate_tokens(user) + estimate_tokens(assistant)
+
+
+class Conversation:
+    """Ventana deslizante de turnos (pregunta, respuesta) limitada por tokens y por número de turnos."""
+
+    __slots__ = ("turns", "tokens", "last_used")
+
+    def __init__(self, max_turns: int = AI_MEMORY_TURNS):
+        self.turns: deque[_Turn] = deque(maxlen=max(1, max_turns))
+        self.tokens = 0
+        self.last_used = time.monotonic()
+
+    def add(self, user: str, assistant: str, budget: int = AI_MEMORY_TOKENS):
+        if len(self.turns) == self.turns.maxlen:
+            self.tokens -= self.turns[0].tokens
+        turn = _Turn(user, assistant)
+        self.turns.append(turn)
+        self.tokens += turn.tokens
+        # los turnos más viejos salen primero; el último se queda aunque pase el presupuesto
+        while self.tokens > budget and len(self.turns) > 1:
+            self.tokens -= self.turns.popleft().tokens
+        self.last_used = time.monotonic()
+
+    def messages(self) -> list[dict]:
+        out = []
+        for t in self.turns:
+            out.append({"role": "user", "content": t.user})
+            out.append({"role": "assistant", "content": t.assistant})
+        return out
+
+
+class ConversationStore:
+    """
+    Conversaciones por canal (los hilos tienen su propio ID) en un LRU acotado.
+    Como el orden LRU es también el de último uso, las que pasan el TTL de
+    inactividad siempre están al principio y se barren sin recorrer todo.
+    """
+
+    def __init__(self, max_channels: int = AI_MEMORY_CHANNELS, ttl: float = AI_MEMORY_TTL_SEC):
+        self.max_channels = max_channels
+        self.ttl = ttl
+        self._convs: OrderedDict[int, Conversation] = OrderedDict()
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self._convs)
+
+    def sweep(self):
+        limit = time.monotonic() - self.ttl
+        while self._convs:
+            key, conv = next(iter(self._convs.items()))
+            if conv.last_used >= limit:
+                break
+            del self._convs[key]
+            self.expired += 1
+
+    def history(self, channel_id: int) -> list[dict]:
+        self.sweep()
+        conv = self._convs.get(channel_id)
+        return conv.messages() if conv else []
+
+    def record(self, channel_id: int, user: str, assistant: str):
+        self.sweep()
+        conv = self._convs.get(channel_id)
+        if conv is None:
+            conv = self._convs[channel_id] = Conversation()
+        conv.add(user, assistant)
+        self._convs.move_to_end(channel_id)
+        while len(self._convs) > self.max_channels:
+            self._convs.popitem(last=False)
+
+    def forget(self, channel_id: int) -> bool:
+        return self._convs.pop(channel_id, None) is not None
+
+    def total_tokens(self) -> int:
+        return sum(c.tokens for c in self._convs.values())
@@ -0,0 +1,148 @@
+"""Métricas en memoria (contadores e histogramas) con salida en formato Prometheus."""
+import time
+
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60, 120)
+RATE_BUCKETS = (1, 2, 4, 6, 8, 10, 15, 20, 30, 50, 80, 120)
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # el último es +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        i = 0
+        while i < len(self.bounds) and value > self.bounds[i]:
+            i += 1
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Estimación por interpolación lineal dentro del bucket (como histogram_quantile)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lo = self.bounds[i - 1] if i else 0.0
+                if i == len(self.bounds):
+                    return lo
+                return lo + (self.bounds[i] - lo) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+
+class Metrics:
+    """Contadores e histogramas con etiquetas, sin dependencias; `render()` da el texto de Prometheus."""
+
+    HELP = {
+        "ai_requests_total": "Preguntas a la IA por resultado",
+        "ai_timeouts_total": "Timeouts por etapa",
+        "ai_cache_lookups_total": "Consultas a las cachés",
+        "ai_trigger_to_dispatch_seconds": "Desde el mensaje hasta enviar la petición a Ollama",
+        "ai_queue_wait_seconds": "Espera en la cola de generación",
+        "ai_ttft_seconds": "Tiempo hasta el primer token (desde el envío a Ollama)",
+        "ai_model_load_seconds": "load_duration de Ollama (carga del modelo)",
+        "ai_prompt_eval_seconds": "prompt_eval_duration de Ollama",
+        "ai_tokens_per_second": "eval_count / eval_duration de Ollama",
+        "ai_total_seconds": "Desde el mensaje hasta la respuesta final",
+        "ai_discord_seconds": "Llamadas a Discord (responder/editar)",
+        "ai_queue_waiting": "Preguntas esperando en la cola",
+        "ai_queue_running": "Generaciones en curso",
+        "ai_inflight_prompts": "Preguntas distintas generándose (single-flight)",
+        "ai_cache_entries": "Entradas en la caché exacta",
+        "ai_memory_channels": "Canales con memoria de conversación",
+        "ai_semcache_entries": "Entradas en la caché semántica",
+        "ai_endpoints_healthy": "Servidores Ollama fuera del circuit breaker",
+        "ai_endpoints_inflight": "Peticiones en curso a Ollama",
+    }
+
+    def __init__(self):
+        self.counters: dict[tuple[str, tuple], float] = {}
+        self.histograms: dict[tuple[str, tuple], Histogram] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, *, buckets: tuple = LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        h = self.histograms.get(key)
+        if h is None:
+            h = self.histograms[key] = Histogram(buckets)
+        h.observe(value)
+
+    def counter(self, name: str, **labels) -> float:
+        if labels:
+            return self.counters.get((name, tuple(sorted(labels.items()))), 0)
+        return sum(v for (n, _), v in self.counters.items() if n == name)
+
+    def histogram(self, name: str, **labels) -> Histogram | None:
+        return self.histograms.get((name, tuple(sorted(labels.items()))))
+
+    @staticmethod
+    def _labels(pairs, extra: str = "") -> str:
+        parts = [f'{k}="{v}"' for k, v in pairs]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self, gauges: dict[str, float] | None = None) -> str:
+        out: list[str] = []
+        declared: set[str] = set()
+
+        def header(name: str, kind: str):
+            if name not in declared:
+                declared.add(name)
+                out.append(f"# HELP {name} {self.HELP.get(name, name)}")
+                out.append(f"# TYPE {name} {kind}")
+
+        for (name, pairs), value in sorted(self.counters.items()):
+            header(name, "counter")
+            out.append(f"{name}{self._labels(pairs)} {value:g}")
+        for (name, pairs), h in sorted(self.histograms.items(), key=lambda kv: kv[0]):
+            header(name, "histogram")
+            cumulative = 0
+            labels = self._labels(pairs)
+            for bound, n in zip(h.bounds, h.counts):
+                cumulative += n
+                le = self._labels(pairs, 'le="%g"' % bound)
+                out.append(f"{name}_bucket{le} {cumulative}")
+            le = self._labels(pairs, 'le="+Inf"')
+            out.append(f"{name}_bucket{le} {h.count}")
+            out.append(f"{name}_sum{labels} {h.sum:.6f}")
+            out.append(f"{name}_count{labels} {h.count}")
+        for name, value in (gauges or {}).items():
+            header(name, "gauge")
+            out.append(f"{name} {value:g}")
+        return "\n".join(out) + "\n"
+
+
+METRICS = Metrics()
+
+
+class Trace:
+    """Tiempos de una pregunta a lo largo del pipeline."""
+
+    __slots__ = ("started", "dispatched", "outcome", "path")
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.dispatched: float | None = None
+        self.outcome = "error"
+        self.path: str | None = None  # cómo se respondió: generada / cache / semantica / agrupada
+
+    def dispatch(self):
+        """Se envía la petición a Ollama (solo cuenta el primer intento)."""
+        now = time.monotonic()
+        if self.dispatched is None:
+            METRICS.observe("ai_trigger_to_dispatch_seconds", now - self.started)
+        self.dispatched = now
+        return now
@@ -0,0 +1,168 @@
+"""Cliente HTTP de Ollama: sesión compartida, payloads y llamadas (normal, streaming, embeddings)."""
+import json
+import aiohttp
+
+from .config import (
+    AI_EMBED_MODEL, AI_KEEPALIVE_SEC, AI_KEEP_ALIVE_SEC, AI_MODEL, AI_POOL_LIMIT, AI_POOL_PER_HOST,
+    AI_TIMEOUT_SEC, AI_WARMUP_TIMEOUT_SEC, SYSTEM_PROMPT,
+)
+from .metrics import METRICS, RATE_BUCKETS
+
+
+class PoolStats:
+    """Contadores de conexiones del pool (vía TraceConfig de aiohttp)."""
+
+    def __init__(self):
+        self.requests = 0
+        self.created = 0
+        self.reused = 0
+        self.dns_hits = 0
+        self.dns_misses = 0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        tc = aiohttp.TraceConfig()
+
+        async def _req(session, ctx, params):
+            self.requests += 1
+
+        async def _created(session, ctx, params):
+            self.created += 1
+
+        async def _reused(session, ctx, params):
+            self.reused += 1
+
+        async def _dns_hit(session, ctx, params):
+            self.dns_hits += 1
+
+        async def _dns_miss(session, ctx, params):
+            self.dns_misses += 1
+
+        tc.on_request_start.append(_req)
+        tc.on_connection_create_end.append(_created)
+        tc.on_connection_reuseconn.append(_reused)
+        tc.on_dns_cache_hit.append(_dns_hit)
+        tc.on_dns_cache_miss.append(_dns_miss)
+        return tc
+
+    @property
+    def reuse_ratio(self) -> float:
+        total = self.created + self.reused
+        return self.reused / total if total else 0.0
+
+
+def make_session(stats: PoolStats) -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=AI_POOL_LIMIT,
+        limit_per_host=AI_POOL_PER_HOST,
+        ttl_dns_cache=300,
+        keepalive_timeout=AI_KEEPALIVE_SEC,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=15),
+        trace_configs=[stats.trace_config()],
+    )
+
+
+def build_payload(prompt: str, *, stream: bool, history: list[dict] | None = None,
+                  context: list[str] | None = None) -> dict:
+    # el system prompt va siempre primero e idéntico: Ollama reutiliza el prefijo ya
+    # evaluado (KV cache) y solo procesa lo nuevo del historial y la pregunta.
+    # Por eso el conocimiento recuperado va al final, justo antes de la pregunta.
+    knowledge = []
+    if context:
+        knowledge.append({
+            "role": "system",
+            "content": "Información de este servidor de Discord (úsala si sirve para responder, no la inventes):\n\n"
+                       + "\n\n---\n\n".join(context),
+        })
+    return {
+        "model": AI_MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            *(history or ()),
+            *knowledge,
+            {"role": "user", "content": prompt},
+        ],
+        "stream": stream,
+        "keep_alive": AI_KEEP_ALIVE_SEC,
+    }
+
+
+async def probe_model(session: aiohttp.ClientSession, base: str) -> bool:
+    """¿Está AI_MODEL cargado en memoria? (GET /api/ps)"""
+    async with session.get(f"{base}/api/ps", timeout=aiohttp.ClientTimeout(total=5)) as resp:
+        resp.raise_for_status()
+        data = await resp.json()
+    return any(AI_MODEL in (m.get("name"), m.get("model")) for m in data.get("models") or ())
+
+
+async def warm_model(session: aiohttp.ClientSession, base: str):
+    """Carga el modelo y deja evaluado el system prompt (1 token de salida)."""
+    payload = build_payload("hola", stream=False)
+    payload["options"] = {"num_predict": 1}
+    timeout = aiohttp.ClientTimeout(total=AI_WARMUP_TIMEOUT_SEC)
+    async with session.post(f"{base}/api/chat", json=payload, timeout=timeout) as resp:
+        resp.raise_for_status()
+        await resp.read()
+
+
+async def ping_model(session: aiohttp.ClientSession, base: str):
+    """Renueva el keep_alive sin generar nada (mensajes vacíos)."""
+    payload = {"model": AI_MODEL, "messages": [], "keep_alive": AI_KEEP_ALIVE_SEC}
+    async with session.post(f"{base}/api/chat", json=payload, timeout=aiohttp.ClientTimeout(total=30)) as resp:
+        resp.raise_for_status()
+        await resp.read()
+
+
+async def embed_text(session: aiohttp.ClientSession, base: str, text: str) -> list[float]:
+    async with session.post(f"{base}/api/embeddings", json={"model": AI_EMBED_MODEL, "prompt": text}) as resp:
+        resp.raise_for_status()
+        data = await resp.json()
+    return data.get("embedding") or []
+
+
+def record_ollama_stats(data: dict):
+    """Duraciones (ns) y conteos que Ollama manda en la respuesta final."""
+    if data.get("load_duration"):
+        METRICS.observe("ai_model_load_seconds", data["load_duration"] / 1e9)
+    if data.get("prompt_eval_duration"):
+        METRICS.observe("ai_prompt_eval_seconds", data["prompt_eval_duration"] / 1e9)
+    if data.get("eval_count") and data.get("eval_duration"):
+        METRICS.observe("ai_tokens_per_second", data["eval_count"] / (data["eval_duration"] / 1e9),
+                        buckets=RATE_BUCKETS)
+
+
+async def call_ollama(session: aiohttp.ClientSession, base: str, prompt: str,
+                      history: list[dict] | None = None, context: list[str] | None = None) -> str:
+    url = f"{base}/api/chat"
+    payload = build_payload(prompt, stream=False, history=history, context=context)
+    async with session.post(url, json=payload) as resp:
+        resp.raise_for_status()
+        data = await resp.json()
+        record_ollama_stats(data)
+        return ((data.get("message") or {}).get("content") or "").strip()
+
+
+async def stream_ollama(session: aiohttp.ClientSession, base: str, prompt: str,
+                        history: list[dict] | None = None, context: list[str] | None = None):
+    """Va entregando los fragmentos del stream NDJSON de /api/chat."""
+    url = f"{base}/api/chat"
+    # sin límite total: solo que no pase AI_TIMEOUT_SEC sin recibir nada
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=AI_TIMEOUT_SEC)
+    payload = build_payload(prompt, stream=True, history=history, context=context)
+    async with session.post(url, json=payload, timeout=timeout) as resp:
+        resp.raise_for_status()
+        async for raw in resp.content:
+            line = raw.strip()
+            if not line:
+                continue
+            data = json.loads(line)
+            if data.get("error"):
+                raise RuntimeError(data["error"])
+            chunk = (data.get("message") or {}).get("content")
+            if chunk:
+                yield chunk
+            if data.get("done"):
+                record_ollama_stats(data)
+                break
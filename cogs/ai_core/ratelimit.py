@@ -0,0 +1,98 @@
+"""Límite de preguntas por usuario adaptado a la carga, más un tope global de admisión."""
+import time
+from collections import OrderedDict
+
+from .config import (
+    AI_ADMIT_PER_MIN, AI_EWMA_ALPHA, AI_RATE_BURST, AI_RATE_BUSY_SEC, AI_RATE_IDLE_SEC, AI_RATE_SLOW_SEC,
+    AI_RATE_USERS,
+)
+
+
+class RateLimiter:
+    """
+    Token bucket por usuario cuya recarga depende de la presión del backend
+    (cola ocupada o latencia reciente, 0..1): con el modelo libre una pregunta
+    cada AI_RATE_IDLE_SEC, saturado una cada AI_RATE_BUSY_SEC. Además hay un
+    bucket global de admisión para las generaciones nuevas.
+
+    Los usuarios se guardan en orden de último uso (LRU acotado); los que llevan
+    quietos lo suficiente para tener el bucket lleno se olvidan sin perder nada.
+    """
+
+    def __init__(self, burst: float = AI_RATE_BURST, idle: float = AI_RATE_IDLE_SEC, busy: float = AI_RATE_BUSY_SEC,
+                 slow: float = AI_RATE_SLOW_SEC, max_users: int = AI_RATE_USERS, admit_per_min: float = AI_ADMIT_PER_MIN):
+        self.burst = max(1.0, burst)
+        self.idle = idle
+        self.busy = max(busy, idle)
+        self.slow = slow
+        self.max_users = max_users
+        self.admit_rate = admit_per_min / 60
+        self.admit_burst = max(1.0, admit_per_min / 4)   # ~15 s de margen
+        self._buckets: OrderedDict[tuple, list[float]] = OrderedDict()  # clave -> [tokens, última vez]
+        self._admit = [self.admit_burst, time.monotonic()]
+        self.latency: float | None = None   # EWMA de espera en cola + generación
+        self.limited = 0
+        self.saturated = 0
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def observe(self, seconds: float):
+        self.latency = seconds if self.latency is None else AI_EWMA_ALPHA * seconds + (1 - AI_EWMA_ALPHA) * self.latency
+
+    def pressure(self, queue_fill: float) -> float:
+        slow = min(1.0, self.latency / self.slow) if self.latency is not None and self.slow > 0 else 0.0
+        return max(0.0, min(1.0, max(queue_fill, slow)))
+
+    def interval(self, pressure: float) -> float:
+        """Segundos que tarda en recargarse una pregunta con esa presión."""
+        return self.idle + (self.busy - self.idle) * pressure
+
+    def hit(self, key: tuple, pressure: float, now: float | None = None) -> float:
+        """Gasta una pregunta de `key`; devuelve 0 si pasa o los segundos que le faltan."""
+        now = time.monotonic() if now is None else now
+        interval = self.interval(pressure)
+        b = self._buckets.pop(key, None)
+        if b is None:
+            tokens = self.burst
+        else:
+            refill = max(0.0, now - b[1]) / interval if interval > 0 else self.burst
+            tokens = min(self.burst, b[0] + refill)
+        retry = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry = (1 - tokens) * interval
+            self.limited += 1
+        self._buckets[key] = [tokens, now]
+        self._evict(now)
+        return retry
+
+    def refund(self, key: tuple):
+        b = self._buckets.get(key)
+        if b is not None:
+            b[0] = min(self.burst, b[0] + 1)
+
+    def admit(self, now: float | None = None) -> bool:
+        """Admisión global: False si ya entraron demasiadas generaciones en el último rato."""
+        if self.admit_rate <= 0:
+            return True
+        now = time.monotonic() if now is None else now
+        tokens = min(self.admit_burst, self._admit[0] + max(0.0, now - self._admit[1]) * self.admit_rate)
+        if tokens < 1:
+            self._admit = [tokens, now]
+            self.saturated += 1
+            return False
+        self._admit = [tokens - 1, now]
+        return True
+
+    def _evict(self, now: float):
+        while len(self._buckets) > self.max_users:
+            self._buckets.popitem(last=False)
+        # a partir de aquí el bucket estaría lleno incluso con la recarga más lenta
+        full_after = self.burst * self.busy
+        while self._buckets:
+            key, (_, last) = next(iter(self._buckets.items()))
+            if now - last < full_after:
+                break
+            del self._buckets[key]
@@ -0,0 +1,95 @@
+"""Publicación de respuestas en Discord: reply con reintento y edición progresiva del streaming."""
+import time
+import asyncio
+import discord
+
+from .config import AI_MAX_REPLY, AI_STREAM_EDIT_SEC, AI_STREAM_FIRST_CHARS
+from .metrics import METRICS
+
+
+async def safe_reply(msg: discord.Message, *args, **kwargs):
+    started = time.monotonic()
+    try:
+        return await msg.reply(*args, **kwargs)
+    except (discord.NotFound, discord.HTTPException):
+        kwargs.pop("reference", None)
+        return await msg.channel.send(*args, **kwargs)
+    finally:
+        METRICS.observe("ai_discord_seconds", time.monotonic() - started, op="reply")
+
+class ProgressiveReply:
+    """
+    Respuesta que se publica en cuanto hay AI_STREAM_FIRST_CHARS caracteres y
+    luego se edita a medida que llegan tokens, como mucho una vez cada
+    `interval` segundos (los tokens intermedios se acumulan en una sola edición).
+    """
+
+    def __init__(self, source: discord.Message, interval: float = AI_STREAM_EDIT_SEC,
+                 first_chars: int = AI_STREAM_FIRST_CHARS, limit: int = AI_MAX_REPLY):
+        self.source = source
+        self.interval = interval
+        self.first_chars = first_chars
+        self.limit = limit
+        self.message: discord.Message | None = None
+        self.text = ""
+        self.shown = ""
+        self.edits = 0
+        self._last = 0.0
+        self._lost = False  # el mensaje intermedio se borró: no editarlo más
+
+    @property
+    def full(self) -> bool:
+        return len(self.text) >= self.limit
+
+    async def _show(self, content: str):
+        # un fallo intermedio (429, mensaje borrado…) solo se salta: el stream sigue y
+        # `finish` publica el texto final por su cuenta
+        self._last = time.monotonic()
+        try:
+            if self.message is None:
+                self.message = await safe_reply(self.source, content, mention_author=False)
+            elif not self._lost:
+                started = time.monotonic()
+                await self.message.edit(content=content)
+                METRICS.observe("ai_discord_seconds", time.monotonic() - started, op="edit")
+                self.edits += 1
+            else:
+                return
+        except discord.NotFound:
+            self._lost = True
+            return
+        except discord.HTTPException as e:
+            print(f"[ai] edición intermedia fallida: {type(e).__name__}: {e}")
+            return
+        self.shown = content
+
+    async def feed(self, chunk: str):
+        self.text += chunk
+        view = self.text.strip()[:self.limit]
+        if self.message is None:
+            if len(view) >= self.first_chars:
+                await self._show(view + " …")
+        elif time.monotonic() - self._last >= self.interval:
+            await self._show(view + " …")
+
+    async def finish(self, fallback: str) -> discord.Message:
+        final = self.text.strip()[:self.limit] or fallback
+        if self.message is None or self._lost:
+            self.message = await safe_reply(self.source, final, mention_author=False)
+        elif final != self.shown:
+            try:
+                await self.message.edit(content=final)
+            except discord.HTTPException:
+                self.message = await safe_reply(self.source, final, mention_author=False)
+        self.shown = final
+        return self.message
+
+
+async def typing_until_posted(channel: discord.abc.Messageable, progress: ProgressiveReply):
+    # "escribiendo…" solo hasta que aparece el primer texto (cada trigger dura ~10 s)
+    while progress.message is None:
+        try:
+            await channel.typing()
+        except discord.HTTPException:
+            pass
+        await asyncio.sleep(8)
@@ -0,0 +1,169 @@
+"""Planificador justo de generaciones: cola acotada, turnos por usuario y prioridad."""
+import time
+import asyncio
+from collections import OrderedDict, deque
+
+from .config import AI_CONCURRENCY, AI_QUEUE_MAX, AI_QUEUE_PER_USER
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Ticket:
+    __slots__ = ("user_id", "channel_id", "priority", "future", "enqueued_at", "granted_at")
+
+    def __init__(self, user_id: int, channel_id: int, priority: bool):
+        self.user_id = user_id
+        self.channel_id = channel_id
+        self.priority = priority
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+        self.granted_at: float | None = None
+
+    @property
+    def granted(self) -> bool:
+        return self.future.done() and not self.future.cancelled()
+
+    async def wait(self):
+        await asyncio.shield(self.future)
+
+
+class _FairQueue:
+    """Round-robin por canal y, dentro de cada canal, por usuario (FIFO por usuario)."""
+
+    def __init__(self):
+        # channel_id -> (user_id -> deque[Ticket]); el orden de los dicts es el turno
+        self._channels: OrderedDict[int, OrderedDict[int, deque]] = OrderedDict()
+        self.size = 0
+
+    def push(self, t: Ticket):
+        users = self._channels.setdefault(t.channel_id, OrderedDict())
+        users.setdefault(t.user_id, deque()).append(t)
+        self.size += 1
+
+    def pop(self) -> Ticket | None:
+        if not self._channels:
+            return None
+        cid, users = next(iter(self._channels.items()))
+        uid, q = next(iter(users.items()))
+        t = q.popleft()
+        self.size -= 1
+        # el usuario y el canal pasan al final de su turno
+        del users[uid]
+        if q:
+            users[uid] = q
+        del self._channels[cid]
+        if users:
+            self._channels[cid] = users
+        return t
+
+    def remove(self, t: Ticket) -> bool:
+        users = self._channels.get(t.channel_id)
+        q = users.get(t.user_id) if users else None
+        if not q or t not in q:
+            return False
+        q.remove(t)
+        self.size -= 1
+        if not q:
+            del users[t.user_id]
+        if not users:
+            del self._channels[t.channel_id]
+        return True
+
+    def order(self):
+        """Orden de servicio previsto (simula pop sin modificar la cola)."""
+        chans = [(cid, [list(q) for q in users.values()]) for cid, users in self._channels.items()]
+        while chans:
+            cid, lanes = chans.pop(0)
+            lane = lanes.pop(0)
+            yield lane.pop(0)
+            if lane:
+                lanes.append(lane)
+            if lanes:
+                chans.append((cid, lanes))
+
+    def count_user(self, user_id: int) -> int:
+        return sum(len(users.get(user_id, ())) for users in self._channels.values())
+
+
+class AIScheduler:
+    """
+    Límite de generaciones simultáneas delante de Ollama con cola acotada.
+    Las menciones directas van en un carril prioritario; cada carril es
+    round-robin por canal y usuario. Si la cola está llena, `submit` falla al instante.
+    """
+
+    def __init__(self, concurrency: int = AI_CONCURRENCY, max_queue: int = AI_QUEUE_MAX,
+                 per_user: int = AI_QUEUE_PER_USER):
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max_queue
+        self.per_user = per_user
+        self.running = 0
+        self._priority = _FairQueue()
+        self._normal = _FairQueue()
+        self.completed = 0
+        self.rejected = 0
+        self.abandoned = 0
+
+    @property
+    def queued(self) -> int:
+        return self._priority.size + self._normal.size
+
+    def submit(self, user_id: int, channel_id: int, *, priority: bool = False) -> Ticket:
+        t = Ticket(user_id, channel_id, priority)
+        if self.running < self.concurrency and not self.queued:
+            self._grant(t)
+            return t
+        if self.queued >= self.max_queue or (
+            self.per_user and self._priority.count_user(user_id) + self._normal.count_user(user_id) >= self.per_user
+        ):
+            self.rejected += 1
+            raise QueueFull()
+        (self._priority if priority else self._normal).push(t)
+        return t
+
+    def position(self, t: Ticket) -> int:
+        """Puesto en la fila (1 = el siguiente en entrar)."""
+        if t.granted:
+            return 0
+        for i, other in enumerate(self._priority.order(), 1):
+            if other is t:
+                return i
+        for i, other in enumerate(self._normal.order(), self._priority.size + 1):
+            if other is t:
+                return i
+        return 0
+
+    def _grant(self, t: Ticket):
+        self.running += 1
+        t.granted_at = time.monotonic()
+        t.future.set_result(None)
+
+    def _dispatch(self):
+        while self.running < self.concurrency:
+            t = self._priority.pop() or self._normal.pop()
+            if t is None:
+                return
+            if not t.future.done():
+                self._grant(t)
+
+    def cancel(self, t: Ticket):
+        """El que esperaba se rindió: sacarlo de la cola (o liberar el turno si ya lo tenía)."""
+        if t.granted:
+            self.release(t)
+            return
+        if self._priority.remove(t) or self._normal.remove(t):
+            self.abandoned += 1
+        if not t.future.done():
+            t.future.cancel()
+
+    def release(self, t: Ticket):
+        self.running = max(0, self.running - 1)
+        self.completed += 1
+        self._dispatch()
+
+    def resize(self, concurrency: int):
+        """Ajusta el límite (p. ej. según los nodos sanos) y deja entrar a quien quepa."""
+        self.concurrency = max(1, concurrency)
+        self._dispatch()
@@ -0,0 +1,297 @@
+import os
+import re
+import json
+import time
+import zlib
+import hashlib
+import unicodedata
+from collections import deque, defaultdict
+import discord
+from discord.ext import commands
+
+try:
+    import numpy as np
+except ImportError:  # sin numpy las firmas se calculan en Python puro (mismo resultado, más lento)
+    np = None
+
+CONFIG_PATH = "data/config.json"
+
+def load_cfg():
+    try:
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def env_int(name, default=0):
+    try:
+        return int(os.getenv(name) or default)
+    except Exception:
+        return default
+
+def env_float(name, default=0.0):
+    try:
+        return float(os.getenv(name) or default)
+    except Exception:
+        return default
+
+CFG = load_cfg()
+ANTISPAM_ENABLED = bool(CFG.get("antispam_enabled", env_int("ANTISPAM_ENABLED", 1)))
+WINDOW_SEC = float(CFG.get("antispam_window_sec", env_float("ANTISPAM_WINDOW_SEC", 20)))
+MIN_AUTHORS = int(CFG.get("antispam_min_authors", env_int("ANTISPAM_MIN_AUTHORS", 3)))
+MIN_LENGTH = int(CFG.get("antispam_min_length", env_int("ANTISPAM_MIN_LENGTH", 16)))
+MIN_CHANNELS = int(CFG.get("antispam_min_channels", env_int("ANTISPAM_MIN_CHANNELS", 2)))
+SIMILARITY = float(CFG.get("antispam_similarity", env_float("ANTISPAM_SIMILARITY", 0.6)))
+LSH_BANDS = int(CFG.get("antispam_lsh_bands", env_int("ANTISPAM_LSH_BANDS", 16)))
+LSH_ROWS = int(CFG.get("antispam_lsh_rows", env_int("ANTISPAM_LSH_ROWS", 4)))
+SHINGLE_SIZE = int(CFG.get("antispam_shingle_size", env_int("ANTISPAM_SHINGLE_SIZE", 4)))
+# solo se firman los primeros N caracteres normalizados: acota el coste con mensajes de 4000
+MAX_CHARS = int(CFG.get("antispam_max_chars", env_int("ANTISPAM_MAX_CHARS", 512)))
+STAFF_CHANNEL_ID = CFG.get("staff_channel_id") or env_int("STAFF_CHANNEL_ID", 0)
+PROTECTED_ROLE_IDS = set(CFG.get("protected_role_ids", []))
+
+_MENTION_RX = re.compile(r"<[@#][!&]?\d+>|<a?:\w+:\d+>")
+_NON_WORD_RX = re.compile(r"[^0-9a-z]+")
+_ZERO_WIDTH = dict.fromkeys(map(ord, "\u200b\u200c\u200d\u2060\ufeff"), None)
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas, sin acentos, sin menciones ni caracteres invisibles, espacios colapsados."""
+    text = _MENTION_RX.sub(" ", text.translate(_ZERO_WIDTH))
+    nfkd = unicodedata.normalize("NFKD", text.casefold())
+    no_accents = "".join(c for c in nfkd if not unicodedata.combining(c))
+    return _NON_WORD_RX.sub(" ", no_accents).strip()
+
+
+# primo de Mersenne de 31 bits: a·x + b cabe en 64 bits, así numpy calcula lo mismo que Python
+_PRIME = (1 << 31) - 1
+
+
+def _permutations(n: int) -> list[tuple[int, int]]:
+    # coeficientes (a, b) deterministas para que las firmas sean estables entre reinicios
+    out = []
+    for i in range(n):
+        d = hashlib.blake2b(f"minhash:{i}".encode(), digest_size=8).digest()
+        a = int.from_bytes(d[:4], "little") % _PRIME or 1
+        b = int.from_bytes(d[4:], "little") % _PRIME
+        out.append((a, b))
+    return out
+
+
+def shingles(text: str, k: int = SHINGLE_SIZE) -> set[str]:
+    """Shingles de k caracteres sin espacios (así resiste letras intercaladas o espacios extra)."""
+    compact = text.replace(" ", "")
+    if len(compact) <= k:
+        return {compact}
+    return {compact[i:i + k] for i in range(len(compact) - k + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm: int, max_chars: int = MAX_CHARS):
+        self.perms = _permutations(num_perm)
+        self.max_chars = max_chars
+        if np is not None:
+            self._a = np.array([a for a, _ in self.perms], dtype=np.uint64)[:, None]
+            self._b = np.array([b for _, b in self.perms], dtype=np.uint64)[:, None]
+
+    def signature(self, text: str) -> tuple[int, ...]:
+        base = [zlib.crc32(sh.encode()) % _PRIME for sh in shingles(text[:self.max_chars])]
+        if np is not None:
+            # (permutaciones × shingles) de una vez; con max_chars=512 son ~64×500 valores
+            x = np.array(base, dtype=np.uint64)[None, :]
+            return tuple(((self._a * x + self._b) % _PRIME).min(axis=1).tolist())
+        return tuple(min((a * x + b) % _PRIME for x in base) for a, b in self.perms)
+
+
+class _Cluster:
+    __slots__ = ("entries", "authors", "channels", "flagged")
+
+    def __init__(self):
+        self.entries: list["_Entry"] = []
+        self.authors: set[int] = set()
+        self.channels: set[int] = set()
+        self.flagged = False
+
+    def absorb(self, entry: "_Entry"):
+        entry.cluster = self
+        self.entries.append(entry)
+        self.authors.add(entry.author_id)
+        self.channels.add(entry.channel_id)
+
+
+class _Entry:
+    __slots__ = ("sig", "ts", "author_id", "channel_id", "message_id", "cluster", "deleted")
+
+    def __init__(self, sig: tuple[int, ...], ts: float, author_id: int, channel_id: int, message_id: int):
+        self.sig = sig
+        self.ts = ts
+        self.author_id = author_id
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.cluster: _Cluster | None = None
+        self.deleted = False
+
+
+class MinHashIndex:
+    """
+    Índice LSH de firmas MinHash con ventana de tiempo, compartido entre canales.
+
+    La firma se parte en bandas de `rows` valores; solo se comparan mensajes que
+    coinciden en alguna banda completa, así cada búsqueda toca unos pocos buckets
+    en vez de toda la ventana. Los candidatos se confirman con la similitud de
+    Jaccard estimada (fracción de posiciones iguales en la firma).
+    """
+
+    def __init__(self, window: float, threshold: float, bands: int, rows: int):
+        self.window = window
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self._buckets: dict[tuple, dict[int, _Entry]] = defaultdict(dict)
+        self._order: deque[_Entry] = deque()
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _keys(self, sig: tuple[int, ...]):
+        r = self.rows
+        for n in range(self.bands):
+            yield n, sig[n * r:(n + 1) * r]
+
+    @staticmethod
+    def similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+        return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+    def expire(self, now: float):
+        limit = now - self.window
+        while self._order and self._order[0].ts < limit:
+            old = self._order.popleft()
+            for key in self._keys(old.sig):
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    continue
+                bucket.pop(old.message_id, None)
+                if not bucket:
+                    del self._buckets[key]
+
+    def add(self, entry: _Entry) -> _Cluster:
+        """Inserta la entrada y la une al cluster de sus casi-duplicados (si los hay)."""
+        self.expire(entry.ts)
+        seen: set[int] = set()
+        cluster = None
+        for key in self._keys(entry.sig):
+            bucket = self._buckets.get(key)
+            if not bucket:
+                continue
+            for other in bucket.values():
+                if other.message_id in seen:
+                    continue
+                seen.add(other.message_id)
+                if other.cluster is cluster or self.similarity(entry.sig, other.sig) < self.threshold:
+                    continue
+                if cluster is None:
+                    cluster = other.cluster
+                else:
+                    # fusionar clusters que este mensaje acaba de conectar
+                    absorbed = other.cluster
+                    for e in absorbed.entries:
+                        cluster.absorb(e)
+                    cluster.flagged = cluster.flagged or absorbed.flagged
+        if cluster is None:
+            cluster = _Cluster()
+
+        cluster.absorb(entry)
+        for key in self._keys(entry.sig):
+            self._buckets[key][entry.message_id] = entry
+        self._order.append(entry)
+        return cluster
+
+
+class AntiSpam(commands.Cog):
+    """Detecta el mismo texto (o casi) publicado por varias cuentas en varios canales a la vez."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.hasher = MinHasher(LSH_BANDS * LSH_ROWS)
+        self.index = MinHashIndex(WINDOW_SEC, SIMILARITY, LSH_BANDS, LSH_ROWS)
+
+    def _is_exempt(self, member: discord.Member) -> bool:
+        perms = getattr(member, "guild_permissions", None)
+        if perms and (perms.manage_messages or perms.administrator):
+            return True
+        return bool(PROTECTED_ROLE_IDS) and any(r.id in PROTECTED_ROLE_IDS for r in getattr(member, "roles", []))
+
+    async def _purge(self, guild: discord.Guild, entries: list[_Entry]):
+        by_channel: dict[int, list[int]] = defaultdict(list)
+        for e in entries:
+            if not e.deleted:
+                e.deleted = True
+                by_channel[e.channel_id].append(e.message_id)
+        for channel_id, ids in by_channel.items():
+            ch = guild.get_channel_or_thread(channel_id)
+            if not isinstance(ch, (discord.TextChannel, discord.Thread, discord.VoiceChannel)):
+                continue
+            for i in range(0, len(ids), 100):
+                chunk = [discord.Object(id=mid) for mid in ids[i:i + 100]]
+                try:
+                    await ch.delete_messages(chunk, reason="AntiSpam: mensajes duplicados en varios canales")
+                except (discord.Forbidden, discord.NotFound):
+                    pass
+                except discord.HTTPException as e:
+                    print(f"[antispam] delete error: {type(e).__name__}: {e}")
+
+    async def _notify_staff(self, guild: discord.Guild, cluster: _Cluster, sample: str):
+        if not STAFF_CHANNEL_ID:
+            return
+        authors = ", ".join(f"<@{a}>" for a in list(cluster.authors)[:15])
+        summary = (
+            f"**{len(cluster.entries)}** mensajes casi idénticos de **{len(cluster.authors)}** cuentas "
+            f"en **{len(cluster.channels)}** canales (ventana {int(WINDOW_SEC)} s). Se borraron."
+        )
+        notifier = self.bot.get_cog("Notifier")
+        if notifier is not None:
+            # alerta con prisa: sale al instante, sin esperar al digest
+            notifier.post(
+                STAFF_CHANNEL_ID, f"{summary}\nAutores: {authors or '—'}",
+                title="🚨 Spam duplicado detectado", color=0xED4245,
+                note=f"```{sample[:300]}```", urgent=True,
+            )
+            return
+        ch = guild.get_channel(STAFF_CHANNEL_ID)
+        if not isinstance(ch, discord.TextChannel):
+            return
+        embed = discord.Embed(title="🚨 Spam duplicado detectado", description=summary, color=0xED4245)
+        embed.add_field(name="Autores", value=authors or "—", inline=False)
+        embed.add_field(name="Muestra", value=f"```{sample[:300]}```", inline=False)
+        try:
+            await ch.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+        except discord.HTTPException:
+            pass
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if not ANTISPAM_ENABLED or message.author.bot or not message.guild:
+            return
+        if not message.content or self._is_exempt(message.author):  # type: ignore[arg-type]
+            return
+
+        norm = normalize_text(message.content)
+        if len(norm) < MIN_LENGTH:
+            return
+
+        entry = _Entry(self.hasher.signature(norm), time.monotonic(), message.author.id, message.channel.id, message.id)
+        cluster = self.index.add(entry)
+
+        if cluster.flagged:
+            # el cluster ya fue marcado: borrar lo nuevo en cuanto llega
+            await self._purge(message.guild, [entry])
+            return
+
+        if len(cluster.authors) >= MIN_AUTHORS and len(cluster.channels) >= MIN_CHANNELS:
+            cluster.flagged = True
+            await self._purge(message.guild, cluster.entries)
+            await self._notify_staff(message.guild, cluster, message.content)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(AntiSpam(bot))
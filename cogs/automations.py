@@ -2,6 +2,8 @@
 import os
 import json
 import re
+import asyncio
+from functools import lru_cache
 import discord
 
 CONFIG_PATH = "data/config.json"
@@ -13,7 +15,7 @@ def load_cfg():
             return json.load(f)
     except Exception:
         return {}
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 def get_int_id(name: str, default=None):
     val = os.getenv(name)
@@ -43,6 +45,24 @@ BOOST_PERK_ROLE_IDS = set(CFG.get("boost_perk_role_ids", []) or get_list_ids("BO
 STAFF_CHANNEL_ID = CFG.get("staff_channel_id") or get_int_id("STAFF_CHANNEL_ID", 0)
 GENERAL_CHANNEL_ID = CFG.get("general_channel_id") or get_int_id("GENERAL_CHANNEL_ID", 0)
 
+# --- Reconciliación de perks de boost ---
+BOOST_RECONCILE_HOURS = float(CFG.get("boost_reconcile_hours", get_int_id("BOOST_RECONCILE_HOURS", 6)))
+BOOST_RECONCILE_DELAY = float(CFG.get("boost_reconcile_delay_sec", 1.0))  # pausa entre ediciones de roles
+BOOST_RECONCILE_SELFROLES = bool(CFG.get("boost_reconcile_selfroles", True))
+
+
+def boost_only_role_ids(cfg: dict) -> set[int]:
+    """Roles que solo puede conservar un booster: perks + (opcional) colores/iconos de selfroles."""
+    ids = set(BOOST_PERK_ROLE_IDS)
+    if BOOST_RECONCILE_SELFROLES:
+        ids.update(int(x) for x in cfg.get("color_role_ids", []) or [])
+        ids.update(int(x) for x in cfg.get("icon_role_ids", []) or [])
+        for kind in ("colors", "icons"):
+            for group in (cfg.get("selfroles_groups", {}) or {}).get(kind, []) or []:
+                ids.update(int(x) for x in group.get("role_ids", []) or [])
+    ids.discard(BOOSTER_ROLE_ID)
+    return ids
+
 # Emojis list
 try:
     PRESENTATION_REACT_EMOJIS = CFG.get("presentation_react_emojis") or json.loads(os.getenv("PRESENTATION_REACT_EMOJIS") or '["❤️","❌"]')
@@ -51,9 +71,129 @@ except Exception:
 
 TRIGGER_PHRASES = {"down", "server en decadencia"}
 
+BOOST_BENEFITS = (
+    "Estos son algunos beneficios:\n"
+    "• Rol especial y color personalizado\n"
+    "• Acceso a canales y stickers exclusivos\n"
+    "• Mayores límites de subida en el servidor\n"
+    "• Prioridad en solicitudes y soporte\n"
+)
+
+# --- Filtro de links ---
+LINK_FILTER_ENABLED = bool(CFG.get("link_filter_enabled", get_int_id("LINK_FILTER_ENABLED", 1)))
+LINK_BLOCKED_DOMAINS = CFG.get("link_blocked_domains") or []
+LINK_ALLOWED_DOMAINS = CFG.get("link_allowed_domains") or []
+LINK_VERDICT_CACHE_SIZE = int(CFG.get("link_verdict_cache_size", 4096))
+
+# Un solo patrón: esquema opcional, credenciales opcionales y el host (acepta IDN).
+# El host termina en cualquier carácter que no pueda formar parte de él, así
+# `discord-gift.com,`, `**discord-gift.com**` o `||discord-gift.com||` también cuentan.
+# `_` no es válido en un host: se excluye para que `__dominio__` (cursiva) no lo oculte.
+# El lookbehind evita reintentar desde cada letra de una palabra larga (O(n²)).
+_HOST_CHAR = r"(?:[^\W_]|-)"
+URL_RX = re.compile(
+    rf"(?<![^\W_])(?<!-)(?:https?://)?(?:[^\s/@:<>]+@)?((?:{_HOST_CHAR}+\.)+{_HOST_CHAR}{{2,}})\.?(?!{_HOST_CHAR})", re.I
+)
+
+BLOCK = "block"
+ALLOW = "allow"
+
+
+def normalize_domain(host: str) -> str:
+    """Minúsculas, sin punto final ni `www.`, y en punycode (xn--) para que los IDN coincidan."""
+    host = host.strip().strip(".").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        return host.encode("idna").decode("ascii")
+    except UnicodeError:
+        return host
+
+
+class DomainTrie:
+    """
+    Trie por etiquetas invertidas (`com` → `example` → `sub`).
+    Una entrada cubre el dominio y todos sus subdominios; gana la más específica,
+    así `allow: safe.example.com` puede convivir con `block: example.com`.
+    """
+    _VERDICT = ""
+
+    def __init__(self):
+        self.root: dict = {}
+
+    def add(self, domain: str, verdict: str):
+        node = self.root
+        for label in reversed(normalize_domain(domain).split(".")):
+            if label:
+                node = node.setdefault(label, {})
+        node[self._VERDICT] = verdict
+
+    def lookup(self, host: str) -> str | None:
+        node = self.root
+        verdict = None
+        for label in reversed(host.split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            verdict = node.get(self._VERDICT, verdict)
+        return verdict
+
+
+class LinkFilter:
+    def __init__(self, blocked, allowed, cache_size: int = 4096):
+        self.trie = DomainTrie()
+        for d in blocked:
+            self.trie.add(str(d), BLOCK)
+        for d in allowed:
+            self.trie.add(str(d), ALLOW)
+        self.verdict = lru_cache(maxsize=cache_size)(self._verdict)
+
+    def _verdict(self, raw_host: str) -> str | None:
+        return self.trie.lookup(normalize_domain(raw_host))
+
+    def blocked_domain(self, text: str) -> str | None:
+        """Devuelve el primer dominio bloqueado que aparezca en el texto (o None)."""
+        for m in URL_RX.finditer(text):
+            host = m.group(1)
+            if self.verdict(host) == BLOCK:
+                return normalize_domain(host)
+        return None
+
 class Automations(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.link_filter = LinkFilter(LINK_BLOCKED_DOMAINS, LINK_ALLOWED_DOMAINS, LINK_VERDICT_CACHE_SIZE)
+        self._reconcile_lock = asyncio.Lock()
+        self.boost_reconcile.change_interval(hours=max(BOOST_RECONCILE_HOURS, 0.25))
+
+    def _notify(self, channel_id: int, line: str, **kwargs) -> bool:
+        """Encola en el Notifier (digest). False si no está cargado y hay que enviar directo."""
+        notifier = self.bot.get_cog("Notifier")
+        if notifier is None:
+            return False
+        notifier.post(channel_id, line, **kwargs)
+        return True
+
+    async def _handle_blocked_link(self, message: discord.Message, domain: str) -> bool:
+        """Borra el mensaje con link bloqueado y avisa a staff. True si se borró."""
+        try:
+            await message.delete()
+        except (discord.Forbidden, discord.NotFound):
+            return False
+        try:
+            await message.channel.send(
+                f"🚫 {message.author.mention}, ese link no está permitido aquí.",
+                delete_after=10,
+            )
+        except discord.HTTPException:
+            pass
+        if STAFF_CHANNEL_ID:
+            line = f"🔗 Link bloqueado (`{domain}`) de {message.author.mention} en {message.channel.mention}."
+            if not self._notify(STAFF_CHANNEL_ID, line, title="Links bloqueados", color=0xED4245, urgent=True):
+                ch = message.guild.get_channel(STAFF_CHANNEL_ID)
+                if isinstance(ch, discord.TextChannel):
+                    await ch.send(line, allowed_mentions=discord.AllowedMentions.none())
+        return True
 
     async def _safe_add_reaction(self, message: discord.Message, em: str) -> bool:
         try:
@@ -73,6 +213,14 @@ class Automations(commands.Cog):
         if message.author.bot or not message.guild:
             return
 
+        # Filtro de links (antes que todo lo demás: el mensaje puede desaparecer)
+        if LINK_FILTER_ENABLED and self.link_filter.trie.root and "." in message.content:
+            perms = getattr(message.author, "guild_permissions", None)
+            if not (perms and perms.manage_messages):
+                domain = self.link_filter.blocked_domain(message.content)
+                if domain and await self._handle_blocked_link(message, domain):
+                    return
+
         content = message.content.strip().lower()
 
         # Handler "Down"
@@ -106,48 +254,137 @@ class Automations(commands.Cog):
             pass
 
     # --- Boost Add / Loss ---
-    @commands.Cog.listener()
-    async def on_member_update(self, before: discord.Member, after: discord.Member):
-        if before.guild != after.guild:
+    async def cog_load(self):
+        events = self.bot.get_cog("RoleEvents")
+        if events is None:
+            print("[automations] RoleEvents no cargado: sin avisos de boost.")
+        else:
+            events.subscribe(BOOSTER_ROLE_ID, gained=self.on_boost_gained, lost=self.on_boost_lost)
+        if BOOSTER_ROLE_ID and BOOST_RECONCILE_HOURS > 0:
+            self.boost_reconcile.start()
+
+    async def cog_unload(self):
+        self.boost_reconcile.cancel()
+        events = self.bot.get_cog("RoleEvents")
+        if events is not None:
+            events.unsubscribe_owner(self)
+
+    async def on_boost_lost(self, member: discord.Member, role_id: int):
+        """Boost perdido → quitar perks + avisar staff."""
+        to_remove = [member.guild.get_role(rid) for rid in boost_only_role_ids(load_cfg())]
+        to_remove = [r for r in to_remove if r and r in member.roles]
+        if to_remove:
+            try:
+                await member.remove_roles(*to_remove, reason="Perdió Nitro Boost")
+            except discord.Forbidden:
+                pass
+        if STAFF_CHANNEL_ID:
+            line = f"⚠️ {member.mention} perdió el rol de **Server Booster**. Se retiraron perks."
+            if not self._notify(STAFF_CHANNEL_ID, line, title="Boosts perdidos", color=0xF47FFF):
+                ch = member.guild.get_channel(STAFF_CHANNEL_ID)
+                if isinstance(ch, discord.TextChannel):
+                    await ch.send(line)
+
+    async def on_boost_gained(self, member: discord.Member, role_id: int):
+        """Boost ganado → mensaje en general con beneficios (agrupado si llegan varios)."""
+        if not GENERAL_CHANNEL_ID:
             return
+        if self._notify(
+            GENERAL_CHANNEL_ID,
+            f"💜 {member.mention}",
+            title="¡Gracias por tu Boost! 💜",
+            color=0xF47FFF,
+            note=BOOST_BENEFITS,
+            ping=member.mention,
+        ):
+            return
+        ch = member.guild.get_channel(GENERAL_CHANNEL_ID)
+        if isinstance(ch, discord.TextChannel):
+            embed = discord.Embed(title="¡Gracias por tu Boost! 💜", description=BOOST_BENEFITS)
+            embed.set_footer(text="Configura el texto desde el código si deseas.")
+            await ch.send(content=member.mention, embed=embed)
 
-        b_roles = {r.id for r in before.roles}
-        a_roles = {r.id for r in after.roles}
+    # --- Reconciliación (arranque + cada BOOST_RECONCILE_HOURS) ---
+    def find_stale_perks(self, guild: discord.Guild) -> dict[discord.Member, list[discord.Role]]:
+        """Miembros que conservan roles de boost sin ser boosters (sobre la caché de miembros)."""
+        perk_ids = boost_only_role_ids(load_cfg())
+        perk_roles = {rid: guild.get_role(rid) for rid in perk_ids}
+        perk_roles = {rid: r for rid, r in perk_roles.items() if r is not None and not r.managed}
+        if not perk_roles:
+            return {}
 
-        if BOOSTER_ROLE_ID:
-            lost = BOOSTER_ROLE_ID in b_roles and BOOSTER_ROLE_ID not in a_roles
-            gained = BOOSTER_ROLE_ID not in b_roles and BOOSTER_ROLE_ID in a_roles
+        booster_role = guild.get_role(BOOSTER_ROLE_ID)
+        boosters = {m.id for m in booster_role.members} if booster_role else set()
+        boosters.update(m.id for m in guild.premium_subscribers)
 
-            # Boost perdido → quitar perks + avisar staff
-            if lost:
-                to_remove = [after.guild.get_role(rid) for rid in BOOST_PERK_ROLE_IDS]
-                to_remove = [r for r in to_remove if r and r in after.roles]
-                if to_remove:
-                    try:
-                        await after.remove_roles(*to_remove, reason="Perdió Nitro Boost")
-                    except discord.Forbidden:
-                        pass
-                if STAFF_CHANNEL_ID:
-                    ch = after.guild.get_channel(STAFF_CHANNEL_ID)
-                    if isinstance(ch, discord.TextChannel):
-                        await ch.send(f"⚠️ {after.mention} perdió el rol de **Server Booster**. Se retiraron perks.")
-
-            # Boost ganado → mensaje en general con beneficios
-            if gained and GENERAL_CHANNEL_ID:
-                ch = after.guild.get_channel(GENERAL_CHANNEL_ID)
-                if isinstance(ch, discord.TextChannel):
-                    embed = discord.Embed(
-                        title="¡Gracias por tu Boost! 💜",
-                        description=(
-                            "Estos son algunos beneficios:\n"
-                            "• Rol especial y color personalizado\n"
-                            "• Acceso a canales y stickers exclusivos\n"
-                            "• Mayores límites de subida en el servidor\n"
-                            "• Prioridad en solicitudes y soporte\n"
-                        )
-                    )
-                    embed.set_footer(text="Configura el texto desde el código si deseas.")
-                    await ch.send(content=after.mention, embed=embed)
+        perk_set = frozenset(perk_roles)
+        stale: dict[discord.Member, list[discord.Role]] = {}
+        for member in guild.members:
+            if member.bot or member.id in boosters:
+                continue
+            held = perk_set.intersection(r.id for r in member.roles)
+            if held:
+                stale[member] = [perk_roles[rid] for rid in held]
+        return stale
+
+    async def reconcile_guild(self, guild: discord.Guild) -> tuple[int, int]:
+        """Quita perks obsoletos en cola, una edición por miembro y con pausa entre ellas."""
+        stale = self.find_stale_perks(guild)
+        if not stale:
+            return 0, 0
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for member, roles in stale.items():
+            queue.put_nowait((member, roles, 0))
+
+        fixed, failed = [], 0
+        while not queue.empty():
+            member, roles, attempt = queue.get_nowait()
+            try:
+                # atomic=False → un solo PATCH con la lista final de roles
+                await member.remove_roles(*roles, reason="Reconciliación: sin Nitro Boost", atomic=False)
+                fixed.append((member, roles))
+            except discord.Forbidden:
+                failed += 1
+            except discord.HTTPException as e:
+                if e.status == 429 and attempt < 3:
+                    # discord.py ya reintenta; si aun así llega el 429, esperar y reencolar al final
+                    retry = float(e.response.headers.get("Retry-After") or 5)
+                    await asyncio.sleep(retry)
+                    queue.put_nowait((member, roles, attempt + 1))
+                    continue
+                failed += 1
+            await asyncio.sleep(BOOST_RECONCILE_DELAY)
+
+        if STAFF_CHANNEL_ID and (fixed or failed):
+            ch = guild.get_channel(STAFF_CHANNEL_ID)
+            if isinstance(ch, discord.TextChannel):
+                lines = [f"• {m.mention}: {', '.join(r.name for r in rs)}" for m, rs in fixed[:20]]
+                if len(fixed) > 20:
+                    lines.append(f"… y {len(fixed) - 20} más")
+                embed = discord.Embed(
+                    title="🔄 Reconciliación de perks de boost",
+                    description="\n".join(lines) or "Sin cambios.",
+                    color=0xF47FFF,
+                )
+                embed.set_footer(text=f"Corregidos: {len(fixed)} · Fallidos: {failed}")
+                await ch.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+        return len(fixed), failed
+
+    @tasks.loop(hours=6)
+    async def boost_reconcile(self):
+        async with self._reconcile_lock:
+            for guild in self.bot.guilds:
+                try:
+                    fixed, failed = await self.reconcile_guild(guild)
+                    if fixed or failed:
+                        print(f"[automations] Reconciliación en {guild.name}: {fixed} corregidos, {failed} fallidos")
+                except Exception as e:
+                    print(f"[automations] Reconciliación falló en {guild.name}: {type(e).__name__}: {e}")
+
+    @boost_reconcile.before_loop
+    async def _before_boost_reconcile(self):
+        await self.bot.wait_until_ready()
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Automations(bot))
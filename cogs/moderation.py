@@ -37,6 +37,14 @@ class Moderation(commands.Cog):
     group = app_commands.Group(name="mod", description="Comandos de moderación rápida")
 
     # ------------------- shared logic -------------------
+    async def _announce(self, channel: discord.TextChannel, embed: discord.Embed):
+        """Cartel público vía Notifier (urgente: sale ya, sin bloquear la interacción); si no, directo."""
+        notifier = self.bot.get_cog("Notifier")
+        if notifier is None:
+            await channel.send(embed=embed)
+            return
+        notifier.post_embed(channel.id, embed, urgent=True)
+
     async def _clear_impl(self, interaction: discord.Interaction, cantidad: int, motivo: str, moderator: discord.Member):
         channel = interaction.channel
         guild = interaction.guild
@@ -65,7 +73,7 @@ class Moderation(commands.Cog):
         embed.add_field(name="Moderador", value=moderator.mention, inline=True)
         embed.add_field(name="Motivo", value=motivo or "—", inline=False)
         embed.set_footer(text=f"Canal: #{channel.name}")
-        await channel.send(embed=embed)
+        await self._announce(channel, embed)
 
         await interaction.followup.send(f"Listo: borrados **{deleted_total}** mensajes.", ephemeral=True)
 
@@ -94,7 +102,7 @@ class Moderation(commands.Cog):
             embed.add_field(name="Usuario", value=f"{objetivo.mention} (`{objetivo.id}`)", inline=False)
             embed.add_field(name="Moderador", value=moderator.mention, inline=True)
             embed.add_field(name="Motivo", value=motivo or "—", inline=False)
-            await channel.send(embed=embed)
+            await self._announce(channel, embed)
 
             await interaction.followup.send("Expulsado.", ephemeral=True)
         except discord.Forbidden:
@@ -125,7 +133,7 @@ class Moderation(commands.Cog):
             embed.add_field(name="Usuario", value=f"{objetivo.mention} (`{objetivo.id}`)", inline=False)
             embed.add_field(name="Moderador", value=moderator.mention, inline=True)
             embed.add_field(name="Motivo", value=motivo or "—", inline=False)
-            await channel.send(embed=embed)
+            await self._announce(channel, embed)
 
             await interaction.followup.send("Baneado.", ephemeral=True)
         except discord.Forbidden:
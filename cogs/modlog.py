@@ -0,0 +1,206 @@
+import json
+import asyncio
+from collections import OrderedDict, deque
+from datetime import datetime
+import discord
+from discord.ext import commands
+
+CONFIG_PATH = "data/config.json"
+
+def load_cfg():
+    try:
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+CFG = load_cfg()
+MODLOG_CHANNEL_ID = int(CFG.get("modlog_channel_id") or CFG.get("staff_channel_id") or 0)
+PER_CHANNEL = int(CFG.get("modlog_per_channel", 100))
+MAX_CHANNELS = int(CFG.get("modlog_max_channels", 100))    # anillos vivos a la vez (LRU)
+# tope global, igual que la caché de 1000 mensajes que reemplaza: peor caso
+# MAX_SNAPSHOTS × ~1.2 KB (texto ≤ MAX_CONTENT + metadatos) ≈ 1.2 MB
+MAX_SNAPSHOTS = int(CFG.get("modlog_max_snapshots", 1000))
+MAX_CONTENT = 1000
+# vacío = todos los canales de texto; si hay lista, solo esos
+INCLUDED_CHANNEL_IDS = {int(x) for x in CFG.get("modlog_channel_ids", [])}
+IGNORED_CHANNEL_IDS = {int(x) for x in CFG.get("modlog_ignored_channel_ids", [])}
+
+
+class Snapshot:
+    __slots__ = ("message_id", "channel_id", "author_id", "author_name", "content", "attachments", "created_at", "edited_at")
+
+    def __init__(self, message: discord.Message):
+        self.message_id = message.id
+        self.channel_id = message.channel.id
+        self.author_id = message.author.id
+        self.author_name = str(message.author)
+        self.content = message.content[:MAX_CONTENT]
+        self.attachments = tuple(a.url for a in message.attachments)
+        self.created_at = message.created_at
+        self.edited_at: datetime | None = message.edited_at
+
+
+class ChannelRing:
+    """Últimos N mensajes de un canal + índice por ID para buscar en O(1)."""
+    __slots__ = ("ring", "by_id")
+
+    def __init__(self, capacity: int):
+        self.ring: deque[Snapshot] = deque(maxlen=capacity)
+        self.by_id: dict[int, Snapshot] = {}
+
+    def push(self, snap: Snapshot) -> bool:
+        """True si el anillo creció (no desplazó a otro snapshot)."""
+        full = len(self.ring) == self.ring.maxlen
+        if full:
+            self.drop_oldest()
+        self.ring.append(snap)
+        self.by_id[snap.message_id] = snap
+        return not full
+
+    def drop_oldest(self):
+        old = self.ring.popleft()
+        self.by_id.pop(old.message_id, None)
+
+    def pop(self, message_id: int) -> Snapshot | None:
+        # se deja en el deque (sale solo por capacidad); solo se olvida del índice
+        return self.by_id.pop(message_id, None)
+
+    def get(self, message_id: int) -> Snapshot | None:
+        return self.by_id.get(message_id)
+
+
+class ModLog(commands.Cog):
+    """Log de mensajes borrados/editados a partir de snapshots propios (no de la caché global)."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        # LRU: el canal/hilo con mensaje más reciente va al final; se desaloja por el principio
+        self.rings: OrderedDict[int, ChannelRing] = OrderedDict()
+        self.snapshots = 0  # suma de len(ring.ring) de todos los anillos
+        self._tasks: set[asyncio.Task] = set()
+
+    async def cog_unload(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _tracked(self, channel_id: int, parent_id: int | None = None) -> bool:
+        if channel_id in IGNORED_CHANNEL_IDS or channel_id == MODLOG_CHANNEL_ID:
+            return False
+        if not INCLUDED_CHANNEL_IDS:
+            return True
+        return channel_id in INCLUDED_CHANNEL_IDS or (parent_id in INCLUDED_CHANNEL_IDS)
+
+    def _log(self, line: str, title: str, color: int):
+        if not MODLOG_CHANNEL_ID:
+            return
+        notifier = self.bot.get_cog("Notifier")
+        if notifier is not None:
+            notifier.post(MODLOG_CHANNEL_ID, line, title=title, color=color)
+            return
+        ch = self.bot.get_channel(MODLOG_CHANNEL_ID)
+        if isinstance(ch, discord.TextChannel):
+            embed = discord.Embed(title=title, description=line[:4000], color=color)
+            task = asyncio.create_task(ch.send(embed=embed, allowed_mentions=discord.AllowedMentions.none()))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    def _describe(snap: Snapshot) -> str:
+        text = discord.utils.escape_markdown(snap.content) if snap.content else "*(sin texto)*"
+        if snap.attachments:
+            text += "\n" + "\n".join(f"📎 {url}" for url in snap.attachments)
+        return text
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.author.bot or not message.guild:
+            return
+        parent_id = getattr(message.channel, "parent_id", None)
+        if not self._tracked(message.channel.id, parent_id):
+            return
+        ring = self.rings.get(message.channel.id)
+        if ring is None:
+            ring = self.rings[message.channel.id] = ChannelRing(PER_CHANNEL)
+            while len(self.rings) > MAX_CHANNELS:
+                self._drop_ring(next(iter(self.rings)))
+        else:
+            self.rings.move_to_end(message.channel.id)
+        if ring.push(Snapshot(message)):
+            self.snapshots += 1
+        # por encima del tope global se recorta por lo más viejo del canal menos activo
+        while self.snapshots > MAX_SNAPSHOTS:
+            cid, coldest = next(iter(self.rings.items()))
+            coldest.drop_oldest()
+            self.snapshots -= 1
+            if not coldest.ring:
+                del self.rings[cid]
+
+    def _drop_ring(self, channel_id: int):
+        ring = self.rings.pop(channel_id, None)
+        if ring is not None:
+            self.snapshots -= len(ring.ring)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        ring = self.rings.get(payload.channel_id)
+        snap = ring.pop(payload.message_id) if ring else None
+        if snap is None:
+            return
+        self._log(
+            f"🗑️ <@{snap.author_id}> (`{snap.author_name}`) en <#{snap.channel_id}> "
+            f"· {discord.utils.format_dt(snap.created_at, 'R')}\n{self._describe(snap)}",
+            title="Mensajes borrados",
+            color=0xED4245,
+        )
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        ring = self.rings.get(payload.channel_id)
+        if not ring:
+            return
+        snaps = [s for s in (ring.pop(mid) for mid in payload.message_ids) if s]
+        for snap in sorted(snaps, key=lambda s: s.created_at):
+            self._log(
+                f"🧹 <@{snap.author_id}> en <#{snap.channel_id}>: {self._describe(snap)[:500]}",
+                title="Borrado masivo",
+                color=0xED4245,
+            )
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        ring = self.rings.get(payload.channel_id)
+        snap = ring.get(payload.message_id) if ring else None
+        if snap is None:
+            return
+        new_content = payload.data.get("content")
+        if new_content is None or new_content[:MAX_CONTENT] == snap.content:
+            return  # embeds resueltos, pins, etc.
+        before = self._describe(snap)
+        snap.content = new_content[:MAX_CONTENT]
+        snap.edited_at = discord.utils.utcnow()
+        self._log(
+            f"✏️ <@{snap.author_id}> en <#{snap.channel_id}> · "
+            f"[ir al mensaje](https://discord.com/channels/{payload.guild_id}/{snap.channel_id}/{snap.message_id})\n"
+            f"**Antes:** {before[:900]}\n**Después:** {discord.utils.escape_markdown(snap.content)[:900]}",
+            title="Mensajes editados",
+            color=0xFEE75C,
+        )
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        self._drop_ring(channel.id)
+
+    # los hilos no disparan on_guild_channel_delete
+    @commands.Cog.listener()
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent):
+        self._drop_ring(payload.thread_id)
+
+    @commands.Cog.listener()
+    async def on_thread_update(self, before: discord.Thread, after: discord.Thread):
+        if after.archived and not before.archived:
+            self._drop_ring(after.id)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(ModLog(bot))
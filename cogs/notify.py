@@ -0,0 +1,171 @@
+import os
+import json
+import asyncio
+import discord
+from discord.ext import commands, tasks
+
+CONFIG_PATH = "data/config.json"
+
+def load_cfg():
+    try:
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def env_float(name, default=0.0):
+    try:
+        return float(os.getenv(name) or default)
+    except Exception:
+        return default
+
+CFG = load_cfg()
+FLUSH_SEC = float(CFG.get("notify_flush_sec", env_float("NOTIFY_FLUSH_SEC", 5)))
+MAX_LINES = int(CFG.get("notify_max_lines", 15))
+MAX_CHARS = 3800  # margen bajo el límite de 4096 de la descripción de un embed
+MAX_EMBEDS = 10   # embeds por mensaje que acepta Discord
+
+DEFAULT_COLOR = 0x5865F2
+
+
+class _Digest:
+    __slots__ = ("title", "color", "note", "lines", "pings", "chars")
+
+    def __init__(self, title: str, color: int, note: str | None):
+        self.title = title
+        self.color = color
+        self.note = note
+        self.lines: list[str] = []
+        self.pings: list[str] = []
+        self.chars = 0
+
+
+class Notifier(commands.Cog):
+    """
+    Buffer de avisos por canal destino (staff, logs de tickets, moderación…).
+    Las líneas con el mismo (canal, título) se agrupan en un solo embed que se
+    envía cada FLUSH_SEC segundos o al llegar a MAX_LINES; `urgent=True` lo
+    salta y envía al instante. Los embeds ya armados (carteles de moderación)
+    van con `post_embed` y se juntan hasta MAX_EMBEDS por mensaje.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._pending: dict[tuple[int, str], _Digest] = {}
+        self._embeds: dict[int, list[discord.Embed]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def cog_load(self):
+        self.flusher.change_interval(seconds=max(FLUSH_SEC, 1))
+        self.flusher.start()
+
+    async def cog_unload(self):
+        self.flusher.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.flush_all()
+
+    def post(
+        self,
+        channel_id: int,
+        line: str,
+        *,
+        title: str = "Registro",
+        color: int = DEFAULT_COLOR,
+        note: str | None = None,
+        ping: str | None = None,
+        urgent: bool = False,
+    ):
+        """Encola una línea (no bloquea). `ping` se manda como contenido para que notifique."""
+        if not channel_id:
+            return
+        key = (int(channel_id), title)
+        digest = self._pending.get(key)
+        if digest is None:
+            digest = self._pending[key] = _Digest(title, color, note)
+        digest.lines.append(line)
+        digest.chars += len(line) + 1
+        if ping:
+            digest.pings.append(ping)
+
+        if urgent or len(digest.lines) >= MAX_LINES or digest.chars >= MAX_CHARS:
+            self._pending.pop(key, None)
+            self._spawn(self._send(key[0], digest))
+
+    def post_embed(self, channel_id: int, embed: discord.Embed, *, urgent: bool = False):
+        """Encola un embed completo (campos, pie…); se envía junto a los demás del mismo canal."""
+        if not channel_id:
+            return
+        embeds = self._embeds.setdefault(int(channel_id), [])
+        embeds.append(embed)
+        if urgent or len(embeds) >= MAX_EMBEDS:
+            self._spawn(self._send_embeds(int(channel_id), self._embeds.pop(int(channel_id))))
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)  # referencia fuerte hasta que termine
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send_embeds(self, channel_id: int, embeds: list[discord.Embed]):
+        ch = self.bot.get_channel(channel_id)
+        if not isinstance(ch, (discord.TextChannel, discord.Thread)):
+            return
+        for i in range(0, len(embeds), MAX_EMBEDS):
+            try:
+                await ch.send(embeds=embeds[i:i + MAX_EMBEDS], allowed_mentions=discord.AllowedMentions.none())
+            except discord.HTTPException as e:
+                print(f"[notify] send error en {channel_id}: {type(e).__name__}: {e}")
+
+    async def _send(self, channel_id: int, digest: _Digest):
+        ch = self.bot.get_channel(channel_id)
+        if not isinstance(ch, (discord.TextChannel, discord.Thread)):
+            return
+        # partir en trozos por si una línea larga pasó el límite
+        chunks, cur, size = [], [], 0
+        for line in digest.lines:
+            if cur and size + len(line) + 1 > MAX_CHARS:
+                chunks.append(cur)
+                cur, size = [], 0
+            cur.append(line[:MAX_CHARS])
+            size += len(line) + 1
+        if cur:
+            chunks.append(cur)
+
+        content = " ".join(dict.fromkeys(digest.pings))[:2000] or None
+        for i, lines in enumerate(chunks):
+            embed = discord.Embed(title=digest.title, description="\n".join(lines), color=digest.color)
+            if digest.note:
+                embed.add_field(name="\u200b", value=digest.note[:1024], inline=False)
+            if len(digest.lines) > 1:
+                embed.set_footer(text=f"{len(digest.lines)} avisos")
+            try:
+                await ch.send(
+                    content=content if i == 0 else None,
+                    embed=embed,
+                    allowed_mentions=discord.AllowedMentions(users=True, roles=False, everyone=False),
+                )
+            except discord.HTTPException as e:
+                print(f"[notify] send error en {channel_id}: {type(e).__name__}: {e}")
+
+    async def flush_all(self):
+        async with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            embeds, self._embeds = self._embeds, {}
+            for (channel_id, _), digest in pending.items():
+                await self._send(channel_id, digest)
+            for channel_id, items in embeds.items():
+                await self._send_embeds(channel_id, items)
+
+    @tasks.loop(seconds=5)
+    async def flusher(self):
+        if self._pending or self._embeds:
+            await self.flush_all()
+
+    @flusher.before_loop
+    async def _before_flusher(self):
+        await self.bot.wait_until_ready()
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Notifier(bot))
@@ -0,0 +1,74 @@
+from collections import defaultdict
+from typing import Awaitable, Callable
+import discord
+from discord.ext import commands
+
+# handler(member_after, role_id)
+RoleHandler = Callable[[discord.Member, int], Awaitable[None]]
+
+
+def _raw_role_ids(member: discord.Member):
+    # `Member._roles` es el array de IDs que discord.py ya guarda (sin construir ni ordenar
+    # objetos Role como hace `member.roles`). Es privado: requirements.txt fija
+    # discord.py==2.6.4; si una versión lo quita se cae al camino público.
+    ids = getattr(member, "_roles", None)
+    return ids if ids is not None else [r.id for r in member.roles]
+
+
+class RoleEvents(commands.Cog):
+    """
+    Un solo listener de `on_member_update` para todo el bot: calcula el diff de
+    roles una vez y lo reparte a los handlers suscritos a esos IDs concretos.
+    Los demás cogs se suscriben en `cog_load` con `subscribe(...)`.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._gained: dict[int, list[RoleHandler]] = defaultdict(list)
+        self._lost: dict[int, list[RoleHandler]] = defaultdict(list)
+
+    def subscribe(self, role_id: int, *, gained: RoleHandler | None = None, lost: RoleHandler | None = None):
+        if not role_id:
+            return
+        if gained:
+            self._gained[int(role_id)].append(gained)
+        if lost:
+            self._lost[int(role_id)].append(lost)
+
+    def unsubscribe_owner(self, owner: object):
+        """Quita todos los handlers (métodos) cuyo `__self__` sea `owner`."""
+        for index in (self._gained, self._lost):
+            for rid in list(index):
+                index[rid] = [h for h in index[rid] if getattr(h, "__self__", None) is not owner]
+                if not index[rid]:
+                    del index[rid]
+
+    async def _fire(self, handlers: list[RoleHandler], member: discord.Member, role_id: int):
+        for handler in list(handlers):
+            try:
+                await handler(member, role_id)
+            except Exception as e:
+                print(f"[roleevents] handler {getattr(handler, '__qualname__', handler)} falló: {type(e).__name__}: {e}")
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if not (self._gained or self._lost):
+            return
+        b_raw, a_raw = _raw_role_ids(before), _raw_role_ids(after)
+        if len(b_raw) == len(a_raw) and b_raw == a_raw:
+            return  # cambio de apodo, avatar, timeout, etc.
+
+        b_set = set(b_raw)
+        a_set = set(a_raw)
+        for rid in a_set - b_set:
+            handlers = self._gained.get(rid)
+            if handlers:
+                await self._fire(handlers, after, rid)
+        for rid in b_set - a_set:
+            handlers = self._lost.get(rid)
+            if handlers:
+                await self._fire(handlers, after, rid)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(RoleEvents(bot))
@@ -1,10 +1,15 @@
 \
 import os
+import re
 import json
+import math
+import time
+import heapq
 import asyncio
 from datetime import datetime, timedelta
+from collections import deque
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 
 DATA_PATH = "data/tempvoice.json"
@@ -57,12 +62,176 @@ PERSONAL_HUB_ID = int(CFG.get("tempvoice_personal_hub_id", 0))
 PERSONAL_NAME_TEMPLATE = CFG.get("tempvoice_personal_name_template", "[ 👤 ] {username}")
 PERSONAL_DEFAULT_LIMIT = int(CFG.get("tempvoice_personal_default_limit", 0))
 BOOSTER_ROLE_ID = int(CFG.get("booster_role_id") or os.getenv("BOOSTER_ROLE_ID") or 0)
+# Salas DUO precreadas y ocultas por hub (0 = desactivado): al entrar se reclama una en vez de crearla
+POOL_MAX = int(CFG.get("tempvoice_pool_max", env_int("TEMPVOICE_POOL_MAX", 0)))
+POOL_MIN = int(CFG.get("tempvoice_pool_min", env_int("TEMPVOICE_POOL_MIN", 1)))
+POOL_HORIZON_MIN = float(CFG.get("tempvoice_pool_horizon_min", 5))  # cubrir las entradas esperadas en estos minutos
+POOL_NAME = CFG.get("tempvoice_pool_name", "⏳ sala libre")
+POOL_PACE_SEC = 1.5   # pausa entre borrados al vaciar el pool
+# Creación de canales: POST /guilds/{id}/channels comparte bucket en todo el servidor
+CREATE_INTERVAL_SEC = float(CFG.get("tempvoice_create_interval_sec", 1.0))
+CREATE_MAX_INTERVAL_SEC = 10.0
+CREATE_SLOW_SEC = 2.0   # una creación más lenta que esto casi seguro esperó un 429
+JOIN_RATE_ALPHA = 0.3  # peso de cada día nuevo en la media de entradas por hora
+
+
+def _name_pattern(template: str) -> re.Pattern:
+    """Regex del template para recuperar el índice de salas creadas antes de guardarlo en el estado."""
+    body, seen = "", False
+    for p in re.split(r"(\{index\}|\{username\})", template):
+        if p == "{index}":
+            # un grupo con nombre solo puede definirse una vez: las repeticiones lo referencian
+            body += r"(?P=index)" if seen else r"(?P<index>\d+)"
+            seen = True
+        else:
+            body += r".*?" if p == "{username}" else re.escape(p)
+    return re.compile(f"^{body}$")
+
+NAME_PATTERN = _name_pattern(NAME_TEMPLATE)
+
+
+class IndexAllocator:
+    """Números de sala de un hub: da el menor libre (min-heap de huecos) o el siguiente al mayor."""
+    __slots__ = ("used", "free", "top")
+
+    def __init__(self, used=()):
+        self.used = set(used)
+        self.top = max(self.used, default=0)
+        self.free = [i for i in range(1, self.top) if i not in self.used]
+        heapq.heapify(self.free)
+
+    def take(self) -> int:
+        if self.free:
+            idx = heapq.heappop(self.free)
+        else:
+            self.top += 1
+            idx = self.top
+        self.used.add(idx)
+        return idx
+
+    def release(self, idx: int):
+        if idx in self.used:
+            self.used.discard(idx)
+            heapq.heappush(self.free, idx)
+
+
+class CreatePacer:
+    """
+    Serializa las creaciones de canales de un servidor y las espacia. Si una
+    tarda mucho (discord.py se comió un 429) el intervalo se dobla, y vuelve
+    poco a poco al base cuando responden rápido.
+    """
+
+    def __init__(self, interval: float = CREATE_INTERVAL_SEC):
+        self.base = interval
+        self.interval = interval
+        self.lock = asyncio.Lock()
+        self.next_at = 0.0
+        self._started = 0.0
+
+    async def __aenter__(self):
+        await self.lock.acquire()
+        delay = self.next_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._started = time.monotonic()
+        return self
+
+    async def __aexit__(self, *exc):
+        took = time.monotonic() - self._started
+        if took > CREATE_SLOW_SEC:
+            self.interval = min(max(self.interval, 0.5) * 2, CREATE_MAX_INTERVAL_SEC)
+        else:
+            self.interval = max(self.base, self.interval * 0.75)
+        self.next_at = time.monotonic() + self.interval
+        self.lock.release()
+        return False
+
+
+class DeadlineHeap:
+    """
+    Plazos de borrado por canal en un min-heap. Programar es O(log n); cancelar
+    o reprogramar solo toca el dict (las entradas viejas del heap se descartan al
+    llegar arriba). El dict es el del estado, así que se persiste con él.
+    """
+
+    def __init__(self, deadlines: dict):
+        self.deadlines = deadlines  # str(channel_id) -> epoch
+        self._heap = [(at, cid) for cid, at in deadlines.items()]
+        heapq.heapify(self._heap)
+        self._wake = asyncio.Event()
+
+    def __len__(self):
+        return len(self.deadlines)
+
+    def schedule(self, channel_id: int, at: float):
+        key = str(channel_id)
+        self.deadlines[key] = at
+        heapq.heappush(self._heap, (at, key))
+        if len(self._heap) > 2 * len(self.deadlines) + 32:
+            self._heap = [(t, k) for k, t in self.deadlines.items()]
+            heapq.heapify(self._heap)
+        if self._heap[0] == (at, key):
+            self._wake.set()  # es el más próximo: despertar al que espera
+
+    def cancel(self, channel_id: int) -> bool:
+        return self.deadlines.pop(str(channel_id), None) is not None
+
+    def _top(self) -> tuple[float, str] | None:
+        while self._heap:
+            at, key = self._heap[0]
+            if self.deadlines.get(key) == at:
+                return at, key
+            heapq.heappop(self._heap)  # cancelado o reprogramado
+        return None
+
+    def pop_due(self, now: float) -> list[int]:
+        due = []
+        while (top := self._top()) is not None and top[0] <= now:
+            heapq.heappop(self._heap)
+            del self.deadlines[top[1]]
+            due.append(int(top[1]))
+        return due
+
+    async def next_due(self) -> list[int]:
+        """Espera hasta que venza algún plazo y devuelve esos canales."""
+        while True:
+            self._wake.clear()
+            due = self.pop_due(time.time())
+            if due:
+                return due
+            top = self._top()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=None if top is None else top[0] - time.time())
+            except asyncio.TimeoutError:
+                pass
+
+
+class CreateJob:
+    __slots__ = ("member", "hub", "cancelled")
+
+    def __init__(self, member: discord.Member, hub: discord.VoiceChannel):
+        self.member = member
+        self.hub = hub
+        self.cancelled = False
+
 
 class TempVoice(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.state = load_state()
-        self.cleanup_tasks = {}  # channel_id -> task
+        self.state.setdefault("cleanup", {})     # channel_id -> hora (epoch) de borrado si sigue vacío
+        self.cleanup = DeadlineHeap(self.state["cleanup"])
+        self._cleanup_runner: asyncio.Task | None = None
+        self.allocators: dict[int, IndexAllocator] = {}  # hub_id -> índices DUO en uso
+        self.state.setdefault("spares", {})      # hub_id -> [channel_id] precreadas
+        self.state.setdefault("join_rate", {})   # hub_id -> {hora: entradas/hora (media móvil)}
+        self._joins: dict[int, list] = {}        # hub_id -> [hora actual "YYYY-mm-dd HH", entradas]
+        self.refill_tasks: dict[int, asyncio.Task] = {}
+        self.create_queues: dict[int, deque[CreateJob]] = {}   # hub_id -> entradas esperando sala
+        self.create_workers: dict[int, asyncio.Task] = {}
+        self.pending: dict[tuple[int, int], CreateJob] = {}    # (hub_id, member_id) -> su entrada en cola
+        self.pacers: dict[int, CreatePacer] = {}               # guild_id -> ritmo de creación
 
     # ---------- helpers ----------
     def is_temp(self, channel: discord.VoiceChannel) -> bool:
@@ -88,29 +257,282 @@ class TempVoice(commands.Cog):
         save_state(self.state)
         return self.state["counters"][key]
 
-    def prune_and_count_duo(self, guild: discord.Guild, hub_id: int) -> int:
-        """Elimina entradas obsoletas del estado y devuelve cuántos canales DUO siguen activos para este hub."""
+    def rebuild_allocators(self, guild: discord.Guild):
+        """
+        Quita del estado los canales que ya no existen y crea los índices DUO de los
+        hubs que aún no los tienen. on_ready se repite en cada reconexión: los
+        allocators ya creados se conservan, porque llevan índices tomados que
+        quizá todavía no están guardados en el estado.
+        """
         changed = False
-        count = 0
+        used: dict[int, list[int]] = {}
         for cid, info in list(self.state["channels"].items()):
-            if info.get("hub_id") != hub_id:
+            hub_id = info.get("hub_id")
+            if hub_id is None or guild.get_channel(hub_id) is None:
+                continue  # de otro servidor
+            ch = guild.get_channel(int(cid))
+            if not isinstance(ch, discord.VoiceChannel):
+                # borrada mientras el bot no estaba: también libera su número si el hub ya tiene índices
+                self.forget_channel(int(cid), save=False)
+                changed = True
                 continue
             if info.get("is_personal"):
                 continue
-            ch = guild.get_channel(int(cid))
-            if isinstance(ch, discord.VoiceChannel):
-                count += 1
-            else:
-                self.state["channels"].pop(cid, None)
-                changed = True
+            idx = info.get("index")
+            if idx is None and "index" in NAME_PATTERN.groupindex:
+                m = NAME_PATTERN.match(ch.name)
+                if m:
+                    idx = info["index"] = int(m.group("index"))
+                    changed = True
+            if idx is not None:
+                used.setdefault(hub_id, []).append(idx)
+        for hub_id in {info.get("hub_id") for info in self.state["channels"].values()} | TEMP_HUB_IDS:
+            if hub_id is not None and hub_id not in self.allocators and guild.get_channel(hub_id) is not None:
+                self.allocators[hub_id] = IndexAllocator(used.get(hub_id, ()))
         if changed:
             save_state(self.state)
-        return count
 
     def next_duo_index(self, guild: discord.Guild, hub_id: int) -> int:
-        """El siguiente índice DUO es (#activos + 1). Si no hay activos, empieza en 1."""
-        activos = self.prune_and_count_duo(guild, hub_id)
-        return activos + 1
+        """Menor índice DUO libre del hub (reutiliza huecos: tras borrar "Duo 2" la siguiente es "Duo 2")."""
+        alloc = self.allocators.get(hub_id)
+        if alloc is None:
+            self.rebuild_allocators(guild)
+            alloc = self.allocators.setdefault(hub_id, IndexAllocator())
+        return alloc.take()
+
+    def forget_channel(self, channel_id: int, save: bool = True) -> dict | None:
+        """Saca el canal del estado, libera su índice DUO y su plazo de borrado."""
+        info = self.state["channels"].pop(str(channel_id), None)
+        self.cleanup.cancel(channel_id)
+        if info and info.get("index") is not None:
+            alloc = self.allocators.get(info.get("hub_id"))
+            if alloc is not None:
+                alloc.release(info["index"])
+        if info and save:
+            save_state(self.state)
+        return info
+
+    # ---------- salas precreadas ----------
+    def record_join(self, hub_id: int, count: int = 1):
+        """Cuenta entradas por hora; al cambiar de hora se mezcla en la media de esa hora del día."""
+        key = datetime.now().strftime("%Y-%m-%d %H")
+        cur = self._joins.setdefault(hub_id, [key, 0])
+        if cur[0] != key:
+            hour = cur[0][-2:].lstrip("0") or "0"
+            rates = self.state["join_rate"].setdefault(str(hub_id), {})
+            rates[hour] = round(JOIN_RATE_ALPHA * cur[1] + (1 - JOIN_RATE_ALPHA) * rates.get(hour, cur[1]), 2)
+            cur[0], cur[1] = key, 0
+            save_state(self.state)
+        cur[1] += count
+
+    def pool_target(self, hub_id: int) -> int:
+        """Salas libres a mantener: las entradas esperadas en POOL_HORIZON_MIN según esta hora y la siguiente."""
+        if POOL_MAX <= 0:
+            return 0
+        rates = self.state["join_rate"].get(str(hub_id), {})
+        hour = datetime.now().hour
+        per_hour = max(rates.get(str(hour), 0.0), rates.get(str((hour + 1) % 24), 0.0),
+                       self._joins.get(hub_id, [None, 0])[1])
+        want = math.ceil(per_hour * POOL_HORIZON_MIN / 60)
+        return max(min(POOL_MIN, POOL_MAX), min(POOL_MAX, want))
+
+    @staticmethod
+    def _hidden_overwrites(hub: discord.VoiceChannel) -> dict:
+        return {
+            hub.guild.default_role: discord.PermissionOverwrite(view_channel=False, connect=False),
+            hub.guild.me: discord.PermissionOverwrite(view_channel=True, connect=True),
+        }
+
+    async def claim_spare(self, hub: discord.VoiceChannel, name: str, user_limit: int) -> discord.VoiceChannel | None:
+        """Toma una sala precreada: nombre y permisos del hub en una sola edición. None si no queda ninguna."""
+        spares = self.state["spares"].get(str(hub.id))
+        while spares:
+            ch = hub.guild.get_channel(spares.pop(0))
+            save_state(self.state)
+            if not isinstance(ch, discord.VoiceChannel):
+                continue
+            try:
+                await ch.edit(name=name, overwrites=hub.overwrites, user_limit=user_limit,
+                              reason="Join-to-create (sala precreada)")
+                return ch
+            except discord.HTTPException:
+                # a medio configurar no sirve: fuera
+                try:
+                    await ch.delete(reason="Sala precreada inservible")
+                except discord.HTTPException:
+                    pass
+        return None
+
+    def schedule_refill(self, hub: discord.VoiceChannel):
+        t = self.refill_tasks.get(hub.id)
+        if t is None or t.done():
+            self.refill_tasks[hub.id] = asyncio.create_task(self._refill(hub))
+
+    async def _refill(self, hub: discord.VoiceChannel):
+        spares = self.state["spares"].setdefault(str(hub.id), [])
+        while len(spares) < self.pool_target(hub.id):
+            try:
+                async with self.pacer(hub.guild):
+                    ch = await hub.guild.create_voice_channel(
+                        name=POOL_NAME,
+                        overwrites=self._hidden_overwrites(hub),
+                        category=hub.category,
+                        bitrate=getattr(hub, "bitrate", 64000),
+                        reason="Sala precreada (join-to-create)",
+                    )
+            except discord.HTTPException as e:
+                print(f"[tempvoice] No se pudo precrear sala en {hub.name}: {type(e).__name__}: {e}")
+                return
+            spares.append(ch.id)
+            save_state(self.state)
+        # fuera de hora punta sobran: se borran las más nuevas
+        while len(spares) > self.pool_target(hub.id):
+            ch = hub.guild.get_channel(spares.pop())
+            save_state(self.state)
+            if isinstance(ch, discord.VoiceChannel) and not ch.members:
+                try:
+                    await ch.delete(reason="Sobra sala precreada")
+                except discord.HTTPException:
+                    pass
+            await asyncio.sleep(POOL_PACE_SEC)
+
+    def prune_spares(self, guild: discord.Guild):
+        for hub_id, ids in self.state["spares"].items():
+            if guild.get_channel(int(hub_id)) is not None:
+                ids[:] = [cid for cid in ids if isinstance(guild.get_channel(cid), discord.VoiceChannel)]
+        save_state(self.state)
+
+    @tasks.loop(minutes=10)
+    async def pool_keeper(self):
+        for hub_id in TEMP_HUB_IDS:
+            if PERSONAL_HUB_ID and hub_id == PERSONAL_HUB_ID:
+                continue
+            hub = self.bot.get_channel(hub_id)
+            if isinstance(hub, discord.VoiceChannel):
+                self.record_join(hub_id, 0)   # cierra la hora aunque no haya entrado nadie
+                self.schedule_refill(hub)
+
+    @pool_keeper.before_loop
+    async def _before_pool_keeper(self):
+        await self.bot.wait_until_ready()
+
+    # ---------- cola de creación ----------
+    def pacer(self, guild: discord.Guild) -> CreatePacer:
+        p = self.pacers.get(guild.id)
+        if p is None:
+            p = self.pacers[guild.id] = CreatePacer()
+        return p
+
+    def enqueue_create(self, member: discord.Member, hub: discord.VoiceChannel):
+        key = (hub.id, member.id)
+        if key in self.pending:
+            return  # ya tiene una sala en camino
+        job = self.pending[key] = CreateJob(member, hub)
+        self.create_queues.setdefault(hub.id, deque()).append(job)
+        w = self.create_workers.get(hub.id)
+        if w is None or w.done():
+            self.create_workers[hub.id] = asyncio.create_task(self._create_worker(hub.id))
+
+    def cancel_create(self, hub_id: int, member_id: int):
+        job = self.pending.pop((hub_id, member_id), None)
+        if job is not None:
+            job.cancelled = True
+
+    def _done(self, job: CreateJob):
+        key = (job.hub.id, job.member.id)
+        if self.pending.get(key) is job:
+            del self.pending[key]
+
+    @staticmethod
+    def _still_in_hub(job: CreateJob) -> bool:
+        if job.cancelled:
+            return False
+        member = job.hub.guild.get_member(job.member.id) or job.member
+        voice = member.voice
+        return bool(voice and voice.channel and voice.channel.id == job.hub.id)
+
+    async def _create_worker(self, hub_id: int):
+        q = self.create_queues[hub_id]
+        while q:
+            job = q.popleft()
+            try:
+                if self._still_in_hub(job):
+                    await self._create_room(job)
+            except Exception as e:
+                print(f"[tempvoice] Error creando sala: {type(e).__name__}: {e}")
+            finally:
+                self._done(job)
+
+    async def _discard(self, channel: discord.VoiceChannel):
+        """Se fue antes de estrenarla: la sala no se queda huérfana (y su número queda libre)."""
+        self.forget_channel(channel.id)
+        try:
+            await channel.delete(reason="Join-to-create: el miembro ya no está en el hub")
+        except discord.HTTPException:
+            pass
+
+    async def _create_room(self, job: CreateJob):
+        hub, member = job.hub, job.member
+        is_personal = (PERSONAL_HUB_ID and hub.id == PERSONAL_HUB_ID)
+        overwrites = hub.overwrites
+        category = hub.category
+        bitrate = getattr(hub, "bitrate", 64000)
+        user_limit = (PERSONAL_DEFAULT_LIMIT if is_personal else (DEFAULT_LIMIT if DEFAULT_LIMIT > 0 else 0))
+
+        def room_name():
+            if is_personal:
+                return None, PERSONAL_NAME_TEMPLATE.format(index=1, username=member.display_name)
+            idx = self.next_duo_index(hub.guild, hub.id)
+            return idx, NAME_TEMPLATE.format(index=idx, username=member.display_name)
+
+        new_channel = None
+        idx = None
+        pooled = POOL_MAX > 0 and not is_personal
+        if pooled:
+            self.record_join(hub.id)
+            idx, name = room_name()
+            new_channel = await self.claim_spare(hub, name, user_limit)
+            self.schedule_refill(hub)
+            if new_channel is None:
+                self.allocators[hub.id].release(idx)
+                idx = None
+        if new_channel is None:
+            try:
+                async with self.pacer(hub.guild):
+                    # mientras esperaba turno pudo irse
+                    if not self._still_in_hub(job):
+                        return
+                    idx, name = room_name()
+                    new_channel = await hub.guild.create_voice_channel(
+                        name=name,
+                        overwrites=overwrites,
+                        category=category,
+                        bitrate=bitrate,
+                        user_limit=user_limit
+                    )
+            except discord.HTTPException as e:
+                if idx is not None:
+                    self.allocators[hub.id].release(idx)
+                print(f"[tempvoice] No se pudo crear sala en {hub.name}: {type(e).__name__}: {e}")
+                return
+
+        self.state["channels"][str(new_channel.id)] = {
+            "owner_id": member.id,
+            "hub_id": hub.id,
+            "created_at": datetime.utcnow().isoformat(),
+            "is_personal": is_personal,
+            "index": idx,
+        }
+        save_state(self.state)
+        if not self._still_in_hub(job):
+            return await self._discard(new_channel)
+        # fuera de pending antes de moverlo: ese movimiento (hub → sala) no debe cancelar nada
+        self._done(job)
+        try:
+            await member.move_to(new_channel, reason="Join-to-create")
+        except discord.HTTPException:
+            # se desconectó justo ahora
+            await self._discard(new_channel)
 
     def require_owner_or_mod(self, interaction: discord.Interaction) -> tuple[discord.VoiceChannel, bool]:
         """Returns (channel, is_owner_or_mod). Raises and responds if invalid."""
@@ -127,40 +549,12 @@ class TempVoice(commands.Cog):
     # ---------- events ----------
     @commands.Cog.listener()
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
-        # Join-to-create
-        if after and after.channel and after.channel.id in TEMP_HUB_IDS:
-            hub = after.channel
-            is_personal = (PERSONAL_HUB_ID and hub.id == PERSONAL_HUB_ID)
-
-            if is_personal:
-                name = PERSONAL_NAME_TEMPLATE.format(index=1, username=member.display_name)
-            else:
-                idx = self.next_duo_index(hub.guild, hub.id)
-                name = NAME_TEMPLATE.format(index=idx, username=member.display_name)
-
-            overwrites = hub.overwrites
-            category = hub.category
-            bitrate = getattr(hub, "bitrate", 64000)
-            user_limit = (PERSONAL_DEFAULT_LIMIT if is_personal else (DEFAULT_LIMIT if DEFAULT_LIMIT > 0 else 0))
-
-            try:
-                new_channel = await hub.guild.create_voice_channel(
-                    name=name,
-                    overwrites=overwrites,
-                    category=category,
-                    bitrate=bitrate,
-                    user_limit=user_limit
-                )
-                await member.move_to(new_channel, reason="Join-to-create")
-                self.state["channels"][str(new_channel.id)] = {
-                    "owner_id": member.id,
-                    "hub_id": hub.id,
-                    "created_at": datetime.utcnow().isoformat(),
-                    "is_personal": is_personal
-                }
-                save_state(self.state)
-            except discord.Forbidden:
-                pass
+        # Join-to-create: a la cola del hub (una creación a la vez, con ritmo)
+        if after and after.channel and after.channel.id in TEMP_HUB_IDS and (not before or before.channel != after.channel):
+            self.enqueue_create(member, after.channel)
+        # Se fue del hub antes de tener sala: no crearla
+        if before and before.channel and before.channel.id in TEMP_HUB_IDS and (not after or after.channel != before.channel):
+            self.cancel_create(before.channel.id, member.id)
 
         # Limpiezas y propiedad
         # Si salió de un canal temporal, revisar propietario y auto-borrado.
@@ -174,45 +568,108 @@ class TempVoice(commands.Cog):
                     self.set_owner(ch.id, None)
 
             # Programar borrado si queda vacío
-            if KEEPALIVE_MIN >= 0 and len([m for m in ch.members if not m.bot]) == 0:
-                info = self.state["channels"].get(str(ch.id), {})
-                if info.get("is_personal"):
-                    owner_id = info.get("owner_id")
-                    if owner_id and BOOSTER_ROLE_ID:
-                        owner = ch.guild.get_member(owner_id)
-                        if owner and any(r.id == BOOSTER_ROLE_ID for r in owner.roles):
-                            # Es personal y el dueño es Booster → NO borrar
-                            return
-                # cancelar si ya había tarea
-                t = self.cleanup_tasks.pop(ch.id, None)
-                if t: t.cancel()
-                async def _cleanup():
-                    await asyncio.sleep(KEEPALIVE_MIN * 60 if KEEPALIVE_MIN > 0 else 0)
-                    # Rechequear vacío
-                    if ch and len([m for m in ch.members if not m.bot]) == 0:
-                        # eliminar estado y canal
-                        self.state["channels"].pop(str(ch.id), None)
-                        save_state(self.state)
-                        try:
-                            await ch.delete(reason="Temp voice vacío")
-                        except discord.Forbidden:
-                            pass
-                self.cleanup_tasks[ch.id] = asyncio.create_task(_cleanup())
+            if self._expires(ch):
+                self.schedule_cleanup(ch.id)
 
         # Si entró a un canal temporal, cancelar borrado
         if after and after.channel and isinstance(after.channel, discord.VoiceChannel) and self.is_temp(after.channel):
-            t = self.cleanup_tasks.pop(after.channel.id, None)
-            if t: t.cancel()
+            if self.cleanup.cancel(after.channel.id):
+                save_state(self.state)
 
-    @commands.Cog.listener()
-    async def on_member_update(self, before: discord.Member, after: discord.Member):
-        if not BOOSTER_ROLE_ID:
+    # ---------- borrado de salas vacías ----------
+    def _expires(self, ch: discord.VoiceChannel) -> bool:
+        """Vacía y borrable (las personales de un Booster no se borran)."""
+        if KEEPALIVE_MIN < 0 or any(not m.bot for m in ch.members):
+            return False
+        info = self.state["channels"].get(str(ch.id), {})
+        if info.get("is_personal"):
+            owner_id = info.get("owner_id")
+            if owner_id and BOOSTER_ROLE_ID:
+                owner = ch.guild.get_member(owner_id)
+                if owner and any(r.id == BOOSTER_ROLE_ID for r in owner.roles):
+                    return False
+        return True
+
+    def schedule_cleanup(self, channel_id: int, save: bool = True):
+        self.cleanup.schedule(channel_id, time.time() + max(KEEPALIVE_MIN, 0) * 60)
+        if save:
+            save_state(self.state)
+
+    def rearm_cleanups(self, guild: discord.Guild):
+        """Al arrancar: las salas vacías sin plazo (quedaron de antes del reinicio) se programan, y las ocupadas pierden el suyo."""
+        for cid, info in list(self.state["channels"].items()):
+            ch = guild.get_channel(int(cid))
+            if not isinstance(ch, discord.VoiceChannel):
+                continue
+            if self._expires(ch):
+                if cid not in self.state["cleanup"]:
+                    self.schedule_cleanup(ch.id, save=False)
+            else:
+                self.cleanup.cancel(ch.id)
+        save_state(self.state)
+
+    async def _expire(self, channel_id: int):
+        ch = self.bot.get_channel(channel_id)
+        if not isinstance(ch, discord.VoiceChannel):
+            self.forget_channel(channel_id)
             return
-        b_roles = {r.id for r in before.roles}
-        a_roles = {r.id for r in after.roles}
-        lost = (BOOSTER_ROLE_ID in b_roles) and (BOOSTER_ROLE_ID not in a_roles)
-        if not lost:
+        # Rechequear vacío
+        if not self._expires(ch):
             return
+        self.forget_channel(ch.id)
+        try:
+            await ch.delete(reason="Temp voice vacío")
+        except discord.HTTPException:
+            pass
+
+    async def _run_cleanups(self):
+        await self.bot.wait_until_ready()
+        while True:
+            due = await self.cleanup.next_due()
+            for cid in due:
+                try:
+                    await self._expire(cid)
+                except Exception as e:
+                    print(f"[tempvoice] Error borrando sala {cid}: {type(e).__name__}: {e}")
+            save_state(self.state)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        for guild in self.bot.guilds:
+            self.rebuild_allocators(guild)
+            self.prune_spares(guild)
+            self.rearm_cleanups(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        # borrado a mano o por otro bot: liberar el número
+        self.forget_channel(channel.id)
+        for ids in self.state["spares"].values():
+            if channel.id in ids:
+                ids.remove(channel.id)
+                save_state(self.state)
+
+    async def cog_load(self):
+        events = self.bot.get_cog("RoleEvents")
+        if events is None:
+            print("[tempvoice] RoleEvents no cargado: las salas personales no se cierran al perder el boost.")
+        else:
+            events.subscribe(BOOSTER_ROLE_ID, lost=self.on_booster_lost)
+        if POOL_MAX > 0:
+            self.pool_keeper.start()
+        self._cleanup_runner = asyncio.create_task(self._run_cleanups())
+
+    async def cog_unload(self):
+        events = self.bot.get_cog("RoleEvents")
+        if events is not None:
+            events.unsubscribe_owner(self)
+        self.pool_keeper.cancel()
+        if self._cleanup_runner is not None:
+            self._cleanup_runner.cancel()
+        for t in list(self.refill_tasks.values()) + list(self.create_workers.values()):
+            t.cancel()
+
+    async def on_booster_lost(self, after: discord.Member, role_id: int):
         for cid, info in list(self.state["channels"].items()):
             if info.get("is_personal") and info.get("owner_id") == after.id:
                 ch = after.guild.get_channel(int(cid))
@@ -221,8 +678,7 @@ class TempVoice(commands.Cog):
                         await ch.delete(reason="Personal sin Booster (auto-clean)")
                     except discord.Forbidden:
                         pass
-                    self.state["channels"].pop(cid, None)
-                    save_state(self.state)
+                    self.forget_channel(int(cid))
 
     # ---------- commands ----------
     group = app_commands.Group(name="voice", description="Administra tu canal temporal")
@@ -412,7 +868,7 @@ class TempVoice(commands.Cog):
                     deleted += 1
                 except discord.Forbidden:
                     pass
-                self.state["channels"].pop(cid, None)
+                self.forget_channel(int(cid), save=False)
         save_state(self.state)
         await interaction.response.send_message(f"Eliminados **{deleted}** canales vacíos.", ephemeral=True)
 
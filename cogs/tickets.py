@@ -8,6 +8,14 @@ from discord.errors import Forbidden, NotFound, HTTPException
 CONFIG_PATH = "data/config.json"
 TICKETS_PATH = "data/tickets.json"
 
+# también lo indexa la IA (cogs.ai) para responder dudas sobre tickets
+TICKET_RULES = (
+    "1) Explica tu caso con respeto.\n"
+    "2) Evita el spam o ping innecesario.\n"
+    "3) Adjunta capturas si aplica.\n"
+    "4) Ten paciencia mientras te atendemos."
+)
+
 def load_json(path: str):
     try:
         with open(path, "r", encoding="utf-8") as f:
@@ -127,12 +135,7 @@ class TicketPanelView(discord.ui.View):
             await _defer_once(interaction, ephemeral=True)
             embed = discord.Embed(
                 title="📜 Reglas del ticket",
-                description=(
-                    "1) Explica tu caso con respeto.\n"
-                    "2) Evita el spam o ping innecesario.\n"
-                    "3) Adjunta capturas si aplica.\n"
-                    "4) Ten paciencia mientras te atendemos."
-                ),
+                description=TICKET_RULES,
                 color=discord.Color.orange()
             )
             await interaction.followup.send(embed=embed, ephemeral=True)
@@ -227,6 +230,30 @@ class Tickets(commands.Cog):
     def _save_state(self):
         save_json(TICKETS_PATH, self.state)
 
+    def knowledge_text(self) -> str:
+        """Reglas y motivos del panel en markdown (lo usa la IA como fuente de conocimiento)."""
+        reasons = ", ".join(self.panel_reasons)
+        return (
+            "# Tickets\n\n"
+            "Para hablar con el staff se abre un ticket desde el panel de tickets: "
+            f"eliges el motivo ({reasons}) y pulsas **Abrir ticket**. Se crea un canal privado "
+            "solo para ti y el staff.\n\n"
+            f"## Reglas del ticket\n\n{TICKET_RULES}\n"
+        )
+
+    async def _log(self, guild: discord.Guild, line: str):
+        """Log de tickets vía Notifier (digest); si no está cargado, envío directo."""
+        logs_id = int(self.logs_channel_id or 0)
+        if not logs_id:
+            return
+        notifier = self.bot.get_cog("Notifier")
+        if notifier is not None:
+            notifier.post(logs_id, line, title="Tickets", color=0x57F287)
+            return
+        logch = guild.get_channel(logs_id)
+        if isinstance(logch, discord.TextChannel):
+            await logch.send(line)
+
     def staff_roles(self, guild: discord.Guild) -> List[discord.Role]:
         roles = []
         for rid in self.staff_role_ids:
@@ -351,10 +378,7 @@ class Tickets(commands.Cog):
                 view=TicketControlsView(self)
             )
 
-            if self.logs_channel_id:
-                logch = guild.get_channel(self.logs_channel_id)
-                if isinstance(logch, discord.TextChannel):
-                    await logch.send(f"🟢 Ticket **abierto** por {user.mention} → {channel.mention} (Motivo: {motivo or 'N/A'})")
+            await self._log(guild, f"🟢 Ticket **abierto** por {user.mention} → {channel.mention} (Motivo: {motivo or 'N/A'})")
 
             await interaction.followup.send(f"✅ Ticket abierto: {channel.mention}", ephemeral=True)
         except Forbidden:
@@ -418,7 +442,6 @@ class Tickets(commands.Cog):
         if not isinstance(ch, discord.TextChannel) or guild is None:
             return await interaction.followup.send("❌ Canal inválido.", ephemeral=True)
 
-        logs_id = int(self.logs_channel_id or 0)
         owner_id = self._ticket_owner_id(ch)
         if owner_id:
             self.state.pop(str(owner_id), None)
@@ -426,10 +449,7 @@ class Tickets(commands.Cog):
 
         try:
             await interaction.followup.send("🗑️ Borrando este ticket…", ephemeral=True)
-            if logs_id:
-                log_ch = guild.get_channel(logs_id)
-                if isinstance(log_ch, discord.TextChannel):
-                    await log_ch.send(f"🗑️ Ticket **{ch.name}** borrado por {interaction.user.mention}")
+            await self._log(guild, f"🗑️ Ticket **{ch.name}** borrado por {interaction.user.mention}")
 
             await asyncio.sleep(0.2)
             await ch.delete(reason=f"Borrado por {interaction.user}")
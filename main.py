@@ -12,6 +12,9 @@ TOKEN = os.getenv("DISCORD_TOKEN")
 GUILD_ID = os.getenv("GUILD_ID")
 SYNC_ON_START = os.getenv("SYNC_ON_START", "1") == "1"
 SYNC_COOLDOWN_MIN = int(os.getenv("SYNC_COOLDOWN_MIN", "3"))
+# Caché global de mensajes de discord.py (por defecto 1000). Los logs de borrado/edición
+# usan los snapshots propios de cogs.modlog, así que basta con una caché pequeña.
+MESSAGE_CACHE_SIZE = int(os.getenv("MESSAGE_CACHE_SIZE", "200"))
 _LAST_SYNC_FILE = ".last_command_sync"
 CONFIG_PATH = "data/config.json"
 
@@ -23,7 +26,7 @@ intents.message_content = True   # necesario para leer mensajes en automations
 # ---- Bot ----
 class MyBot(commands.Bot):
     def __init__(self):
-        super().__init__(command_prefix="!", intents=intents)
+        super().__init__(command_prefix="!", intents=intents, max_messages=MESSAGE_CACHE_SIZE or None)
         self.config = {}
         try:
             with open(CONFIG_PATH, "r", encoding="utf-8") as fp:
@@ -38,7 +41,12 @@ class MyBot(commands.Bot):
             "cogs.admin",
             "cogs.fun",
             "cogs.poll",
+            "cogs.notify",
+            "cogs.roleevents",
             "cogs.automations",
+            "cogs.antispam",
+            "cogs.activity",
+            "cogs.modlog",
             "cogs.tempvoice",
             "cogs.setup",
             "cogs.tickets",
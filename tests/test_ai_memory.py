@@ -0,0 +1,21 @@
+import unittest
+
+from cogs.ai_core.memory import is_follow_up
+
+
+class FollowUpTest(unittest.TestCase):
+    def test_follow_ups(self):
+        for text in ("¿y contra tanks?", "y si voy mid", "pero en aram", "por qué?", "seguro?",
+                     "eso sirve en aram?", "y lo mismo para lux", "what about zed"):
+            with self.subTest(text=text):
+                self.assertTrue(is_follow_up(text))
+
+    def test_self_contained(self):
+        for text in ("build de jinx", "como juego contra yasuo", "que es el split push",
+                     "counter de zed", "cuando hacer baron", "mejor jungla para subir", ""):
+            with self.subTest(text=text):
+                self.assertFalse(is_follow_up(text))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import time
+import random
+import unittest
+
+from cogs import antispam
+from cogs.antispam import MinHasher, MinHashIndex, normalize_text
+
+
+def _text(rng: random.Random, n: int) -> str:
+    words = "nitro gratis entra ya al link regalo discord steam free skins reclama ahora premio".split()
+    out = []
+    while sum(len(w) + 1 for w in out) < n:
+        out.append(rng.choice(words) + str(rng.randint(0, 999)))
+    return " ".join(out)[:n]
+
+
+class MinHasherTest(unittest.TestCase):
+    def setUp(self):
+        self.hasher = MinHasher(64)
+
+    def test_near_duplicates_are_similar(self):
+        a = normalize_text("Nitro GRATIS para todos, entra ya a discord-gift.com y reclama tu regalo!!")
+        b = normalize_text("nitro gratis para todos entra ya a discord-gift.com y reclama tu regalo")
+        c = normalize_text("alguien para unas partidas de aram esta noche? voy de support")
+        sa, sb, sc = (self.hasher.signature(t) for t in (a, b, c))
+        self.assertGreater(MinHashIndex.similarity(sa, sb), 0.8)
+        self.assertLess(MinHashIndex.similarity(sa, sc), 0.3)
+
+    def test_numpy_and_python_paths_agree(self):
+        if antispam.np is None:
+            self.skipTest("sin numpy")
+        text = normalize_text(_text(random.Random(1), 600))
+        fast = self.hasher.signature(text)
+        np, antispam.np = antispam.np, None
+        try:
+            slow = MinHasher(64).signature(text)
+        finally:
+            antispam.np = np
+        self.assertEqual(fast, slow)
+
+    def test_long_messages_have_bounded_cost(self):
+        rng = random.Random(7)
+        texts = [normalize_text(_text(rng, 4000)) for _ in range(20)]
+        started = time.perf_counter()
+        for t in texts:
+            self.hasher.signature(t)
+        per_message = (time.perf_counter() - started) / len(texts)
+        # sin el tope de caracteres un mensaje de 4000 costaba ~80 ms
+        self.assertLess(per_message, 0.010)
+        # más allá de max_chars el texto no influye en la firma
+        self.assertEqual(self.hasher.signature(texts[0]), self.hasher.signature(texts[0][:self.hasher.max_chars]))
+
+
+if __name__ == "__main__":
+    unittest.main()
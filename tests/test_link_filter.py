@@ -0,0 +1,56 @@
+import unittest
+
+from cogs.automations import LinkFilter
+
+
+class BlockedDomainTest(unittest.TestCase):
+    def setUp(self):
+        self.filter = LinkFilter(["discord-gift.com"], ["safe.discord-gift.com"])
+
+    def test_plain_and_url_forms(self):
+        for text in (
+            "discord-gift.com",
+            "https://discord-gift.com/claim",
+            "http://user@discord-gift.com:8080/x",
+            "<https://www.discord-gift.com>",
+            "[nitro](https://discord-gift.com)",
+            "mira discord-gift.com.",
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(self.filter.blocked_domain(text), "discord-gift.com")
+
+    def test_subdomain_reports_full_host(self):
+        self.assertEqual(self.filter.blocked_domain("sub.discord-gift.com/a"), "sub.discord-gift.com")
+
+    def test_punctuation_quotes_and_markdown(self):
+        for text in (
+            "discord-gift.com, claim now",
+            "mira discord-gift.com!",
+            "discord-gift.com;",
+            '"discord-gift.com"',
+            "'discord-gift.com'",
+            "`discord-gift.com`",
+            "**discord-gift.com**",
+            "__discord-gift.com__",
+            "~~discord-gift.com~~",
+            "||discord-gift.com||",
+            "(discord-gift.com)",
+            "¿discord-gift.com?",
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(self.filter.blocked_domain(text), "discord-gift.com")
+
+    def test_allowed_and_lookalikes(self):
+        for text in (
+            "safe.discord-gift.com/ok",
+            "discord-gift.community",
+            "notdiscord-gift.com",
+            "discord-gift.com-evil.net",
+            "sin links por aquí",
+        ):
+            with self.subTest(text=text):
+                self.assertIsNone(self.filter.blocked_domain(text))
+
+
+if __name__ == "__main__":
+    unittest.main()
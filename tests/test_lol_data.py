@@ -0,0 +1,81 @@
+import os
+import json
+import tempfile
+import unittest
+
+from cogs.ai_core.loldata import LolData
+
+
+def _champion(cid: str, name: str, spells: list[str]) -> dict:
+    return {
+        "id": cid, "name": name, "title": f"título de {name}", "tags": ["Fighter"], "partype": "Maná",
+        "blurb": f"Historia de {name}.",
+        "stats": {"hp": 600, "hpperlevel": 100, "armor": 30, "attackdamage": 60, "attackspeed": 0.65,
+                  "movespeed": 340, "attackrange": 125},
+        "passive": {"name": f"Pasiva de {name}", "description": "Hace algo."},
+        "spells": [{"name": s, "description": f"{s} hace daño.", "cooldownBurn": "8", "costBurn": "50",
+                    "rangeBurn": "600"} for s in spells],
+    }
+
+
+CHAMPIONS = {
+    "version": "14.20.1",
+    "data": {
+        "Jinx": _champion("Jinx", "Jinx", ["¡Cambio!", "¡Zap!", "¡Masca fuego!", "¡Supermegacohete mortal!"]),
+        "Vi": _champion("Vi", "Vi", ["Rompebóvedas", "Golpes demoledores", "Fuerza excesiva", "Asalto y agresión"]),
+        "MissFortune": _champion("MissFortune", "Miss Fortune", ["Doble disparo", "Pavoneo", "Lluvia de balas", "Tormenta de balas"]),
+    },
+}
+ITEMS = {
+    "version": "14.20.1",
+    "data": {
+        "1038": {"name": "Espada larga", "gold": {"base": 350, "total": 350, "sell": 245, "purchasable": True},
+                 "maps": {"11": True}, "into": ["3031"]},
+        "3031": {"name": "Filo del Infinito", "gold": {"base": 625, "total": 3450, "sell": 2415, "purchasable": True},
+                 "maps": {"11": True}, "from": ["1038"], "description": "<stats>65 de daño de ataque</stats>"},
+    },
+}
+
+
+class LolDataTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        for name, data in (("championFull.json", CHAMPIONS), ("item.json", ITEMS)):
+            with open(os.path.join(cls.tmp.name, name), "w", encoding="utf-8") as f:
+                json.dump(data, f)
+        cls.lol = LolData(cls.tmp.name)
+        assert cls.lol.load()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_long_names_and_typos(self):
+        self.assertIn("Supermegacohete", self.lol.answer("ulti de jinx") or "")
+        self.assertIn("Supermegacohete", self.lol.answer("ulti de jnix") or "")
+        self.assertIn("3450", self.lol.answer("cuanto cuesta el filo del infinto") or "")
+
+    def test_two_letter_champion(self):
+        for text, expected in (
+            ("que es vi", "título de Vi"),
+            ("quien es vi", "título de Vi"),
+            ("vi q", "Rompebóvedas"),
+            ("la e de vi?", "Fuerza excesiva"),
+            ("ulti de vi", "Asalto y agresión"),
+            ("pasiva de Vi", "Pasiva de Vi"),
+        ):
+            with self.subTest(text=text):
+                self.assertIn(expected, self.lol.answer(text) or "")
+
+    def test_aliases_resolve_exactly(self):
+        self.assertIn("Tormenta de balas", self.lol.answer("ulti de mf") or "")
+
+    def test_open_questions_go_to_the_model(self):
+        for text in ("build de vi", "como juego contra jinx", "vi o jinx?", "hola a todos"):
+            with self.subTest(text=text):
+                self.assertIsNone(self.lol.answer(text))
+
+
+if __name__ == "__main__":
+    unittest.main()